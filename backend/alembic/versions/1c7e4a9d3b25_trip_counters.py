@@ -0,0 +1,45 @@
+"""Trip view and copy counters
+
+Revision ID: 1c7e4a9d3b25
+Revises: f4d8b2e6a017
+Create Date: 2026-10-18 21:08:13.540296
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c7e4a9d3b25'
+down_revision = 'f4d8b2e6a017'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('trip_stats',
+    sa.Column('trip_id', sa.UUID(), nullable=False),
+    sa.Column('view_count', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('copy_count', sa.BigInteger(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['trip_id'], ['trips.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('trip_id')
+    )
+    op.add_column('trip_feed', sa.Column('view_count', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('trip_feed', sa.Column('copy_count', sa.BigInteger(), server_default='0', nullable=False))
+    op.alter_column('trip_feed', 'popularity', type_=sa.BigInteger(), existing_nullable=False, existing_server_default='0')
+
+    # Feed popularity counted copies until now; popularity is recomputed with
+    # the default POPULARITY_COPY_WEIGHT of 10
+    op.execute("""
+        INSERT INTO trip_stats (trip_id, copy_count)
+        SELECT trip_id, popularity FROM trip_feed WHERE popularity > 0
+    """)
+    op.execute("UPDATE trip_feed SET copy_count = popularity, popularity = 10 * popularity WHERE popularity > 0")
+
+
+def downgrade() -> None:
+    op.execute("UPDATE trip_feed SET popularity = copy_count")
+    op.alter_column('trip_feed', 'popularity', type_=sa.Integer(), existing_nullable=False, existing_server_default='0')
+    op.drop_column('trip_feed', 'copy_count')
+    op.drop_column('trip_feed', 'view_count')
+    op.drop_table('trip_stats')
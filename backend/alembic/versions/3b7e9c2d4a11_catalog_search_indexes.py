@@ -0,0 +1,50 @@
+"""Catalog search indexes
+
+Revision ID: 3b7e9c2d4a11
+Revises: f1ad3a8efc27
+Create Date: 2026-10-18 09:12:44.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e9c2d4a11'
+down_revision = 'f1ad3a8efc27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column('cities', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(country, '') || ' ' || coalesce(description, ''))", persisted=True),
+        nullable=True,
+    ))
+    op.add_column('activities', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))", persisted=True),
+        nullable=True,
+    ))
+
+    op.create_index('ix_cities_name_trgm', 'cities', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_cities_country_trgm', 'cities', ['country'], unique=False, postgresql_using='gin', postgresql_ops={'country': 'gin_trgm_ops'})
+    op.create_index('ix_cities_search_vector', 'cities', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_activities_name_trgm', 'activities', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_activities_search_vector', 'activities', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_activities_search_vector', table_name='activities')
+    op.drop_index('ix_activities_name_trgm', table_name='activities')
+    op.drop_index('ix_cities_search_vector', table_name='cities')
+    op.drop_index('ix_cities_country_trgm', table_name='cities')
+    op.drop_index('ix_cities_name_trgm', table_name='cities')
+    op.drop_column('activities', 'search_vector')
+    op.drop_column('cities', 'search_vector')
@@ -0,0 +1,28 @@
+"""Keyset pagination indexes
+
+Revision ID: 5d2f8a6c1e90
+Revises: 3b7e9c2d4a11
+Create Date: 2026-10-18 10:41:05.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2f8a6c1e90'
+down_revision = '3b7e9c2d4a11'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_cities_rating_name_id', 'cities', [sa.text('rating DESC'), 'name', 'id'], unique=False)
+    op.create_index('ix_activities_name_id', 'activities', ['name', 'id'], unique=False)
+    op.create_index('ix_trips_user_id_start_date_id', 'trips', ['user_id', 'start_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trips_user_id_start_date_id', table_name='trips')
+    op.drop_index('ix_activities_name_id', table_name='activities')
+    op.drop_index('ix_cities_rating_name_id', table_name='cities')
@@ -0,0 +1,64 @@
+"""Trip budget rollups
+
+Revision ID: 7a4c1e3b9f02
+Revises: 5d2f8a6c1e90
+Create Date: 2026-10-18 13:06:27.511940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4c1e3b9f02'
+down_revision = '5d2f8a6c1e90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('trip_expenses', sa.Column('stop_id', sa.UUID(), nullable=True))
+    op.add_column('trip_expenses', sa.Column('spent_on', sa.Date(), nullable=True))
+    op.create_foreign_key(
+        'trip_expenses_stop_id_fkey', 'trip_expenses', 'trip_stops', ['stop_id'], ['id'], ondelete='SET NULL'
+    )
+
+    op.create_table('trip_budget_rollups',
+    sa.Column('trip_id', sa.UUID(), nullable=False),
+    sa.Column('dimension', sa.String(), nullable=False),
+    sa.Column('bucket', sa.String(), nullable=False),
+    sa.Column('planned', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('actual', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['trip_id'], ['trips.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('trip_id', 'dimension', 'bucket')
+    )
+
+    # Backfill from existing itineraries and expenses
+    op.execute("""
+        INSERT INTO trip_budget_rollups (trip_id, dimension, bucket, planned, actual)
+        SELECT trip_id, dimension, bucket, sum(planned), sum(actual)
+        FROM (
+            SELECT s.trip_id, b.dimension, b.bucket, coalesce(a.cost, 0) AS planned, 0 AS actual
+            FROM stop_activities sa
+            JOIN trip_stops s ON s.id = sa.stop_id
+            JOIN activities a ON a.id = sa.activity_id
+            CROSS JOIN LATERAL (VALUES
+                ('total', ''), ('category', 'activities'), ('stop', s.id::text), ('day', s.start_date::text)
+            ) AS b (dimension, bucket)
+            UNION ALL
+            SELECT e.trip_id, b.dimension, b.bucket, 0, e.amount
+            FROM trip_expenses e
+            CROSS JOIN LATERAL (VALUES
+                ('total', ''), ('category', e.category), ('stop', e.stop_id::text), ('day', e.spent_on::text)
+            ) AS b (dimension, bucket)
+        ) AS amounts
+        WHERE bucket IS NOT NULL
+        GROUP BY trip_id, dimension, bucket
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('trip_budget_rollups')
+    op.drop_constraint('trip_expenses_stop_id_fkey', 'trip_expenses', type_='foreignkey')
+    op.drop_column('trip_expenses', 'spent_on')
+    op.drop_column('trip_expenses', 'stop_id')
@@ -0,0 +1,26 @@
+"""Calendar indexes
+
+Revision ID: 9e2b6d4f1a73
+Revises: 7a4c1e3b9f02
+Create Date: 2026-10-18 14:22:51.730418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e2b6d4f1a73'
+down_revision = '7a4c1e3b9f02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_trip_stops_trip_id_start_date_end_date', 'trip_stops', ['trip_id', 'start_date', 'end_date'], unique=False)
+    op.create_index('ix_stop_activities_stop_id_scheduled_time', 'stop_activities', ['stop_id', 'scheduled_time'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stop_activities_stop_id_scheduled_time', table_name='stop_activities')
+    op.drop_index('ix_trip_stops_trip_id_start_date_end_date', table_name='trip_stops')
@@ -0,0 +1,28 @@
+"""Catalog natural keys
+
+Revision ID: b81f0c5d2e64
+Revises: 9e2b6d4f1a73
+Create Date: 2026-10-18 15:48:03.214597
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81f0c5d2e64'
+down_revision = '9e2b6d4f1a73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Fails if the catalog already holds duplicate cities or activities;
+    # merge those before upgrading.
+    op.create_index('ux_cities_name_country', 'cities', ['name', 'country'], unique=True)
+    op.create_index('ux_activities_city_id_name', 'activities', ['city_id', 'name'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ux_activities_city_id_name', table_name='activities')
+    op.drop_index('ux_cities_name_country', table_name='cities')
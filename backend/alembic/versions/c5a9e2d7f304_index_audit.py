@@ -0,0 +1,44 @@
+"""Index audit
+
+Revision ID: c5a9e2d7f304
+Revises: b81f0c5d2e64
+Create Date: 2026-10-18 16:35:12.904118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a9e2d7f304'
+down_revision = 'b81f0c5d2e64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Foreign keys without a leading index
+    op.create_index('ix_trip_stops_city_id', 'trip_stops', ['city_id'], unique=False)
+    op.create_index('ix_stop_activities_activity_id', 'stop_activities', ['activity_id'], unique=False)
+    op.create_index('ix_trip_expenses_trip_id_spent_on', 'trip_expenses', ['trip_id', 'spent_on'], unique=False)
+    op.create_index(
+        'ix_trip_expenses_stop_id', 'trip_expenses', ['stop_id'], unique=False,
+        postgresql_where=sa.text('stop_id IS NOT NULL'),
+    )
+    # Explore filters, in keyset order
+    op.create_index('ix_activities_category_name_id', 'activities', ['category', 'name', 'id'], unique=False)
+    op.create_index(
+        'ix_cities_region_rating_name_id', 'cities', ['region', sa.text('rating DESC'), 'name', 'id'], unique=False
+    )
+    # Covered by ux_cities_name_country
+    op.drop_index('ix_cities_name', table_name='cities')
+
+
+def downgrade() -> None:
+    op.create_index('ix_cities_name', 'cities', ['name'], unique=False)
+    op.drop_index('ix_cities_region_rating_name_id', table_name='cities')
+    op.drop_index('ix_activities_category_name_id', table_name='activities')
+    op.drop_index('ix_trip_expenses_stop_id', table_name='trip_expenses')
+    op.drop_index('ix_trip_expenses_trip_id_spent_on', table_name='trip_expenses')
+    op.drop_index('ix_stop_activities_activity_id', table_name='stop_activities')
+    op.drop_index('ix_trip_stops_city_id', table_name='trip_stops')
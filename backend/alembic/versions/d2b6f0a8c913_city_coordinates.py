@@ -0,0 +1,89 @@
+"""City coordinates
+
+Revision ID: d2b6f0a8c913
+Revises: c5a9e2d7f304
+Create Date: 2026-10-18 17:10:44.518902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2b6f0a8c913'
+down_revision = 'c5a9e2d7f304'
+branch_labels = None
+depends_on = None
+
+
+# Same bit order and rounding as app.core.geo.encode
+GEOHASH_ENCODE = """
+CREATE FUNCTION geohash_encode(lat double precision, lon double precision, chars integer)
+RETURNS text
+LANGUAGE plpgsql IMMUTABLE STRICT PARALLEL SAFE
+AS $$
+DECLARE
+    alphabet constant text := '0123456789bcdefghjkmnpqrstuvwxyz';
+    lat_lo double precision := -90;
+    lat_hi double precision := 90;
+    lon_lo double precision := -180;
+    lon_hi double precision := 180;
+    mid double precision;
+    hash text := '';
+    ch integer := 0;
+    bits integer := 0;
+    even boolean := true;
+BEGIN
+    WHILE length(hash) < chars LOOP
+        IF even THEN
+            mid := (lon_lo + lon_hi) / 2;
+            IF lon >= mid THEN
+                ch := ch * 2 + 1;
+                lon_lo := mid;
+            ELSE
+                ch := ch * 2;
+                lon_hi := mid;
+            END IF;
+        ELSE
+            mid := (lat_lo + lat_hi) / 2;
+            IF lat >= mid THEN
+                ch := ch * 2 + 1;
+                lat_lo := mid;
+            ELSE
+                ch := ch * 2;
+                lat_hi := mid;
+            END IF;
+        END IF;
+        even := NOT even;
+        bits := bits + 1;
+        IF bits = 5 THEN
+            hash := hash || substr(alphabet, ch + 1, 1);
+            ch := 0;
+            bits := 0;
+        END IF;
+    END LOOP;
+    RETURN hash;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    op.execute(GEOHASH_ENCODE)
+    op.add_column('cities', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('cities', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('cities', sa.Column(
+        'geohash', sa.String(),
+        sa.Computed('geohash_encode(latitude, longitude, 9)', persisted=True), nullable=True,
+    ))
+    op.create_index(
+        'ix_cities_geohash', 'cities', ['geohash'], unique=False, postgresql_ops={'geohash': 'text_pattern_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cities_geohash', table_name='cities')
+    op.drop_column('cities', 'geohash')
+    op.drop_column('cities', 'longitude')
+    op.drop_column('cities', 'latitude')
+    op.execute("DROP FUNCTION geohash_encode(double precision, double precision, integer)")
@@ -0,0 +1,32 @@
+"""Activity schedule dates
+
+Revision ID: e7c3a1f5b208
+Revises: d2b6f0a8c913
+Create Date: 2026-10-18 17:52:06.213874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c3a1f5b208'
+down_revision = 'd2b6f0a8c913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('stop_activities', sa.Column('scheduled_date', sa.Date(), nullable=True))
+    # A stop's schedule in day and time order
+    op.create_index(
+        'ix_stop_activities_stop_id_scheduled_date_time', 'stop_activities',
+        ['stop_id', 'scheduled_date', 'scheduled_time'], unique=False,
+    )
+    op.drop_index('ix_stop_activities_stop_id_scheduled_time', table_name='stop_activities')
+
+
+def downgrade() -> None:
+    op.create_index('ix_stop_activities_stop_id_scheduled_time', 'stop_activities', ['stop_id', 'scheduled_time'], unique=False)
+    op.drop_index('ix_stop_activities_stop_id_scheduled_date_time', table_name='stop_activities')
+    op.drop_column('stop_activities', 'scheduled_date')
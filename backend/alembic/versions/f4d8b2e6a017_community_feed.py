@@ -0,0 +1,69 @@
+"""Community feed
+
+Revision ID: f4d8b2e6a017
+Revises: e7c3a1f5b208
+Create Date: 2026-10-18 19:24:41.087352
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4d8b2e6a017'
+down_revision = 'e7c3a1f5b208'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Feed rebuilds only visit public trips
+    op.create_index('ix_trips_public_id', 'trips', ['id'], unique=False, postgresql_where=sa.text('is_public'))
+
+    op.create_table('trip_feed',
+    sa.Column('trip_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('cover_image', sa.String(), nullable=True),
+    sa.Column('start_date', sa.Date(), nullable=True),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('city_names', postgresql.ARRAY(sa.String()), server_default='{}', nullable=False),
+    sa.Column('stop_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('published_at', sa.DateTime(), server_default=sa.text("timezone('utc', now())"), nullable=False),
+    sa.Column('popularity', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['trip_id'], ['trips.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('trip_id')
+    )
+    # Keyset pagination of the feed, newest or most popular first
+    op.create_index(
+        'ix_trip_feed_published_at_trip_id', 'trip_feed',
+        [sa.text('published_at DESC'), sa.text('trip_id DESC')], unique=False,
+    )
+    op.create_index(
+        'ix_trip_feed_popularity_published_at_trip_id', 'trip_feed',
+        [sa.text('popularity DESC'), sa.text('published_at DESC'), sa.text('trip_id DESC')], unique=False,
+    )
+
+    # Backfill the trips that are already public
+    op.execute("""
+        INSERT INTO trip_feed (trip_id, user_id, name, description, cover_image, start_date, end_date, city_names, stop_count)
+        SELECT t.id, t.user_id, t.name, t.description, t.cover_image, t.start_date, t.end_date,
+               coalesce(s.city_names, '{}'), coalesce(s.stop_count, 0)
+        FROM trips t
+        LEFT JOIN LATERAL (
+            SELECT array_agg(c.name ORDER BY ts.order_index, ts.id) AS city_names, count(*) AS stop_count
+            FROM trip_stops ts
+            JOIN cities c ON c.id = ts.city_id
+            WHERE ts.trip_id = t.id
+        ) s ON true
+        WHERE t.is_public
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trip_feed_popularity_published_at_trip_id', table_name='trip_feed')
+    op.drop_index('ix_trip_feed_published_at_trip_id', table_name='trip_feed')
+    op.drop_table('trip_feed')
+    op.drop_index('ix_trips_public_id', table_name='trips', postgresql_where=sa.text('is_public'))
@@ -2,17 +2,49 @@ from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy import select
+from sqlalchemy import select, inspect
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from pydantic import ValidationError
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.user import User
 from app.schemas.user import TokenData
 from app.config import settings
+from app.core import metrics
+from app.core.cache import TTLCache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+# Detached User snapshots keyed by token subject. Each worker process has its
+# own cache, so changes made through another worker are seen after the TTL.
+_principal_cache: TTLCache[User] = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+PRINCIPAL_CACHE_REQUESTS = metrics.Counter(
+    "principal_cache_requests_total",
+    "Authenticated-principal cache lookups by result (hit/miss).",
+    ["result"],
+)
+PRINCIPAL_CACHE_SIZE = metrics.Gauge(
+    "principal_cache_entries",
+    "Entries currently held in the authenticated-principal cache.",
+)
+
+
+def _snapshot(user: User) -> User:
+    """Copy the loaded columns of ``user`` into a detached, session-free instance."""
+    snapshot = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def invalidate_principal(subject: str) -> None:
+    _principal_cache.pop(subject)
+    PRINCIPAL_CACHE_SIZE.set(len(_principal_cache))
+
 async def get_current_user(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
@@ -21,7 +53,7 @@ async def get_current_user(
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        token_data = TokenData(email=payload.get("sub"))
+        token_data = TokenData(email=payload.get("sub"), user_id=payload.get("uid"))
         if token_data.email is None:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -33,11 +65,28 @@ async def get_current_user(
             detail="Could not validate credentials",
         )
     
-    # Use select() statement for SQLAlchemy 2.0+
-    result = await db.execute(select(User).where(User.email == token_data.email))
-    user = result.scalars().first()
+    cached = _principal_cache.get(token_data.email)
+    if cached is not None:
+        PRINCIPAL_CACHE_REQUESTS.inc(result="hit")
+        # Attach a per-session copy without emitting SQL; the cached
+        # snapshot itself is never bound to a session.
+        return await db.merge(cached, load=False)
+    PRINCIPAL_CACHE_REQUESTS.inc(result="miss")
+
+    user = None
+    if token_data.user_id is not None:
+        # Primary-key lookup goes through the session identity map first
+        user = await db.get(User, token_data.user_id)
+        if user is not None and user.email != token_data.email:
+            user = None
+    if user is None:
+        # Use select() statement for SQLAlchemy 2.0+
+        result = await db.execute(select(User).where(User.email == token_data.email))
+        user = result.scalars().first()
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    
+
+    _principal_cache.set(token_data.email, _snapshot(user))
+    PRINCIPAL_CACHE_SIZE.set(len(_principal_cache))
     return user
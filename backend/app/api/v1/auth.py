@@ -45,7 +45,7 @@ async def login_access_token(
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
-        user.email, expires_delta=access_token_expires
+        user.email, expires_delta=access_token_expires, user_id=user.id
     )
     return {
         "access_token": access_token,
@@ -68,7 +68,7 @@ async def login_access_token_json(
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
-        user.email, expires_delta=access_token_expires
+        user.email, expires_delta=access_token_expires, user_id=user.id
     )
     return {
         "access_token": access_token,
@@ -0,0 +1,109 @@
+from typing import Any, List
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.api import deps
+from app.models.trip import Trip
+from app.models.user import User
+from app.schemas.budget import TripBudget
+from app.schemas.trip import TripExpenseCreate, TripExpenseUpdate, TripExpenseResponse
+from app.services import budget_service
+
+router = APIRouter()
+
+async def _get_trip_budget(db: AsyncSession, trip_id: UUID, current_user: User, write: bool = False):
+    result = await db.execute(
+        select(Trip.user_id, Trip.is_public, Trip.estimated_budget).where(Trip.id == trip_id)
+    )
+    trip = result.first()
+    if not trip:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    if trip.user_id != current_user.id and (write or not trip.is_public):
+        raise HTTPException(status_code=403, detail="Not authorized to access this trip")
+    return trip
+
+async def _check_stop(db: AsyncSession, trip_id: UUID, expense_in) -> None:
+    stop_id = getattr(expense_in, "stop_id", None)
+    if stop_id is not None and not await budget_service.stop_in_trip(db, trip_id, stop_id):
+        raise HTTPException(status_code=400, detail="Stop not found in this trip")
+
+@router.get("/{trip_id}/budget", response_model=TripBudget)
+async def read_budget(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    trip_id: UUID,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Planned activity cost versus actual spend, in total and by category,
+    stop and day.
+    """
+    trip = await _get_trip_budget(db, trip_id, current_user)
+    return await budget_service.get_budget(db, trip_id, trip.estimated_budget)
+
+@router.get("/{trip_id}/expenses", response_model=List[TripExpenseResponse])
+async def read_expenses(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    trip_id: UUID,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    List a trip's expenses.
+    """
+    await _get_trip_budget(db, trip_id, current_user)
+    return await budget_service.get_expenses(db, trip_id)
+
+@router.post("/{trip_id}/expenses", response_model=TripExpenseResponse)
+async def create_expense(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    trip_id: UUID,
+    expense_in: TripExpenseCreate,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Record an expense.
+    """
+    await _get_trip_budget(db, trip_id, current_user, write=True)
+    await _check_stop(db, trip_id, expense_in)
+    return await budget_service.create_expense(db, trip_id, expense_in)
+
+@router.put("/{trip_id}/expenses/{expense_id}", response_model=TripExpenseResponse)
+async def update_expense(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    trip_id: UUID,
+    expense_id: UUID,
+    expense_in: TripExpenseUpdate,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Update an expense.
+    """
+    await _get_trip_budget(db, trip_id, current_user, write=True)
+    expense = await budget_service.get_expense(db, trip_id, expense_id)
+    if not expense:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    await _check_stop(db, trip_id, expense_in)
+    return await budget_service.update_expense(db, expense, expense_in)
+
+@router.delete("/{trip_id}/expenses/{expense_id}", response_model=Any)
+async def delete_expense(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    trip_id: UUID,
+    expense_id: UUID,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Delete an expense.
+    """
+    await _get_trip_budget(db, trip_id, current_user, write=True)
+    expense = await budget_service.get_expense(db, trip_id, expense_id)
+    if not expense:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    await budget_service.delete_expense(db, expense)
+    return {"success": True}
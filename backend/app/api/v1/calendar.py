@@ -1,2 +1,33 @@
 # Calendar endpoints
+from datetime import date
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api import deps
+from app.models.user import User
+from app.schemas.calendar import CalendarStop
+from app.services import calendar_service
+
+router = APIRouter()
+
+# Longest range a single request may cover
+MAX_RANGE_DAYS = 366
+
+@router.get("/", response_model=List[CalendarStop])
+async def read_calendar(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+    start: date = Query(..., alias="from"),
+    end: date = Query(..., alias="to"),
+) -> Any:
+    """
+    The user's trip stops and scheduled activities overlapping a date range
+    (inclusive).
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range may not exceed {MAX_RANGE_DAYS} days")
+    return await calendar_service.get_calendar(db, current_user.id, start, end)
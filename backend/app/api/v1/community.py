@@ -1,26 +1,57 @@
-from typing import Any
+from typing import Any, List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
 from app.api import deps
-from app.schemas.trip import TripResponse
+from app.config import settings
+from app.core.pagination import InvalidCursor
+from app.schemas.trip import FeedTrip, TripCounts, TripResponse
 from app.models.trip import Trip, TripStop, StopActivity
 from app.models.user import User
-from app.services import trip_service
+from app.services import feed_service, trip_counters, trip_service
 
 router = APIRouter()
 
+@router.get("/feed", response_model=List[FeedTrip])
+async def read_feed(
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
+    sort: feed_service.FeedSort = "recent",
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+) -> Any:
+    """
+    List public trips, newest first or (`sort=popular`) most viewed and
+    copied first.
+    Pass the `X-Next-Cursor` response header back as `cursor`, with the same
+    `sort`, to fetch the next page.
+    """
+    try:
+        entries, next_cursor = await feed_service.get_feed(db, sort=sort, limit=limit, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return entries
+
 @router.get("/shared/{share_token}", response_model=TripResponse)
 async def read_shared_trip(
     share_token: str,
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
 ) -> Any:
     """
     Get a shared trip by token.
     """
+    if "read_shared_trip" in settings.TRIP_DOCUMENT_SQL_ENDPOINTS:
+        found = await trip_service.get_trip_document(db, share_token=share_token)
+        if not found:
+            raise HTTPException(status_code=404, detail="Trip not found")
+        trip_counters.record_view(found[0])
+        return Response(content=found[3], media_type="application/json")
+
     stmt = (
         select(Trip)
         .where(Trip.share_token == share_token)
@@ -35,7 +66,8 @@ async def read_shared_trip(
     
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
-        
+
+    trip_counters.record_view(trip.id)
     return trip
 
 @router.post("/copy/{trip_id}", response_model=TripResponse)
@@ -47,56 +79,39 @@ async def copy_trip(
     """
     Copy a public trip to your own trips.
     """
-    # 1. Fetch original trip
-    stmt = (
-        select(Trip)
-        .where(Trip.id == trip_id)
-        .options(
-            selectinload(Trip.stops).selectinload(TripStop.activities)
-        )
-    )
-    result = await db.execute(stmt)
-    original_trip = result.scalars().first()
-    
+    result = await db.execute(select(Trip.user_id, Trip.is_public).where(Trip.id == trip_id))
+    original_trip = result.first()
+
     if not original_trip:
         raise HTTPException(status_code=404, detail="Trip not found")
-        
+
     if not original_trip.is_public and original_trip.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to copy this trip")
 
-    # 2. Create new trip
-    new_trip = Trip(
-        user_id=current_user.id,
-        name=f"Copy of {original_trip.name}",
-        description=original_trip.description,
-        cover_image=original_trip.cover_image,
-        estimated_budget=original_trip.estimated_budget,
-        status="draft"
-    )
-    db.add(new_trip)
-    await db.flush() # Get ID
+    new_trip_id = await trip_service.copy_trip(db, trip_id, user_id=current_user.id)
 
-    # 3. Copy stops and activities
-    for stop in original_trip.stops:
-        new_stop = TripStop(
-            trip_id=new_trip.id,
-            city_id=stop.city_id,
-            order_index=stop.order_index,
-            # Dates might need adjustment, but keeping null/same for now
-        )
-        db.add(new_stop)
-        await db.flush()
-        
-        for activity in stop.activities:
-            new_activity = StopActivity(
-                stop_id=new_stop.id,
-                activity_id=activity.activity_id,
-                # scheduled_time=activity.scheduled_time,
-                notes=activity.notes
-            )
-            db.add(new_activity)
-            
-    await db.commit()
-    
     # Return full trip
-    return await trip_service.get_trip(db, new_trip.id)
+    if "copy_trip" in settings.TRIP_DOCUMENT_SQL_ENDPOINTS:
+        _, _, _, document = await trip_service.get_trip_document(db, trip_id=new_trip_id)
+        return Response(content=document, media_type="application/json")
+    return await trip_service.get_trip(db, new_trip_id)
+
+@router.get("/trips/{trip_id}/counts", response_model=TripCounts)
+async def read_trip_counts(
+    trip_id: UUID,
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Shared-link views and copies of a public trip or one of your own.
+    """
+    result = await db.execute(select(Trip.user_id, Trip.is_public).where(Trip.id == trip_id))
+    trip = result.first()
+
+    if not trip:
+        raise HTTPException(status_code=404, detail="Trip not found")
+
+    if not trip.is_public and trip.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this trip")
+
+    return await trip_counters.get_counts(db, trip_id)
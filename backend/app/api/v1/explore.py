@@ -1,68 +1,131 @@
-from typing import Any, List, Optional
-from fastapi import APIRouter, Depends
+from typing import Any, List, Literal, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
 
 from app.api import deps
-from app.schemas.common import City, Activity
-from app.models.city import City as CityModel
-from app.models.activity import Activity as ActivityModel
+from app.core.pagination import InvalidCursor
+from app.schemas.common import City, Activity, NearbyCity, SimilarActivity, SimilarCity, Suggestion
+from app.services import explore_service, catalog_index
 
 router = APIRouter()
 
 @router.get("/cities", response_model=List[City])
 async def search_cities(
     *,
-    db: AsyncSession = Depends(deps.get_db),
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
     q: Optional[str] = None,
     region: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 20,
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
+    limit: int = Query(20, ge=1, le=100),
 ) -> Any:
     """
-    Search for cities.
+    Search for cities. Matches on name, country and description are ranked
+    by relevance and tolerate typos; without `q` cities are listed by rating.
+    Pass the `X-Next-Cursor` response header back as `cursor` for the next page.
     """
-    stmt = select(CityModel)
-    
-    if q:
-        stmt = stmt.where(
-            or_(
-                CityModel.name.ilike(f"%{q}%"),
-                CityModel.country.ilike(f"%{q}%")
-            )
+    try:
+        cities, next_cursor = await explore_service.search_cities(
+            db, q=q, region=region, skip=skip, limit=limit, cursor=cursor
         )
-    
-    if region:
-        stmt = stmt.where(CityModel.region == region)
-        
-    stmt = stmt.offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return cities
+
+@router.get("/cities/nearby", response_model=List[NearbyCity])
+async def search_cities_nearby(
+    *,
+    db: AsyncSession = Depends(deps.get_read_db),
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(50, gt=0, le=500, description="Search radius in km"),
+    limit: int = Query(20, ge=1, le=100),
+) -> Any:
+    """
+    Cities within `radius` km of a point, nearest first. Cities without
+    coordinates are never returned.
+    """
+    cities = await explore_service.search_cities_nearby(db, lat=lat, lon=lon, radius_km=radius, limit=limit)
+    return [
+        NearbyCity(**City.model_validate(city).model_dump(), distance_km=round(distance_km, 3))
+        for city, distance_km in cities
+    ]
+
+@router.get("/cities/{city_id}/similar", response_model=List[SimilarCity])
+async def similar_cities(
+    *,
+    db: AsyncSession = Depends(deps.get_read_db),
+    city_id: UUID,
+    limit: int = Query(10, ge=1, le=50),
+) -> Any:
+    """
+    Cities like this one in region, cost and rating, and often visited on
+    the same trips. Precomputed by the recommendations job; empty until it
+    has run.
+    """
+    cities = await explore_service.similar_cities(db, city_id, limit=limit)
+    return [SimilarCity(**City.model_validate(city).model_dump(), score=score) for city, score in cities]
 
 @router.get("/activities", response_model=List[Activity])
 async def search_activities(
     *,
-    db: AsyncSession = Depends(deps.get_db),
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
     q: Optional[str] = None,
     city_id: Optional[str] = None,
     category: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 20,
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
+    limit: int = Query(20, ge=1, le=100),
+) -> Any:
+    """
+    Search for activities. Matches on name and description are ranked by
+    relevance and tolerate typos; without `q` activities are listed by name.
+    Pass the `X-Next-Cursor` response header back as `cursor` for the next page.
+    """
+    try:
+        activities, next_cursor = await explore_service.search_activities(
+            db, q=q, city_id=city_id, category=category, skip=skip, limit=limit, cursor=cursor
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return activities
+
+@router.get("/activities/{activity_id}/also-added", response_model=List[SimilarActivity])
+async def also_added_activities(
+    *,
+    db: AsyncSession = Depends(deps.get_read_db),
+    activity_id: UUID,
+    limit: int = Query(10, ge=1, le=50),
+) -> Any:
+    """
+    Activities most often added to the same trips as this one. Precomputed
+    by the recommendations job; empty until it has run.
+    """
+    activities = await explore_service.also_added_activities(db, activity_id, limit=limit)
+    return [
+        SimilarActivity(**Activity.model_validate(activity).model_dump(), score=score)
+        for activity, score in activities
+    ]
+
+@router.get("/autocomplete", response_model=List[Suggestion])
+async def autocomplete(
+    *,
+    q: str = Query(..., min_length=1, max_length=100),
+    kind: Optional[Literal["city", "activity"]] = None,
+    limit: int = Query(10, ge=1, le=50),
 ) -> Any:
     """
-    Search for activities.
+    Ranked city/activity suggestions for search-as-you-type, served from the
+    in-memory catalog index without a database round trip.
     """
-    stmt = select(ActivityModel)
-    
-    if q:
-        stmt = stmt.where(ActivityModel.name.ilike(f"%{q}%"))
-        
-    if city_id:
-        stmt = stmt.where(ActivityModel.city_id == city_id)
-        
-    if category:
-        stmt = stmt.where(ActivityModel.category == category)
-        
-    stmt = stmt.offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    return [
+        Suggestion(id=entry.id, kind=entry.kind, name=entry.name, subtitle=entry.subtitle, score=score)
+        for entry, score in catalog_index.search(q, limit=limit, kind=kind)
+    ]
@@ -0,0 +1,27 @@
+from typing import Literal
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from app.api import deps
+from app.models.user import User
+from app.services import export_service
+
+router = APIRouter()
+
+@router.get("/trips")
+async def export_trips(
+    *,
+    format: Literal["ndjson", "csv", "ics"] = "ndjson",
+    current_user: User = Depends(deps.get_current_user),
+) -> StreamingResponse:
+    """
+    Download all of the user's trips, stops, activities and expenses as
+    NDJSON or CSV, or the dated ones as an iCalendar file. The export is
+    streamed, so it can be arbitrarily large.
+    """
+    generate, media_type, extension = export_service.FORMATS[format]
+    return StreamingResponse(
+        generate(current_user.id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="globetrotter-trips.{extension}"'},
+    )
@@ -1,12 +1,26 @@
 from typing import Any
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
+from app.config import settings
+from app.core.route_optimizer import RouteError
 from app.schemas.trip import TripStopCreate, TripStopResponse, StopActivityCreate, StopActivityResponse
+from app.schemas.itinerary import (
+    ItineraryBatch,
+    ItineraryBatchResponse,
+    RouteOptimization,
+    RouteOptimizeRequest,
+    ScheduleRequest,
+    StopDistanceMatrix,
+    StopSchedule,
+)
+from app.models.trip import Trip, TripStop
 from app.models.user import User
-from app.services import itinerary_service, trip_service
+from app.services import itinerary_service, schedule_service
+from app.services.schedule_service import ScheduleConflict, ScheduleError
 
 router = APIRouter()
 
@@ -21,12 +35,12 @@ async def add_stop(
     """
     Add a stop (city) to a trip.
     """
-    trip = await trip_service.get_trip(db, trip_id)
-    if not trip:
+    owner_id = await db.scalar(select(Trip.user_id).where(Trip.id == trip_id))
+    if owner_id is None:
         raise HTTPException(status_code=404, detail="Trip not found")
-    if trip.user_id != current_user.id:
+    if owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
-        
+
     stop = await itinerary_service.add_stop(db, trip_id, stop_in)
     return stop
 
@@ -60,7 +74,17 @@ async def add_activity(
     Add an activity to a stop.
     """
     # Should verify ownership
-    activity = await itinerary_service.add_activity(db, stop_id, activity_in)
+    # Row lock serialises the slot check against other edits of the trip
+    await db.execute(
+        select(Trip.id).join(TripStop, TripStop.trip_id == Trip.id).where(TripStop.id == stop_id)
+        .with_for_update(of=Trip)
+    )
+    try:
+        activity = await itinerary_service.add_activity(db, stop_id, activity_in)
+    except ScheduleConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ScheduleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return activity
 
 @router.delete("/activities/{activity_id}", response_model=Any)
@@ -77,3 +101,124 @@ async def delete_activity(
     if not success:
          raise HTTPException(status_code=404, detail="Activity not found")
     return {"success": True}
+
+@router.post("/stops/{stop_id}/schedule", response_model=StopSchedule)
+async def schedule_stop(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    stop_id: UUID,
+    schedule_in: ScheduleRequest,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Lay out a stop's activities day by day: activities with a time stay put,
+    the rest go into the earliest free slot of the daily window. Reports
+    fixed activities that overlap and those that fit nowhere. With ``apply``
+    the new dates and times are saved.
+    """
+    stmt = select(Trip.user_id).join(TripStop, TripStop.trip_id == Trip.id).where(TripStop.id == stop_id)
+    if schedule_in.apply:
+        # Row lock serialises against batches and other edits of the trip
+        stmt = stmt.with_for_update(of=Trip)
+    owner_id = await db.scalar(stmt)
+    if owner_id is None:
+        raise HTTPException(status_code=404, detail="Stop not found")
+    if owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    try:
+        return await schedule_service.get_schedule(
+            db, stop_id, schedule_in.day_start, schedule_in.day_end, apply=schedule_in.apply
+        )
+    except ScheduleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/{trip_id}/batch", response_model=ItineraryBatchResponse)
+async def apply_batch(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    trip_id: UUID,
+    batch_in: ItineraryBatch,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Apply a list of add/remove/move/schedule operations to a trip's itinerary
+    atomically. Either every operation is applied or none is; the response
+    reports the outcome of each operation and the resulting itinerary.
+    """
+    # Row lock serialises concurrent batches against the same trip
+    trip = await db.get(Trip, trip_id, with_for_update=True)
+    if not trip:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    if trip.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    applied, results = await itinerary_service.apply_batch(db, trip_id, batch_in.operations)
+    if not applied:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": "Batch not applied",
+                "results": [result.model_dump(mode="json") for result in results],
+            },
+        )
+
+    stops = await itinerary_service.get_itinerary(db, trip_id)
+    return {"trip_id": trip_id, "results": results, "stops": stops}
+
+@router.get("/{trip_id}/distances", response_model=StopDistanceMatrix)
+async def read_distances(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    trip_id: UUID,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Great-circle distance matrix (km) between the trip's stops, plus the
+    legs between consecutive stops and their total.
+    """
+    result = await db.execute(select(Trip.user_id, Trip.is_public).where(Trip.id == trip_id))
+    trip = result.first()
+    if not trip:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    if trip.user_id != current_user.id and not trip.is_public:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return await itinerary_service.get_distance_matrix(db, trip_id)
+
+@router.post("/{trip_id}/optimize", response_model=RouteOptimization)
+async def optimize_route(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    trip_id: UUID,
+    optimize_in: RouteOptimizeRequest,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Suggest the stop order with the shortest total great-circle distance,
+    optionally starting and/or ending at given stops. With ``apply`` the
+    itinerary is reordered to match.
+    """
+    if optimize_in.apply:
+        # Row lock serialises against batches and other reorders of the trip
+        trip = await db.get(Trip, trip_id, with_for_update=True)
+        owner_id = trip.user_id if trip else None
+    else:
+        owner_id = await db.scalar(select(Trip.user_id).where(Trip.id == trip_id))
+    if owner_id is None:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    if owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    budget_ms = settings.ROUTE_OPTIMIZER_TIME_BUDGET_MS
+    if optimize_in.time_budget_ms is not None:
+        budget_ms = min(budget_ms, optimize_in.time_budget_ms)
+    try:
+        return await itinerary_service.optimize_route(
+            db, trip_id,
+            start_stop_id=optimize_in.start_stop_id,
+            end_stop_id=optimize_in.end_stop_id,
+            time_budget_ms=budget_ms,
+            apply=optimize_in.apply,
+        )
+    except RouteError as e:
+        raise HTTPException(status_code=400, detail=str(e))
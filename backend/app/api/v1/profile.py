@@ -31,8 +31,8 @@ async def update_profile(
     update_data = user_in.model_dump(exclude_unset=True)
     if "password" in update_data and update_data["password"]:
         # We need to hash password if it's being updated
-        from app.core.security import get_password_hash
-        hashed_password = get_password_hash(update_data["password"])
+        from app.core.security import hash_password_async
+        hashed_password = await hash_password_async(update_data["password"])
         del update_data["password"]
         current_user.password_hash = hashed_password
         
@@ -43,4 +43,5 @@ async def update_profile(
     db.add(current_user)
     await db.commit()
     await db.refresh(current_user)
+    deps.invalidate_principal(current_user.email)
     return current_user
@@ -1,26 +1,43 @@
-from typing import Any, List
+from typing import Any, List, Literal, Optional, Union
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
-from app.schemas.trip import TripCreate, TripUpdate, TripResponse
+from app.config import settings
+from app.schemas.trip import TripCreate, TripUpdate, TripResponse, TripSummaryResponse
 from app.models.user import User
+from app.core.pagination import InvalidCursor
 from app.services import trip_service
 
 router = APIRouter()
 
-@router.get("/", response_model=List[TripResponse])
+@router.get("/", response_model=Union[List[TripSummaryResponse], List[TripResponse]])
 async def read_trips(
+    response: Response,
     db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
-    skip: int = 0,
-    limit: int = 100,
+    view: Literal["full", "summary"] = "full",
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
+    limit: int = Query(100, ge=1, le=100),
 ) -> Any:
     """
-    Retrieve user's trips.
+    Retrieve user's trips, ordered by start date. Pass the `X-Next-Cursor`
+    response header back as `cursor` to fetch the next page.
+
+    `view=summary` returns stop counts, city names, the date span and expense
+    totals instead of the nested stops and expenses.
     """
-    trips = await trip_service.get_user_trips(db, user_id=current_user.id, skip=skip, limit=limit)
+    list_trips = trip_service.get_user_trip_summaries if view == "summary" else trip_service.get_user_trips
+    try:
+        trips, next_cursor = await list_trips(
+            db, user_id=current_user.id, skip=skip, limit=limit, cursor=cursor
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return trips
 
 @router.post("/", response_model=TripResponse)
@@ -46,6 +63,15 @@ async def read_trip(
     """
     Get trip by ID.
     """
+    if "read_trip" in settings.TRIP_DOCUMENT_SQL_ENDPOINTS:
+        found = await trip_service.get_trip_document(db, trip_id=trip_id)
+        if not found:
+            raise HTTPException(status_code=404, detail="Trip not found")
+        _, user_id, is_public, document = found
+        if user_id != current_user.id and not is_public:
+            raise HTTPException(status_code=403, detail="Not authorized to access this trip")
+        return Response(content=document, media_type="application/json")
+
     trip = await trip_service.get_trip(db, trip_id)
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
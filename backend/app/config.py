@@ -1,4 +1,5 @@
-from typing import List, Any
+from datetime import time
+from typing import List, Any, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator, AnyHttpUrl
 
@@ -8,16 +9,81 @@ class Settings(BaseSettings):
     
     # Database - Read from environment variable
     DATABASE_URL: str
+    # Optional read replica for read-only endpoints; falls back to DATABASE_URL
+    READ_DATABASE_URL: Optional[str] = None
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # Password hashing pool ("thread" or "process")
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Authenticated-principal cache (a TTL of 0 disables it)
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+
+    # Connection pool (per worker process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # SQLAlchemy's cache of asyncpg prepared statements, per connection
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Connecting through pgbouncer in transaction pooling mode: turns off
+    # every prepared-statement cache and gives each statement a unique name
+    DB_PGBOUNCER: bool = False
+
+    # In-memory catalog index for autocomplete (a refresh interval of 0 disables reloads)
+    CATALOG_INDEX_ENABLED: bool = True
+    CATALOG_INDEX_REFRESH_SECONDS: int = 300
+
+    # Recommendations written by `python -m app.recommender`; the file is
+    # reloaded when it changes (a refresh interval of 0 disables the check)
+    RECOMMENDATIONS_PATH: str = "data/recommendations.npz"
+    RECOMMENDATIONS_REFRESH_SECONDS: int = 300
+
+    # Prometheus metrics: per-route request metrics and the /metrics endpoint
+    METRICS_ENABLED: bool = True
+
+    # Per-request SQL accounting: warn above this many statements, or when one
+    # statement shape repeats this many times (0 disables either check);
+    # QUERY_DEBUG logs every request's statements
+    QUERY_BUDGET_PER_REQUEST: int = 25
+    QUERY_REPEAT_THRESHOLD: int = 5
+    QUERY_DEBUG: bool = False
+
+    # Time budget for improving a stop order in POST /itinerary/{trip_id}/optimize;
+    # requests may ask for less, never more
+    ROUTE_OPTIMIZER_TIME_BUDGET_MS: int = 50
+
+    # Activity scheduling: the daily window activities are packed into and the
+    # length assumed for activities without a duration
+    SCHEDULE_DAY_START: time = time(9, 0)
+    SCHEDULE_DAY_END: time = time(21, 0)
+    SCHEDULE_DEFAULT_DURATION_MINUTES: int = 60
+
+    # Shared-trip views and trip copies are counted in memory per worker and
+    # written in one batch every COUNTER_FLUSH_SECONDS, or as soon as
+    # COUNTER_FLUSH_MAX_TRIPS trips have pending counts; a crash loses at
+    # most the counts since the last flush
+    COUNTER_FLUSH_SECONDS: float = 5.0
+    COUNTER_FLUSH_MAX_TRIPS: int = 1000
+    # A copy weighs this many views in the community feed's popularity
+    POPULARITY_COPY_WEIGHT: int = 10
+
+    # Endpoints that serve trip documents built in SQL instead of via the ORM
+    # ("read_trip", "read_shared_trip", "copy_trip"); remove one to fall back to the ORM path
+    TRIP_DOCUMENT_SQL_ENDPOINTS: List[str] = ["read_trip", "read_shared_trip", "copy_trip"]
     
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://localhost:3000"]
 
-    @field_validator("BACKEND_CORS_ORIGINS", mode="before")
+    @field_validator("BACKEND_CORS_ORIGINS", "TRIP_DOCUMENT_SQL_ENDPOINTS", mode="before")
     @classmethod
     def assemble_cors_origins(cls, v: str | List[str]) -> List[str]:
         if isinstance(v, str):
@@ -31,10 +97,12 @@ class Settings(BaseSettings):
             return [i.strip() for i in v.split(",")]
         return v
 
-    @field_validator("DATABASE_URL", mode="after")
+    @field_validator("DATABASE_URL", "READ_DATABASE_URL", mode="after")
     @classmethod
-    def assemble_db_connection(cls, v: str) -> str:
+    def assemble_db_connection(cls, v: Optional[str]) -> Optional[str]:
         """Ensure async driver is used for PostgreSQL connections."""
+        if v is None:
+            return v
         if v.startswith("postgresql://") and "asyncpg" not in v:
             v = v.replace("postgresql://", "postgresql+asyncpg://", 1)
         
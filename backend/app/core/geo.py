@@ -0,0 +1,107 @@
+"""
+Geohash encoding and great-circle distances.
+
+Cities carry a geohash computed by PostgreSQL (``geohash_encode``, created in
+the migration that added coordinates) with the same bit order and rounding as
+``encode`` here, so prefixes computed in Python match the stored column. A
+radius search reads the 3x3 block of cells around the centre at the finest
+precision whose cells are at least as large as the radius: each cell is one
+range scan of the btree index on the column.
+"""
+import math
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Precision stored in cities.geohash (about 4.8 m x 4.8 m cells)
+GEOHASH_PRECISION = 9
+
+_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+_KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+def encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    chars, ch, bits, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                ch, lon_lo = ch * 2 + 1, mid
+            else:
+                ch, lon_hi = ch * 2, mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch, lat_lo = ch * 2 + 1, mid
+            else:
+                ch, lat_hi = ch * 2, mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_ALPHABET[ch])
+            ch, bits = 0, 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Height and width of a cell in degrees."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def covering_prefixes(lat: float, lon: float, radius_km: float) -> List[str]:
+    """
+    Geohash prefixes whose cells together contain every point within
+    ``radius_km`` of ``(lat, lon)``. Empty when the radius is too large for
+    any prefix, in which case the caller has to scan everything.
+    """
+    dlat = radius_km / _KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(min(abs(lat) + dlat, 90.0)))
+    dlon = 360.0 if cos_lat < 1e-9 else radius_km / (_KM_PER_DEGREE_LAT * cos_lat)
+
+    precision = 0
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(candidate)
+        if height >= dlat and width >= dlon:
+            precision = candidate
+            break
+    if precision == 0:
+        return []
+
+    height, width = cell_size(precision)
+    prefixes = set()
+    for step_lat in (-1, 0, 1):
+        cell_lat = lat + step_lat * height
+        if not -90.0 <= cell_lat <= 90.0:
+            continue
+        for step_lon in (-1, 0, 1):
+            cell_lon = (lon + step_lon * width + 180.0) % 360.0 - 180.0
+            prefixes.add(encode(cell_lat, cell_lon, precision))
+    return sorted(prefixes)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def distance_matrix_km(lats: Sequence[Optional[float]], lons: Sequence[Optional[float]]) -> np.ndarray:
+    """
+    Pairwise great-circle distances in km as an n x n array, computed with
+    broadcasting. Rows and columns of points without coordinates are NaN.
+    """
+    lat = np.radians(np.array(lats, dtype=np.float64))
+    lon = np.radians(np.array(lons, dtype=np.float64))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
@@ -0,0 +1,57 @@
+"""
+Request metrics keyed by route template.
+
+Labels use the matched route's path template (``/api/v1/trips/{trip_id}``),
+never the raw path, so the number of series stays bounded. Requests that
+match no route are counted under ``unmatched``.
+"""
+import time
+
+from app.core import metrics
+
+HTTP_REQUEST_SECONDS = metrics.Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of the response.",
+    ["method", "route"],
+)
+HTTP_REQUESTS = metrics.Counter(
+    "http_requests_total",
+    "Completed requests by route and status code.",
+    ["method", "route", "status"],
+)
+HTTP_IN_FLIGHT = metrics.Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled.",
+)
+
+
+class RouteMetricsMiddleware:
+    """ASGI middleware recording latency, status codes and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500  # reported if the app fails before sending a response
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            template = getattr(route, "path_format", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=scope["method"], route=template)
+            HTTP_REQUESTS.inc(method=scope["method"], route=template, status=str(status))
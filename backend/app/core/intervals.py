@@ -0,0 +1,128 @@
+"""
+Interval tree for schedule conflict checks.
+
+A treap keyed on interval start, with every node also holding the largest end
+in its subtree. Random priorities keep the expected depth logarithmic, so
+inserting an interval and finding one that overlaps a query both take
+O(log n) expected time; listing every overlap takes O(log n + k).
+Intervals are half-open: one ending at 10:00 does not overlap one starting
+at 10:00.
+"""
+import random
+from typing import Any, Iterator, List, Optional, Tuple
+
+Interval = Tuple[int, int, Any]  # (start, end, key)
+
+
+class _Node:
+    __slots__ = ("start", "end", "key", "priority", "max_end", "left", "right")
+
+    def __init__(self, start: int, end: int, key: Any, priority: float) -> None:
+        self.start = start
+        self.end = end
+        self.key = key
+        self.priority = priority
+        self.max_end = end
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+    def update(self) -> None:
+        self.max_end = max(
+            self.end,
+            self.left.max_end if self.left else self.end,
+            self.right.max_end if self.right else self.end,
+        )
+
+
+def _rotate_right(node: _Node) -> _Node:
+    top = node.left
+    node.left, top.right = top.right, node
+    node.update()
+    top.update()
+    return top
+
+
+def _rotate_left(node: _Node) -> _Node:
+    top = node.right
+    node.right, top.left = top.left, node
+    node.update()
+    top.update()
+    return top
+
+
+class IntervalTree:
+    def __init__(self, intervals: Iterator[Interval] = (), seed: Optional[int] = None) -> None:
+        self._root: Optional[_Node] = None
+        self._size = 0
+        self._random = random.Random(seed)
+        for start, end, key in intervals:
+            self.add(start, end, key)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, start: int, end: int, key: Any = None) -> None:
+        if end <= start:
+            raise ValueError("Interval must end after it starts")
+        self._root = self._insert(self._root, _Node(start, end, key, self._random.random()))
+        self._size += 1
+
+    def _insert(self, node: Optional[_Node], new: _Node) -> _Node:
+        if node is None:
+            return new
+        if new.start < node.start:
+            node.left = self._insert(node.left, new)
+            if node.left.priority > node.priority:
+                return _rotate_right(node)
+        else:
+            node.right = self._insert(node.right, new)
+            if node.right.priority > node.priority:
+                return _rotate_left(node)
+        node.update()
+        return node
+
+    def find_overlap(self, start: int, end: int) -> Optional[Interval]:
+        """Some interval overlapping ``[start, end)``, or None."""
+        node = self._root
+        while node is not None:
+            if node.start < end and start < node.end:
+                return node.start, node.end, node.key
+            # If the left subtree reaches past ``start`` and holds no overlap,
+            # everything in it (and so everything to the right) starts at or
+            # after ``end``
+            if node.left is not None and node.left.max_end > start:
+                node = node.left
+            else:
+                node = node.right
+        return None
+
+    def overlapping(self, start: int, end: int) -> List[Interval]:
+        """Every interval overlapping ``[start, end)``, ordered by start."""
+        found: List[Interval] = []
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            # Skip subtrees that end before the query or start after it
+            while node is not None and node.max_end > start:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.start >= end:
+                break
+            if start < node.end:
+                found.append((node.start, node.end, node.key))
+            node = node.right
+        return found
+
+    def __iter__(self) -> Iterator[Interval]:
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.start, node.end, node.key
+            node = node.right
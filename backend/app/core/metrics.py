@@ -0,0 +1,150 @@
+"""
+In-process metric primitives.
+
+Every metric is updated from the event loop thread, so plain dict/list
+arithmetic is enough and no locks are taken on the hot path.
+"""
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+REGISTRY: List["_Metric"] = []
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (+Inf last), sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._values.get(key)
+        if series is None:
+            series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._values.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+
+# Prometheus text exposition format (version 0.0.4)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _escape_help(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape(value: str) -> str:
+    return _escape_help(value).replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _render_metric(metric: _Metric) -> List[str]:
+    lines = [f"# HELP {metric.name} {_escape_help(metric.documentation)}", f"# TYPE {metric.name} {metric.kind}"]
+    values = dict(metric._values)
+    if not values and not metric.labelnames:
+        # Unlabelled series are reported from the start, not on first use
+        values[()] = [[0] * (len(metric.buckets) + 1), 0.0] if isinstance(metric, Histogram) else 0
+    for key, value in sorted(values.items()):
+        if isinstance(metric, Histogram):
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip(metric.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{metric.name}_bucket{_labels(metric.labelnames, key, le)} {cumulative}")
+            lines.append(f"{metric.name}_sum{_labels(metric.labelnames, key)} {_number(total)}")
+            lines.append(f"{metric.name}_count{_labels(metric.labelnames, key)} {cumulative}")
+        else:
+            lines.append(f"{metric.name}{_labels(metric.labelnames, key)} {_number(value)}")
+    return lines
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text format."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(_render_metric(metric))
+    return "\n".join(lines) + "\n"
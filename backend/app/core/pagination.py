@@ -0,0 +1,117 @@
+"""
+Opaque keyset (cursor) pagination helpers.
+
+A cursor encodes the sort-key values of the last row of a page. The next page
+is selected with a predicate that seeks past that row, so every page costs the
+same index range scan regardless of how deep it is.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, false, or_, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+# (expression, descending, nullable). Nullable keys follow PostgreSQL's
+# default ordering: NULLS LAST for ascending, NULLS FIRST for descending.
+SortKey = Tuple[Any, bool, bool]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _tag(value: Any) -> List[Any]:
+    if value is None:
+        return ["n", None]
+    if isinstance(value, UUID):
+        return ["u", str(value)]
+    if isinstance(value, datetime):
+        return ["t", value.isoformat()]
+    if isinstance(value, date):
+        return ["d", value.isoformat()]
+    if isinstance(value, bool):
+        raise TypeError("bool is not a supported sort key")
+    if isinstance(value, int):
+        # Kept integral so comparisons against integer columns stay indexable
+        return ["i", value]
+    if isinstance(value, float):
+        return ["f", value]
+    return ["s", str(value)]
+
+
+def _untag(item: Any) -> Any:
+    tag, value = item
+    if tag == "n":
+        return None
+    if tag == "u":
+        return UUID(value)
+    if tag == "t":
+        return datetime.fromisoformat(value)
+    if tag == "d":
+        return date.fromisoformat(value)
+    if tag == "i":
+        return int(value)
+    if tag == "f":
+        return float(value)
+    if tag == "s":
+        return str(value)
+    raise ValueError(tag)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([_tag(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = [_untag(item) for item in json.loads(base64.urlsafe_b64decode(padded))]
+    except Exception as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if len(values) != size:
+        raise InvalidCursor("Cursor does not match this listing")
+    return values
+
+
+def _after(expr: Any, descending: bool, nullable: bool, value: Any) -> ColumnElement:
+    """Rows strictly after ``value`` in this key's sort order."""
+    if value is None:
+        # NULLs sort last ascending (nothing after them) and first descending
+        return expr.isnot(None) if (descending and nullable) else false()
+    after = expr < value if descending else expr > value
+    if nullable and not descending:
+        after = or_(after, expr.is_(None))
+    return after
+
+
+def _equal(expr: Any, value: Any) -> ColumnElement:
+    return expr.is_(None) if value is None else expr == value
+
+
+def keyset_predicate(keys: Sequence[SortKey], values: Sequence[Any]) -> ColumnElement:
+    """``(k1, k2, ...) > (v1, v2, ...)`` honouring per-key direction and NULL order."""
+    directions = {descending for _, descending, _ in keys}
+    if len(directions) == 1 and not any(nullable for _, _, nullable in keys) and None not in values:
+        # A row comparison is a single range bound on a matching index
+        row, after = tuple_(*(expr for expr, _, _ in keys)), tuple_(*values)
+        return row < after if directions.pop() else row > after
+    clauses = []
+    for i, (expr, descending, nullable) in enumerate(keys):
+        prefix = [_equal(keys[j][0], values[j]) for j in range(i)]
+        clauses.append(and_(*prefix, _after(expr, descending, nullable, values[i])))
+    return or_(*clauses)
+
+
+def order_by(keys: Sequence[SortKey]) -> List[Any]:
+    return [expr.desc() if descending else expr.asc() for expr, descending, _ in keys]
+
+
+def next_cursor(rows: Sequence[Any], limit: int, key_values) -> Optional[str]:
+    """Cursor for the page after ``rows`` (fetched with ``limit + 1``), or None on the last page."""
+    if len(rows) <= limit:
+        return None
+    return encode_cursor(key_values(rows[limit - 1]))
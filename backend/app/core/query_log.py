@@ -0,0 +1,137 @@
+"""
+Per-request SQL accounting.
+
+Cursor-execute hooks on every engine record each statement and its duration
+against the request in flight (tracked in a context variable, which follows
+the request into SQLAlchemy's greenlets). ``QueryAccountingMiddleware`` opens
+the log for each HTTP request, reports it in a ``Server-Timing`` header and
+logs a warning when the request goes over ``QUERY_BUDGET_PER_REQUEST``
+statements or repeats one statement shape ``QUERY_REPEAT_THRESHOLD`` times,
+which is the usual signature of an N+1 lazy load.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Runs of bind parameters, so "IN ($1, $2)" and "IN ($1, $2, $3)" share a shape
+_PARAMS = re.compile(r"(?:\$\d+|\?|%\(\w+\)s)(?:\s*,\s*(?:\$\d+|\?|%\(\w+\)s))*")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    return _PARAMS.sub("?", _SPACE.sub(" ", statement).strip())
+
+
+class QueryLog:
+    """Statements run on behalf of one request, as ``(sql, seconds)`` pairs."""
+
+    def __init__(self) -> None:
+        self.statements: List[Tuple[str, float]] = []
+        self.started = time.perf_counter()
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def seconds(self) -> float:
+        return sum(seconds for _, seconds in self.statements)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes executed at least ``threshold`` times."""
+        shapes = Counter(statement_shape(sql) for sql, _ in self.statements)
+        return [(shape, n) for shape, n in shapes.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        total = (time.perf_counter() - self.started) * 1000
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries", app;dur={total:.1f}'
+
+
+_current: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+
+
+def current() -> Optional[QueryLog]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    log = _current.get()
+    if log is not None:
+        started = conn.info["query_started"].pop()
+        log.statements.append((statement, time.perf_counter() - started))
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and _current.get() is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+
+def report(log: QueryLog, method: str, path: str) -> None:
+    budget = settings.QUERY_BUDGET_PER_REQUEST
+    if budget and log.count > budget:
+        logger.warning(
+            "%s %s ran %d SQL statements (budget %d, %.1f ms in the database)",
+            method, path, log.count, budget, log.seconds * 1000,
+        )
+    threshold = settings.QUERY_REPEAT_THRESHOLD
+    if threshold:
+        for shape, n in log.repeated(threshold):
+            logger.warning("%s %s ran the same statement %d times (possible N+1): %.200s", method, path, n, shape)
+    if settings.QUERY_DEBUG:
+        logger.info(
+            "%s %s statements:\n%s", method, path,
+            "\n".join(f"  {seconds * 1000:8.2f} ms  {_SPACE.sub(' ', sql).strip()}" for sql, seconds in log.statements),
+        )
+
+
+class QueryAccountingMiddleware:
+    """ASGI middleware that opens a query log per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+        token = _current.set(log)
+
+        async def send_with_timing(message):
+            # Statements a streaming body runs after the headers are sent are
+            # logged but cannot make it into the header
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", log.server_timing().encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            report(log, scope["method"], scope["path"])
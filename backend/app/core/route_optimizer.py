@@ -0,0 +1,96 @@
+"""
+Visiting order for a trip's stops.
+
+An open path over a distance matrix: nearest-neighbour construction followed
+by 2-opt segment reversals until no reversal shortens the path or the time
+budget runs out. Fixed start/end stops are handled by always solving a path
+with fixed endpoints; a free endpoint becomes a dummy node at distance zero
+from every stop.
+"""
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Improvements smaller than this (km) are treated as noise
+_EPSILON = 1e-9
+
+
+class RouteError(ValueError):
+    pass
+
+
+def path_length(distances: np.ndarray, order: List[int]) -> float:
+    return float(distances[order[:-1], order[1:]].sum()) if len(order) > 1 else 0.0
+
+
+def _nearest_neighbour(distances: np.ndarray, start: int, end: int) -> np.ndarray:
+    n = len(distances)
+    unvisited = np.ones(n, dtype=bool)
+    unvisited[[start, end]] = False
+    path = [start]
+    current = start
+    for _ in range(n - 2):
+        candidates = np.where(unvisited, distances[current], np.inf)
+        current = int(np.argmin(candidates))
+        unvisited[current] = False
+        path.append(current)
+    path.append(end)
+    return np.array(path)
+
+
+def _two_opt(distances: np.ndarray, path: np.ndarray, deadline: float) -> np.ndarray:
+    """Reverse ``path[i:j + 1]`` while that shortens it, keeping both endpoints."""
+    m = len(path)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, m - 2):
+            # Gain of reversing path[i..j] for every j > i at once
+            a, b = path[i - 1], path[i]
+            c, d = path[i + 1:m - 1], path[i + 2:m]
+            gains = distances[a, b] + distances[c, d] - distances[a, c] - distances[b, d]
+            best = int(np.argmax(gains))
+            if gains[best] > _EPSILON:
+                j = i + 1 + best
+                path[i:j + 1] = path[i:j + 1][::-1].copy()
+                improved = True
+            if time.perf_counter() >= deadline:
+                break
+    return path
+
+
+def optimize_order(
+    distances: np.ndarray,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    time_budget_s: float = 0.05,
+) -> Tuple[List[int], float]:
+    """
+    Near-optimal order of the points of the square ``distances`` matrix,
+    optionally starting at index ``start`` and/or ending at ``end``.
+    Returns the order and its length.
+    """
+    deadline = time.perf_counter() + time_budget_s
+    n = len(distances)
+    if n <= 2 or (n == 3 and start is not None and end is not None):
+        order = list(range(n))
+        if start is not None:
+            order.remove(start)
+            order.insert(0, start)
+        if end is not None and end != start:
+            order.remove(end)
+            order.append(end)
+        return order, path_length(distances, order)
+
+    # Extend the matrix with a zero-distance dummy for each free endpoint
+    size = n + (start is None) + (end is None)
+    extended = np.zeros((size, size))
+    extended[:n, :n] = distances
+    source = n if start is None else start
+    sink = size - 1 if end is None else end
+
+    path = _nearest_neighbour(extended, source, sink)
+    path = _two_opt(extended, path, deadline)
+    order = [int(p) for p in path if p < n]
+    return order, path_length(distances, order)
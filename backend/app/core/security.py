@@ -1,23 +1,117 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Callable, Optional, Tuple, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.config import settings
+from app.core import metrics
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+PASSWORD_HASH_WAIT_SECONDS = metrics.Histogram(
+    "password_hash_pool_wait_seconds",
+    "Time a password hash/verify job waited for a pool worker.",
+    ["operation"],
+)
+PASSWORD_HASH_SECONDS = metrics.Histogram(
+    "password_hash_seconds",
+    "Time spent inside bcrypt for a password hash/verify job.",
+    ["operation"],
+)
+PASSWORD_HASH_PENDING = metrics.Gauge(
+    "password_hash_pool_pending",
+    "Password hash/verify jobs queued or running in the pool.",
+)
+PASSWORD_HASH_REJECTED = metrics.Counter(
+    "password_hash_pool_rejected_total",
+    "Password hash/verify jobs rejected because the pool was saturated.",
+    ["operation"],
+)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing pool already has too many queued jobs."""
+
+
+_executor: Optional[Executor] = None
+_pending = 0
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+
+def _timed(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    # Runs inside the worker; the elapsed time excludes queueing in the pool.
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash",
+            )
+    return _executor
+
+
+async def _run_in_pool(operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+    global _pending
+    if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        PASSWORD_HASH_REJECTED.inc(operation=operation)
+        raise PasswordHasherBusy(operation)
+
+    _pending += 1
+    PASSWORD_HASH_PENDING.set(_pending)
+    submitted = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        result, hash_seconds = await loop.run_in_executor(_get_executor(), _timed, fn, *args)
+    finally:
+        _pending -= 1
+        PASSWORD_HASH_PENDING.set(_pending)
+
+    total_seconds = time.perf_counter() - submitted
+    PASSWORD_HASH_SECONDS.observe(hash_seconds, operation=operation)
+    PASSWORD_HASH_WAIT_SECONDS.observe(max(total_seconds - hash_seconds, 0.0), operation=operation)
+    return result
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_pool("verify", verify_password, plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_pool("hash", get_password_hash, password)
+
+
+def shutdown_password_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def create_access_token(
+    subject: Union[str, Any], expires_delta: timedelta = None, user_id: Optional[Any] = None
+) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode = {"exp": expire, "sub": str(subject)}
+    if user_id is not None:
+        to_encode["uid"] = str(user_id)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
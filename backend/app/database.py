@@ -1,13 +1,102 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import time
+from uuid import uuid4
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
+from app.core import metrics, query_log
 
-# Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=False,
-    future=True
+POOL_CHECKED_OUT = metrics.Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+    ["pool"],
+)
+POOL_OVERFLOW = metrics.Gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size (negative while the pool is filling).",
+    ["pool"],
+)
+POOL_SIZE = metrics.Gauge(
+    "db_pool_size",
+    "Configured pool_size.",
+    ["pool"],
+)
+POOL_WAIT_SECONDS = metrics.Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent obtaining a connection from the pool.",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
 )
+POOL_TIMEOUTS = metrics.Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT seconds.",
+    ["pool"],
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait time and timeouts."""
+
+    metrics_name = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc(pool=self.metrics_name)
+            raise
+        finally:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - started, pool=self.metrics_name)
+
+
+def _instrument_pool(engine: AsyncEngine, name: str) -> None:
+    POOL_SIZE.set(engine.sync_engine.pool.size(), pool=name)
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKED_OUT.inc(pool=name)
+        POOL_OVERFLOW.set(engine.sync_engine.pool.overflow(), pool=name)
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        POOL_CHECKED_OUT.dec(pool=name)
+        POOL_OVERFLOW.set(engine.sync_engine.pool.overflow(), pool=name)
+
+
+def create_engine(url: str, name: str) -> AsyncEngine:
+    """Create an async engine with the configured pool and asyncpg statement cache."""
+    connect_args = {}
+    if "+asyncpg" in url and settings.DB_PGBOUNCER:
+        # pgbouncer may run each transaction on a different server
+        # connection, so a statement prepared on one must never be reused,
+        # and asyncpg's default names would collide across clients
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+    elif "+asyncpg" in url:
+        connect_args["prepared_statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+
+    async_engine = create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        # A named subclass keeps the label across Pool.recreate() on dispose()
+        poolclass=type("InstrumentedQueuePool", (InstrumentedQueuePool,), {"metrics_name": name}),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+    _instrument_pool(async_engine, name)
+    query_log.instrument_engine(async_engine)
+    return async_engine
+
+# Create async engine
+engine = create_engine(settings.DATABASE_URL, "primary")
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -18,6 +107,21 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Read-only traffic goes to the replica when one is configured. Anything that
+# writes, or must see the caller's own recent writes, stays on get_db().
+if settings.READ_DATABASE_URL:
+    read_engine = create_engine(settings.READ_DATABASE_URL, "replica")
+else:
+    read_engine = engine
+
+AsyncReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
 class Base(DeclarativeBase):
     pass
 
@@ -28,3 +132,10 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+async def get_read_db():
+    async with AsyncReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
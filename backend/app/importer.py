@@ -0,0 +1,269 @@
+"""
+Bulk catalog importer.
+
+Reads cities or activities from CSV or NDJSON in chunks, streams each chunk
+into a temporary staging table with COPY, then upserts the staged rows on
+their natural keys (name + country for cities, city + name for activities).
+Rows whose values did not change are left alone, so re-running an import
+against a loaded database writes nothing.
+
+    python -m app.importer cities data/cities.csv
+    python -m app.importer activities data/activities.ndjson --chunk-size 50000
+
+Activity rows name their city with `city` and `country` columns. Imported
+rows reach the autocomplete index on its next periodic reload.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.database import engine
+from app.services.budget_service import rollup_rebuild_statements
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _float(value: Any) -> Optional[float]:
+    value = _text(value)
+    return None if value is None else float(value)
+
+
+def _int(value: Any) -> Optional[int]:
+    value = _text(value)
+    return None if value is None else int(float(value))
+
+
+def _decimal(value: Any) -> Optional[Decimal]:
+    value = _text(value)
+    return None if value is None else Decimal(value)
+
+
+@dataclass(frozen=True)
+class Catalog:
+    staging_columns: List[Tuple[str, str, Callable[[Any], Any]]]  # (column, SQL type, converter)
+    key: Tuple[str, ...]  # natural key columns in the input
+    upsert: str
+
+
+CITIES = Catalog(
+    staging_columns=[
+        ("name", "text", _text),
+        ("country", "text", _text),
+        ("region", "text", _text),
+        ("image_url", "text", _text),
+        ("cost_index", "text", _text),
+        ("rating", "float8", _float),
+        ("description", "text", _text),
+        ("latitude", "float8", _float),
+        ("longitude", "float8", _float),
+    ],
+    key=("name", "country"),
+    upsert="""
+        INSERT INTO cities AS c (id, name, country, region, image_url, cost_index, rating, description, latitude, longitude)
+        SELECT DISTINCT ON (name, country)
+               gen_random_uuid(), name, country, region, image_url, cost_index, coalesce(rating, 0), description,
+               latitude, longitude
+        FROM import_staging
+        ORDER BY name, country, seq DESC
+        ON CONFLICT (name, country) DO UPDATE SET
+            region = EXCLUDED.region,
+            image_url = EXCLUDED.image_url,
+            cost_index = EXCLUDED.cost_index,
+            rating = EXCLUDED.rating,
+            description = EXCLUDED.description,
+            latitude = EXCLUDED.latitude,
+            longitude = EXCLUDED.longitude
+        WHERE (c.region, c.image_url, c.cost_index, c.rating, c.description, c.latitude, c.longitude)
+              IS DISTINCT FROM
+              (EXCLUDED.region, EXCLUDED.image_url, EXCLUDED.cost_index, EXCLUDED.rating, EXCLUDED.description,
+               EXCLUDED.latitude, EXCLUDED.longitude)
+        RETURNING id, (xmax = 0) AS inserted
+    """,
+)
+
+ACTIVITIES = Catalog(
+    staging_columns=[
+        ("city", "text", _text),
+        ("country", "text", _text),
+        ("name", "text", _text),
+        ("description", "text", _text),
+        ("image_url", "text", _text),
+        ("duration_minutes", "int4", _int),
+        ("cost", "numeric", _decimal),
+        ("category", "text", _text),
+    ],
+    key=("city", "country", "name"),
+    upsert="""
+        INSERT INTO activities AS a (id, city_id, name, description, image_url, duration_minutes, cost, category)
+        SELECT DISTINCT ON (ci.id, s.name)
+               gen_random_uuid(), ci.id, s.name, s.description, s.image_url, s.duration_minutes,
+               coalesce(s.cost, 0), s.category
+        FROM import_staging s
+        JOIN cities ci ON ci.name = s.city AND ci.country = s.country
+        ORDER BY ci.id, s.name, s.seq DESC
+        ON CONFLICT (city_id, name) DO UPDATE SET
+            description = EXCLUDED.description,
+            image_url = EXCLUDED.image_url,
+            duration_minutes = EXCLUDED.duration_minutes,
+            cost = EXCLUDED.cost,
+            category = EXCLUDED.category
+        WHERE (a.description, a.image_url, a.duration_minutes, a.cost, a.category)
+              IS DISTINCT FROM
+              (EXCLUDED.description, EXCLUDED.image_url, EXCLUDED.duration_minutes, EXCLUDED.cost, EXCLUDED.category)
+        RETURNING id, (xmax = 0) AS inserted
+    """,
+)
+
+# Distinct staged activities whose city is not in the catalog
+_UNMATCHED_ACTIVITIES = """
+    SELECT count(DISTINCT (s.city, s.country, s.name)) FROM import_staging s
+    WHERE NOT EXISTS (SELECT 1 FROM cities ci WHERE ci.name = s.city AND ci.country = s.country)
+"""
+
+# Trips planning any of the updated activities ($1), whose budget rollups
+# carry the old costs
+_TRIPS_WITH_ACTIVITIES = """
+    SELECT DISTINCT ts.trip_id FROM trip_stops ts
+    JOIN stop_activities tsa ON tsa.stop_id = ts.id
+    WHERE tsa.activity_id = ANY($1::uuid[])
+"""
+
+CATALOGS = {"cities": CITIES, "activities": ACTIVITIES}
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    rejected: int = 0  # missing a natural-key value or not parseable
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    unmatched: int = 0  # activities whose city is unknown
+    load_seconds: float = 0.0
+    upsert_seconds: float = 0.0
+
+    def report(self) -> str:
+        total = self.load_seconds + self.upsert_seconds
+        rate = self.read / total if total else 0.0
+        return (
+            f"read {self.read:,}  inserted {self.inserted:,}  updated {self.updated:,}  "
+            f"unchanged {self.unchanged:,}  rejected {self.rejected:,}  unmatched {self.unmatched:,}\n"
+            f"load {self.load_seconds:.2f}s  upsert {self.upsert_seconds:.2f}s  ({rate:,.0f} rows/s)"
+        )
+
+
+# Readers
+
+def read_csv(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def read_ndjson(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+READERS = {"csv": read_csv, "ndjson": read_ndjson, "jsonl": read_ndjson}
+
+
+def _chunks(catalog: Catalog, rows: Iterable[Dict[str, Any]], size: int, stats: ImportStats) -> Iterator[List[tuple]]:
+    chunk: List[tuple] = []
+    for row in rows:
+        stats.read += 1
+        try:
+            record = tuple(convert(row.get(column)) for column, _, convert in catalog.staging_columns)
+        except (ValueError, ArithmeticError):
+            stats.rejected += 1
+            continue
+        values = dict(zip((column for column, _, _ in catalog.staging_columns), record))
+        if any(values[column] is None for column in catalog.key):
+            stats.rejected += 1
+            continue
+        chunk.append((stats.read,) + record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def import_rows(
+    kind: str, rows: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> ImportStats:
+    """Import ``rows`` (dicts keyed by column name) into the ``kind`` catalog in one transaction."""
+    catalog = CATALOGS[kind]
+    stats = ImportStats()
+    columns = ["seq"] + [column for column, _, _ in catalog.staging_columns]
+    column_defs = ", ".join(["seq int8"] + [f"{column} {type_}" for column, type_, _ in catalog.staging_columns])
+
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        pg = raw.driver_connection  # asyncpg connection, for COPY
+        async with pg.transaction():
+            await pg.execute(f"CREATE TEMP TABLE import_staging ({column_defs}) ON COMMIT DROP")
+
+            started = time.perf_counter()
+            for chunk in _chunks(catalog, rows, chunk_size, stats):
+                await pg.copy_records_to_table("import_staging", records=chunk, columns=columns)
+            await pg.execute("ANALYZE import_staging")
+            stats.load_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            if catalog is ACTIVITIES:
+                stats.unmatched = await pg.fetchval(_UNMATCHED_ACTIVITIES)
+            staged = await pg.fetchval(
+                f"SELECT count(*) FROM (SELECT DISTINCT {', '.join(catalog.key)} FROM import_staging) AS keys"
+            )
+            written = await pg.fetch(catalog.upsert)
+            stats.inserted = sum(1 for row in written if row["inserted"])
+            stats.updated = len(written) - stats.inserted
+            stats.unchanged = max(staged - stats.unmatched - len(written), 0)
+            if catalog is ACTIVITIES and stats.updated:
+                updated = [row["id"] for row in written if not row["inserted"]]
+                for statement in rollup_rebuild_statements(_TRIPS_WITH_ACTIVITIES):
+                    await pg.execute(statement, updated)
+            stats.upsert_seconds = time.perf_counter() - started
+    return stats
+
+
+async def import_file(kind: str, path: str, format: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> ImportStats:
+    format = format or path.rsplit(".", 1)[-1].lower()
+    if format not in READERS:
+        raise ValueError(f"Unsupported format {format!r}; expected one of {', '.join(READERS)}")
+    return await import_rows(kind, READERS[format](path), chunk_size=chunk_size)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=sorted(CATALOGS))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=sorted(READERS), help="defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per COPY")
+    args = parser.parse_args()
+
+    async def run() -> ImportStats:
+        try:
+            return await import_file(args.kind, args.path, args.format, args.chunk_size)
+        finally:
+            await engine.dispose()
+
+    print(asyncio.run(run()).report())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,17 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.config import settings
-from app.api.v1 import auth, trips, itinerary, explore, profile, community
+from app.core import metrics
+from app.core.http_metrics import RouteMetricsMiddleware
+from app.core.query_log import QueryAccountingMiddleware
+from app.core.security import PasswordHasherBusy, shutdown_password_pool
+from app.services import catalog_index, recommendations, trip_counters
+from app.api.v1 import auth, trips, itinerary, explore, profile, community, budget, calendar, export
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -15,15 +25,73 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+# Statement counts and database time per request (Server-Timing header)
+app.add_middleware(QueryAccountingMiddleware)
+
+# Latency, status and in-flight metrics per route template, outermost so the
+# time spent in the other middleware is included
+if settings.METRICS_ENABLED:
+    app.add_middleware(RouteMetricsMiddleware)
+
 # Include Routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["Authentication"])
 app.include_router(trips.router, prefix=f"{settings.API_V1_STR}/trips", tags=["Trips"])
+app.include_router(budget.router, prefix=f"{settings.API_V1_STR}/trips", tags=["Budget"])
 app.include_router(itinerary.router, prefix=f"{settings.API_V1_STR}/itinerary", tags=["Itinerary"])
 app.include_router(explore.router, prefix=f"{settings.API_V1_STR}/explore", tags=["Explore"])
 app.include_router(profile.router, prefix=f"{settings.API_V1_STR}/profile", tags=["Profile"])
 app.include_router(community.router, prefix=f"{settings.API_V1_STR}/community", tags=["Community"])
+app.include_router(calendar.router, prefix=f"{settings.API_V1_STR}/calendar", tags=["Calendar"])
+app.include_router(export.router, prefix=f"{settings.API_V1_STR}/export", tags=["Export"])
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication service is busy, please retry shortly."},
+        headers={"Retry-After": "1"},
+    )
+
+_background_tasks = []
+
+@app.on_event("startup")
+async def startup_event():
+    if settings.CATALOG_INDEX_ENABLED:
+        try:
+            await catalog_index.reload()
+        except Exception:
+            # Autocomplete returns no suggestions until the next refresh succeeds
+            logger.exception("Could not load the catalog index at startup")
+        if settings.CATALOG_INDEX_REFRESH_SECONDS > 0:
+            _background_tasks.append(asyncio.create_task(catalog_index.refresh_periodically()))
+    try:
+        await recommendations.reload_if_changed()
+    except Exception:
+        # Recommendation endpoints return empty lists until the file loads
+        logger.exception("Could not load recommendations at startup")
+    if settings.RECOMMENDATIONS_REFRESH_SECONDS > 0:
+        _background_tasks.append(asyncio.create_task(recommendations.refresh_periodically()))
+    _background_tasks.append(asyncio.create_task(trip_counters.flush_periodically()))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    try:
+        # Write the counts buffered since the last flush
+        await trip_counters.flush()
+    except Exception:
+        logger.exception("Could not flush trip counters at shutdown")
+    shutdown_password_pool()
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def read_metrics():
+        return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 @app.get("/")
 async def root():
@@ -2,4 +2,6 @@ from app.models.user import User
 from app.models.city import City
 from app.models.activity import Activity
 from app.models.trip import Trip, TripStop, StopActivity, TripExpense
+from app.models.budget import TripBudgetRollup
 
+from app.models.community import TripFeedEntry, TripStats
@@ -1,11 +1,20 @@
 import uuid
-from sqlalchemy import String, Float, Integer, Text, ForeignKey, Numeric
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import String, Float, Integer, Text, ForeignKey, Numeric, Computed, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship, deferred
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from app.database import Base
 
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = (
+        Index("ix_activities_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_activities_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_activities_name_id", "name", "id"),
+        # Explore category filter in keyset order
+        Index("ix_activities_category_name_id", "category", "name", "id"),
+        # Natural key used by the catalog importer
+        Index("ux_activities_city_id_name", "city_id", "name", unique=True),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     city_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("cities.id"), nullable=False)
@@ -15,6 +24,11 @@ class Activity(Base):
     duration_minutes: Mapped[int] = mapped_column(Integer, nullable=True)
     cost: Mapped[float] = mapped_column(Numeric(10, 2), default=0.0)
     category: Mapped[str] = mapped_column(String, nullable=True)  # sightseeing, food, adventure, culture, etc.
+    # Full-text document maintained by PostgreSQL; deferred so plain selects don't load it
+    search_vector = deferred(mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))", persisted=True),
+    ))
 
     # Relationships
     city = relationship("City", back_populates="activities")
@@ -0,0 +1,21 @@
+import uuid
+from sqlalchemy import String, ForeignKey, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+class TripBudgetRollup(Base):
+    """
+    Planned (activity cost) and actual (expense) totals for one bucket of a
+    trip, kept up to date by budget_service as expenses and stop activities
+    change.
+    """
+    __tablename__ = "trip_budget_rollups"
+
+    trip_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("trips.id", ondelete="CASCADE"), primary_key=True
+    )
+    dimension: Mapped[str] = mapped_column(String, primary_key=True)  # total, category, stop, day
+    bucket: Mapped[str] = mapped_column(String, primary_key=True)  # category name, stop id or ISO date; "" for total
+    planned: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False, default=0)
+    actual: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False, default=0)
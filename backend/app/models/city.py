@@ -1,21 +1,49 @@
 import uuid
-from sqlalchemy import String, Float, Text
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID
+from typing import Optional
+from sqlalchemy import String, Float, Text, Computed, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship, deferred
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from app.core.geo import GEOHASH_PRECISION
 from app.database import Base
 
 class City(Base):
     __tablename__ = "cities"
+    __table_args__ = (
+        Index("ix_cities_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_cities_country_trgm", "country", postgresql_using="gin", postgresql_ops={"country": "gin_trgm_ops"}),
+        Index("ix_cities_search_vector", "search_vector", postgresql_using="gin"),
+        # Natural key used by the catalog importer
+        Index("ux_cities_name_country", "name", "country", unique=True),
+        # Prefix range scans for radius searches
+        Index("ix_cities_geohash", "geohash", postgresql_ops={"geohash": "text_pattern_ops"}),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    name: Mapped[str] = mapped_column(String, index=True, nullable=False)
+    name: Mapped[str] = mapped_column(String, nullable=False)  # lookups by name use ux_cities_name_country
     country: Mapped[str] = mapped_column(String, nullable=False)
     region: Mapped[str] = mapped_column(String, nullable=True)
     image_url: Mapped[str] = mapped_column(String, nullable=True)
     cost_index: Mapped[str] = mapped_column(String, nullable=True)  # budget, moderate, expensive, luxury
     rating: Mapped[float] = mapped_column(Float, default=0.0)
     description: Mapped[str] = mapped_column(Text, nullable=True)
+    latitude: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    longitude: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    # Maintained by PostgreSQL with the same encoding as app.core.geo.encode
+    geohash: Mapped[Optional[str]] = mapped_column(
+        String, Computed(f"geohash_encode(latitude, longitude, {GEOHASH_PRECISION})", persisted=True)
+    )
+    # Full-text document maintained by PostgreSQL; deferred so plain selects don't load it
+    search_vector = deferred(mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(country, '') || ' ' || coalesce(description, ''))", persisted=True),
+    ))
 
     # Relationships
     activities = relationship("Activity", back_populates="city", cascade="all, delete-orphan")
     trip_stops = relationship("TripStop", back_populates="city")
+
+
+# Keyset pagination order for browsing: rating DESC, name, id
+Index("ix_cities_rating_name_id", City.rating.desc(), City.name, City.id)
+# The same order within a region (explore filter)
+Index("ix_cities_region_rating_name_id", City.region, City.rating.desc(), City.name, City.id)
@@ -1,2 +1,59 @@
 # Community models
 
+import uuid
+from datetime import date, datetime
+from typing import List, Optional
+from sqlalchemy import String, Text, Date, DateTime, Integer, BigInteger, ForeignKey, Index, text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from app.database import Base
+
+class TripFeedEntry(Base):
+    """
+    One public trip as listed in the community feed: the trip's card fields
+    copied from the trip and its stops, kept up to date by feed_service as
+    they change, so a feed page never joins stops or cities.
+    """
+    __tablename__ = "trip_feed"
+
+    trip_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("trips.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    cover_image: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    start_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    end_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    city_names: Mapped[List[str]] = mapped_column(ARRAY(String), nullable=False, server_default="{}")  # itinerary order
+    stop_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    # When the trip was (last) made public, in UTC
+    published_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, server_default=text("timezone('utc', now())")
+    )
+    # Copied from trip_stats by each counter flush
+    view_count: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    copy_count: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    popularity: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")  # views + weighted copies
+
+
+class TripStats(Base):
+    """
+    Views of a trip's share link and copies of the trip, written in batches
+    by trip_counters rather than once per request.
+    """
+    __tablename__ = "trip_stats"
+
+    trip_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("trips.id", ondelete="CASCADE"), primary_key=True
+    )
+    view_count: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    copy_count: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+
+
+# Keyset pagination of the feed, newest or most popular first
+Index("ix_trip_feed_published_at_trip_id", TripFeedEntry.published_at.desc(), TripFeedEntry.trip_id.desc())
+Index(
+    "ix_trip_feed_popularity_published_at_trip_id",
+    TripFeedEntry.popularity.desc(), TripFeedEntry.published_at.desc(), TripFeedEntry.trip_id.desc(),
+)
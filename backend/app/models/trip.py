@@ -1,13 +1,19 @@
 import uuid
 from datetime import date, time
 from typing import Optional
-from sqlalchemy import String, Date, Boolean, ForeignKey, Integer, Numeric, Text, Time
+from sqlalchemy import String, Date, Boolean, ForeignKey, Integer, Numeric, Text, Time, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.database import Base
 
 class Trip(Base):
     __tablename__ = "trips"
+    __table_args__ = (
+        # Keyset pagination of a user's trips by start date
+        Index("ix_trips_user_id_start_date_id", "user_id", "start_date", "id"),
+        # Feed rebuilds only visit public trips
+        Index("ix_trips_public_id", "id", postgresql_where=text("is_public")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -29,6 +35,11 @@ class Trip(Base):
 
 class TripStop(Base):
     __tablename__ = "trip_stops"
+    __table_args__ = (
+        # Calendar range-overlap lookups per trip
+        Index("ix_trip_stops_trip_id_start_date_end_date", "trip_id", "start_date", "end_date"),
+        Index("ix_trip_stops_city_id", "city_id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     trip_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("trips.id"), nullable=False)
@@ -45,10 +56,18 @@ class TripStop(Base):
 
 class StopActivity(Base):
     __tablename__ = "stop_activities"
+    __table_args__ = (
+        # A stop's schedule in day and time order
+        Index("ix_stop_activities_stop_id_scheduled_date_time", "stop_id", "scheduled_date", "scheduled_time"),
+        # Which stops plan an activity (catalog cost changes, activity deletes)
+        Index("ix_stop_activities_activity_id", "activity_id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     stop_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("trip_stops.id"), nullable=False)
     activity_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("activities.id"), nullable=False)
+    # A timed activity without a date is on its stop's first day
+    scheduled_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
     scheduled_time: Mapped[Optional[time]] = mapped_column(Time, nullable=True)
     notes: Mapped[str] = mapped_column(Text, nullable=True)
 
@@ -59,12 +78,22 @@ class StopActivity(Base):
 
 class TripExpense(Base):
     __tablename__ = "trip_expenses"
+    __table_args__ = (
+        # A trip's expenses in date order
+        Index("ix_trip_expenses_trip_id_spent_on", "trip_id", "spent_on"),
+        # ON DELETE SET NULL lookups when a stop is removed
+        Index("ix_trip_expenses_stop_id", "stop_id", postgresql_where=text("stop_id IS NOT NULL")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     trip_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("trips.id"), nullable=False)
     category: Mapped[str] = mapped_column(String, nullable=False)  # transport, accommodation, food, activities, other
     amount: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     notes: Mapped[str] = mapped_column(Text, nullable=True)
+    stop_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("trip_stops.id", ondelete="SET NULL"), nullable=True
+    )
+    spent_on: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
 
     # Relationships
     trip = relationship("Trip", back_populates="expenses")
@@ -0,0 +1,250 @@
+"""
+Batch job computing "similar cities" and "also added" recommendations.
+
+Cities are compared on their attributes (same region, how close their cost
+index and rating are) blended with how often they appear in the same trips.
+Activities are compared only on co-occurrence: how often they were added to
+the same trips. Co-occurrence counts come from a sparse trips x items matrix
+``X`` as ``X.T @ X``, so the work grows with the number of co-occurring pairs
+rather than items squared, and the top ``k`` of every row is selected with
+one sort over the non-zeros. City attribute scores are dense and computed in
+row blocks to bound memory.
+
+The result is written as a compressed ``.npz`` of fixed-width arrays (item
+ids as 16-byte rows, neighbour row numbers as int32, scores as float32) that
+the API loads into memory (see ``app.services.recommendations``).
+
+    python -m app.recommender
+    python -m app.recommender --output data/recommendations.npz --k 30
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine
+
+DEFAULT_K = 20
+
+COST_LEVELS = ["budget", "moderate", "expensive", "luxury"]
+
+# Weights of the city attribute score (each part is in [0, 1])
+_REGION_WEIGHT = 0.5
+_COST_WEIGHT = 0.3
+_RATING_WEIGHT = 0.2
+# Share of the city score taken by trip co-occurrence
+_CO_OCCURRENCE_WEIGHT = 0.5
+# Added to the cosine denominator so pairs seen together once or twice do not
+# outrank pairs seen together often
+_SHRINK = 2.0
+# Dense city scores computed per block of rows: rows x cities <= this
+_BLOCK_CELLS = 4_000_000
+
+
+def co_occurrence(trips: np.ndarray, items: np.ndarray, n_items: int) -> sparse.csr_matrix:
+    """
+    Shrunk cosine similarity between items from ``(trip, item)`` pairs, as a
+    sparse ``n_items x n_items`` matrix without the diagonal.
+    """
+    n_trips = int(trips.max()) + 1 if trips.size else 0
+    x = sparse.csr_matrix(
+        (np.ones(trips.size, dtype=np.float32), (trips, items)), shape=(n_trips, n_items)
+    )
+    x.data[:] = 1  # an item added twice to one trip counts once
+    counts = np.asarray(x.sum(axis=0)).ravel()
+    pairs = (x.T @ x).tocoo()
+    off_diagonal = pairs.row != pairs.col
+    rows, cols, together = pairs.row[off_diagonal], pairs.col[off_diagonal], pairs.data[off_diagonal]
+    scores = together / (np.sqrt(counts[rows] * counts[cols]) + _SHRINK)
+    return sparse.csr_matrix((scores.astype(np.float32), (rows, cols)), shape=(n_items, n_items))
+
+
+def top_k_sparse(scores: sparse.csr_matrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The ``k`` highest-scoring columns of every row as ``(neighbours, scores)``
+    arrays of shape ``(rows, k)``; rows with fewer entries are padded with -1.
+    """
+    n = scores.shape[0]
+    coo = scores.tocoo()
+    # One sort by row, then score descending: scores are in [0, 1], so row r
+    # maps into [2r - 1, 2r] and rows never interleave
+    order = np.argsort(coo.row * 2.0 - coo.data.astype(np.float64))
+    rows, cols, values = coo.row[order], coo.col[order], coo.data[order]
+    rank = np.arange(rows.size) - np.searchsorted(rows, np.arange(n))[rows]
+    keep = rank < k
+    neighbours = np.full((n, k), -1, dtype=np.int32)
+    top = np.zeros((n, k), dtype=np.float32)
+    neighbours[rows[keep], rank[keep]] = cols[keep]
+    top[rows[keep], rank[keep]] = values[keep]
+    return neighbours, top
+
+
+def city_attribute_scores(
+    regions: np.ndarray, costs: np.ndarray, ratings: np.ndarray, rows: slice
+) -> np.ndarray:
+    """
+    Attribute similarity of the cities in ``rows`` to every city. ``regions``
+    are integer codes (-1 unknown), ``costs`` positions in ``COST_LEVELS``
+    (-1 unknown) and ``ratings`` are 0-5.
+    """
+    region = regions[rows, None]
+    same_region = (region == regions[None, :]) & (region >= 0)
+    cost = costs[rows, None]
+    cost_known = (cost >= 0) & (costs[None, :] >= 0)
+    cost_closeness = np.where(cost_known, 1 - np.abs(cost - costs[None, :]) / (len(COST_LEVELS) - 1), 0)
+    rating_closeness = 1 - np.abs(ratings[rows, None] - ratings[None, :]) / 5
+    return (
+        _REGION_WEIGHT * same_region + _COST_WEIGHT * cost_closeness + _RATING_WEIGHT * rating_closeness
+    ).astype(np.float32)
+
+
+def similar_cities(
+    regions: np.ndarray, costs: np.ndarray, ratings: np.ndarray, together: sparse.csr_matrix, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    n = regions.size
+    k = min(k, max(n - 1, 0))
+    neighbours = np.full((n, k), -1, dtype=np.int32)
+    top = np.zeros((n, k), dtype=np.float32)
+    if k == 0:
+        return neighbours, top
+    block = max(1, _BLOCK_CELLS // n)
+    for start in range(0, n, block):
+        rows = slice(start, min(start + block, n))
+        scores = (1 - _CO_OCCURRENCE_WEIGHT) * city_attribute_scores(regions, costs, ratings, rows)
+        scores += _CO_OCCURRENCE_WEIGHT * together[rows].toarray()
+        own = np.arange(rows.stop - start)
+        scores[own, start + own] = -np.inf
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        neighbours[rows] = np.take_along_axis(best, order, axis=1)
+        top[rows] = np.take_along_axis(best_scores, order, axis=1)
+    return neighbours, top
+
+
+def _codes(values: Sequence[Optional[str]], vocabulary: Optional[List[str]] = None) -> np.ndarray:
+    lookup: Dict[str, int] = {v: i for i, v in enumerate(vocabulary)} if vocabulary else {}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is None:
+            codes[i] = -1
+        elif vocabulary is not None:
+            codes[i] = lookup.get(value.lower(), -1)
+        else:
+            codes[i] = lookup.setdefault(value, len(lookup))
+    return codes
+
+
+def _id_bytes(ids) -> np.ndarray:
+    return np.frombuffer(b"".join(i.bytes for i in ids), dtype=np.uint8).reshape(-1, 16)
+
+
+# Items are numbered by their position in id order; trips by dense rank
+_CITIES = text("SELECT id, region, cost_index, rating FROM cities ORDER BY id")
+_ACTIVITY_IDS = text("SELECT id FROM activities ORDER BY id")
+_TRIP_CITIES = text("""
+    SELECT dense_rank() OVER (ORDER BY s.trip_id) - 1 AS trip, c.item
+    FROM trip_stops s
+    JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS item FROM cities) c ON c.id = s.city_id
+""")
+_TRIP_ACTIVITIES = text("""
+    SELECT dense_rank() OVER (ORDER BY s.trip_id) - 1 AS trip, a.item
+    FROM stop_activities sa
+    JOIN trip_stops s ON s.id = sa.stop_id
+    JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS item FROM activities) a ON a.id = sa.activity_id
+""")
+
+_FETCH_ROWS = 100_000
+
+
+async def _pairs(conn, statement) -> Tuple[np.ndarray, np.ndarray]:
+    chunks = []
+    result = await conn.stream(statement)
+    async for partition in result.partitions(_FETCH_ROWS):
+        chunks.append(np.fromiter(
+            (value for row in partition for value in row), dtype=np.int64, count=2 * len(partition)
+        ).reshape(-1, 2))
+    pairs = np.concatenate(chunks) if chunks else np.empty((0, 2), dtype=np.int64)
+    return pairs[:, 0], pairs[:, 1]
+
+
+async def build(k: int = DEFAULT_K) -> Dict[str, np.ndarray]:
+    timings = {}
+    started = time.perf_counter()
+    async with engine.connect() as conn:
+        # One snapshot so item numbering agrees across the queries
+        conn = await conn.execution_options(isolation_level="REPEATABLE READ")
+        async with conn.begin():
+            cities = (await conn.execute(_CITIES)).all()
+            activity_ids = (await conn.execute(_ACTIVITY_IDS)).scalars().all()
+            city_trips, city_items = await _pairs(conn, _TRIP_CITIES)
+            activity_trips, activity_items = await _pairs(conn, _TRIP_ACTIVITIES)
+    timings["read"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    regions = _codes([c.region for c in cities])
+    costs = _codes([c.cost_index for c in cities], COST_LEVELS)
+    ratings = np.array([c.rating or 0.0 for c in cities], dtype=np.float32)
+    city_neighbours, city_scores = similar_cities(
+        regions, costs, ratings, co_occurrence(city_trips, city_items, len(cities)), k
+    )
+    timings["cities"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    activity_neighbours, activity_scores = top_k_sparse(
+        co_occurrence(activity_trips, activity_items, len(activity_ids)), k
+    )
+    timings["activities"] = time.perf_counter() - started
+
+    for stage, seconds in timings.items():
+        print(f"{stage:<11} {seconds:8.2f}s")
+    print(f"{len(cities)} cities, {len(activity_ids)} activities, {activity_items.size} stop activities")
+    return {
+        "city_ids": _id_bytes(c.id for c in cities),
+        "city_neighbours": city_neighbours,
+        "city_scores": city_scores,
+        "activity_ids": _id_bytes(activity_ids),
+        "activity_neighbours": activity_neighbours,
+        "activity_scores": activity_scores,
+    }
+
+
+def save(path: str, arrays: Dict[str, np.ndarray]) -> None:
+    """Write atomically, so a server reloading the file never sees half of it."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".npz.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+async def run(args: argparse.Namespace) -> None:
+    try:
+        arrays = await build(args.k)
+    finally:
+        await engine.dispose()
+    save(args.output, arrays)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1024:.0f} KiB)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=settings.RECOMMENDATIONS_PATH)
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="recommendations kept per item")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
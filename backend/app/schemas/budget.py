@@ -0,0 +1,20 @@
+from typing import List, Optional
+from uuid import UUID
+from decimal import Decimal
+from pydantic import BaseModel
+
+class BudgetLine(BaseModel):
+    key: str  # category name, stop id or ISO date
+    label: Optional[str] = None  # city name for stops
+    planned: Decimal
+    actual: Decimal
+
+class TripBudget(BaseModel):
+    trip_id: UUID
+    estimated_budget: Optional[Decimal] = None
+    planned: Decimal  # cost of the activities in the itinerary
+    actual: Decimal  # recorded expenses
+    remaining: Optional[Decimal] = None  # estimated budget minus actual spend
+    by_category: List[BudgetLine] = []
+    by_stop: List[BudgetLine] = []
+    by_day: List[BudgetLine] = []
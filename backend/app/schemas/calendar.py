@@ -0,0 +1,22 @@
+from typing import List, Optional
+from uuid import UUID
+from datetime import date, time
+from pydantic import BaseModel
+
+class CalendarActivity(BaseModel):
+    id: UUID  # stop activity id
+    activity_id: UUID
+    name: str
+    scheduled_date: date
+    scheduled_time: time
+    notes: Optional[str] = None
+
+class CalendarStop(BaseModel):
+    id: UUID  # stop id
+    trip_id: UUID
+    trip_name: str
+    city_id: UUID
+    city_name: str
+    start_date: date
+    end_date: date
+    activities: List[CalendarActivity] = []
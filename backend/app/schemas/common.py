@@ -12,6 +12,8 @@ class CityBase(BaseModel):
     cost_index: Optional[str] = None
     rating: Optional[float] = 0.0
     description: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 class CityCreate(CityBase):
     pass
@@ -21,6 +23,12 @@ class City(CityBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+class NearbyCity(City):
+    distance_km: float
+
+class SimilarCity(City):
+    score: float
+
 # Activity Schemas
 class ActivityBase(BaseModel):
     name: str
@@ -38,3 +46,14 @@ class Activity(ActivityBase):
     city_id: UUID
     
     model_config = ConfigDict(from_attributes=True)
+
+class SimilarActivity(Activity):
+    score: float
+
+# Autocomplete Schemas
+class Suggestion(BaseModel):
+    id: UUID
+    kind: str  # city, activity
+    name: str
+    subtitle: Optional[str] = None  # country for cities, city name for activities
+    score: float
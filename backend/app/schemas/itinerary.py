@@ -1,6 +1,7 @@
-from typing import List, Optional
+from datetime import date, time
+from typing import Annotated, List, Literal, Optional, Union
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from app.schemas.trip import TripStopResponse, StopActivityResponse
 
 class ItineraryResponse(BaseModel):
@@ -12,3 +13,139 @@ class ActivitySchedule(BaseModel):
     activity_id: UUID
     scheduled_time: Optional[str] = None # Expecting HH:MM format string or null
     notes: Optional[str] = None
+
+# Batch Itinerary Schemas
+#
+# Stops and stop activities are addressed by id, or by the `ref` given to them
+# by an add operation earlier in the same batch.
+
+class AddStopOperation(BaseModel):
+    op: Literal["add_stop"]
+    ref: Optional[str] = None
+    city_id: UUID
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    order_index: Optional[int] = None  # appended after the last stop if omitted
+
+class RemoveStopOperation(BaseModel):
+    op: Literal["remove_stop"]
+    stop: str
+
+class MoveStopOperation(BaseModel):
+    op: Literal["move_stop"]
+    stop: str
+    order_index: int
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+class AddActivityOperation(BaseModel):
+    op: Literal["add_activity"]
+    ref: Optional[str] = None
+    stop: str
+    activity_id: UUID
+    scheduled_date: Optional[date] = None
+    scheduled_time: Optional[time] = None
+    notes: Optional[str] = None
+
+class RemoveActivityOperation(BaseModel):
+    op: Literal["remove_activity"]
+    stop_activity: str
+
+class ScheduleActivityOperation(BaseModel):
+    op: Literal["schedule_activity"]
+    stop_activity: str
+    stop: Optional[str] = None  # move to another stop of the trip
+    scheduled_date: Optional[date] = None
+    scheduled_time: Optional[time] = None
+    notes: Optional[str] = None
+
+ItineraryOperation = Annotated[
+    Union[
+        AddStopOperation,
+        RemoveStopOperation,
+        MoveStopOperation,
+        AddActivityOperation,
+        RemoveActivityOperation,
+        ScheduleActivityOperation,
+    ],
+    Field(discriminator="op"),
+]
+
+class ItineraryBatch(BaseModel):
+    operations: List[ItineraryOperation] = Field(min_length=1, max_length=500)
+
+class OperationResult(BaseModel):
+    index: int
+    op: str
+    status: str  # ok, error, skipped
+    id: Optional[UUID] = None  # id of the stop or stop activity affected
+    detail: Optional[str] = None
+
+class ItineraryBatchResponse(BaseModel):
+    trip_id: UUID
+    results: List[OperationResult]
+    stops: List[TripStopResponse]
+
+# Distances
+
+class DistanceStop(BaseModel):
+    id: UUID
+    city_id: UUID
+    city_name: str
+    order_index: int
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+class StopDistanceMatrix(BaseModel):
+    trip_id: UUID
+    stops: List[DistanceStop]  # in itinerary order; rows and columns of the matrix
+    distances_km: List[List[Optional[float]]]  # null where a city has no coordinates
+    legs_km: List[Optional[float]]  # consecutive stops in itinerary order
+    total_km: Optional[float] = None  # null if any leg is unknown
+
+# Route optimization
+
+class RouteOptimizeRequest(BaseModel):
+    start_stop_id: Optional[UUID] = None  # stop the route must begin at; free if omitted
+    end_stop_id: Optional[UUID] = None  # stop the route must finish at; free if omitted
+    apply: bool = False  # rewrite order_index to the optimized order
+    time_budget_ms: Optional[int] = Field(default=None, ge=1)  # capped at the server's budget
+
+class RouteOptimization(BaseModel):
+    trip_id: UUID
+    applied: bool
+    stops: List[DistanceStop]  # in optimized order; order_index is the new position
+    current_km: float
+    optimized_km: float
+    elapsed_ms: float
+
+# Scheduling
+
+class ScheduleRequest(BaseModel):
+    day_start: Optional[time] = None  # daily window; server defaults if omitted
+    day_end: Optional[time] = None
+    apply: bool = False  # save the times given to unscheduled activities
+
+class ScheduledActivity(BaseModel):
+    id: UUID  # stop activity id
+    activity_id: UUID
+    name: str
+    start: time
+    duration_minutes: int
+    fixed: bool  # time was already set; not moved by the scheduler
+
+class ScheduleDay(BaseModel):
+    day: Optional[date] = None  # null for a stop without dates
+    activities: List[ScheduledActivity]
+
+class ScheduleOverlap(BaseModel):
+    id: UUID  # stop activity whose fixed time overlaps
+    conflicts_with: UUID
+    day: Optional[date] = None
+
+class StopSchedule(BaseModel):
+    stop_id: UUID
+    applied: bool
+    days: List[ScheduleDay]
+    unplaced: List[UUID] = []  # no free slot long enough on any day
+    overlaps: List[ScheduleOverlap] = []
@@ -1,13 +1,14 @@
-from typing import Optional, List
+from typing import Dict, Optional, List
 from uuid import UUID
-from datetime import date, time
-from pydantic import BaseModel, ConfigDict
+from datetime import date, datetime, time
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from decimal import Decimal
 from app.schemas.common import City, Activity
 
 # Stop Activity Schemas
 class StopActivityBase(BaseModel):
     activity_id: UUID
+    scheduled_date: Optional[date] = None
     scheduled_time: Optional[time] = None
     notes: Optional[str] = None
 
@@ -44,10 +45,27 @@ class TripExpenseBase(BaseModel):
     category: str
     amount: Decimal
     notes: Optional[str] = None
+    stop_id: Optional[UUID] = None
+    spent_on: Optional[date] = None
 
 class TripExpenseCreate(TripExpenseBase):
     pass
 
+class TripExpenseUpdate(BaseModel):
+    category: Optional[str] = None
+    amount: Optional[Decimal] = None
+    notes: Optional[str] = None
+    stop_id: Optional[UUID] = None
+    spent_on: Optional[date] = None
+
+    @field_validator("category", "amount")
+    @classmethod
+    def not_null(cls, value):
+        # Optional so they can be left out; an expense always has both
+        if value is None:
+            raise ValueError("cannot be null")
+        return value
+
 class TripExpenseResponse(TripExpenseBase):
     id: UUID
     trip_id: UUID
@@ -86,3 +104,39 @@ class TripResponse(TripBase):
     expenses: List[TripExpenseResponse] = []
     
     model_config = ConfigDict(from_attributes=True)
+
+class TripSummaryResponse(TripBase):
+    """A trip list entry without nested stops and expenses."""
+    id: UUID
+    user_id: UUID
+    share_token: Optional[str] = None
+    stop_count: int
+    city_names: List[str]  # in itinerary order
+    first_date: Optional[date] = None  # earliest stop start date
+    last_date: Optional[date] = None  # latest stop end date
+    expense_totals: Dict[str, Decimal]  # by category
+
+    model_config = ConfigDict(from_attributes=True)
+
+class FeedTrip(BaseModel):
+    """A public trip as listed in the community feed."""
+    id: UUID = Field(validation_alias="trip_id")
+    user_id: UUID
+    name: str
+    description: Optional[str] = None
+    cover_image: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    city_names: List[str]  # in itinerary order
+    stop_count: int
+    published_at: datetime
+    view_count: int  # shared-link views
+    copy_count: int
+    popularity: int  # views + weighted copies, as of the last counter flush
+
+    model_config = ConfigDict(from_attributes=True)
+
+class TripCounts(BaseModel):
+    trip_id: UUID
+    view_count: int  # shared-link views
+    copy_count: int
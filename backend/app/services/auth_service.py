@@ -2,14 +2,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.user import User
 from app.schemas.user import UserCreate
-from app.core.security import get_password_hash, verify_password
+from app.core.security import hash_password_async, verify_password_async
 
 async def get_user_by_email(db: AsyncSession, email: str):
     result = await db.execute(select(User).where(User.email == email))
     return result.scalars().first()
 
 async def create_user(db: AsyncSession, user_in: UserCreate):
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await hash_password_async(user_in.password)
     db_user = User(
         email=user_in.email,
         password_hash=hashed_password,
@@ -27,6 +27,6 @@ async def authenticate_user(db: AsyncSession, email: str, password: str):
     user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         return None
     return user
@@ -0,0 +1,236 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text, and_, cast, String
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.budget import TripBudgetRollup
+from app.models.trip import TripStop, TripExpense
+from app.models.activity import Activity
+from app.models.city import City
+from app.schemas.budget import BudgetLine, TripBudget
+from app.schemas.trip import TripExpenseCreate, TripExpenseUpdate
+
+# Planned activity costs are reported under this expense category
+PLANNED_CATEGORY = "activities"
+
+ZERO = Decimal("0")
+
+# (dimension, bucket) -> [planned delta, actual delta]
+Deltas = Dict[Tuple[str, str], List[Decimal]]
+
+
+def _buckets(category: str, stop_id: Optional[UUID], day: Optional[date]) -> List[Tuple[str, str]]:
+    buckets = [("total", ""), ("category", category)]
+    if stop_id is not None:
+        buckets.append(("stop", str(stop_id)))
+    if day is not None:
+        buckets.append(("day", day.isoformat()))
+    return buckets
+
+
+def _add(deltas: Deltas, buckets: List[Tuple[str, str]], planned: Decimal = ZERO, actual: Decimal = ZERO) -> None:
+    for key in buckets:
+        delta = deltas.setdefault(key, [ZERO, ZERO])
+        delta[0] += planned
+        delta[1] += actual
+
+
+# Every writer of a trip's rollup rows first locks the trip row, in id order
+# when there are several. Otherwise a rebuild's DELETE can miss a bucket row
+# an upsert has just created, and its INSERT then collides with that row.
+_LOCK_TRIPS_SQL = "SELECT id FROM trips WHERE id IN ({trips}) ORDER BY id FOR UPDATE"
+
+_LOCK_TRIP = text(_LOCK_TRIPS_SQL.format(trips=":trip_id"))
+
+
+async def lock_trip(db: AsyncSession, trip_id: UUID) -> None:
+    """
+    Take the trip's rollup lock for the rest of the transaction. Rollup
+    writers take it themselves; callers that change other rows of the trip
+    first take it before those changes.
+    """
+    await db.execute(_LOCK_TRIP, {"trip_id": trip_id})
+
+
+async def _apply(db: AsyncSession, trip_id: UUID, deltas: Deltas) -> None:
+    """Add ``deltas`` to the trip's rollup rows in one upsert."""
+    rows = [
+        {"trip_id": trip_id, "dimension": dimension, "bucket": bucket, "planned": planned, "actual": actual}
+        for (dimension, bucket), (planned, actual) in deltas.items()
+        if planned or actual
+    ]
+    if not rows:
+        return
+    await lock_trip(db, trip_id)
+    stmt = insert(TripBudgetRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TripBudgetRollup.trip_id, TripBudgetRollup.dimension, TripBudgetRollup.bucket],
+        set_={
+            "planned": TripBudgetRollup.planned + stmt.excluded.planned,
+            "actual": TripBudgetRollup.actual + stmt.excluded.actual,
+        },
+    )
+    await db.execute(stmt)
+
+
+# Full recomputation, used after structural changes (stops removed or
+# re-dated, batch edits, copies, catalog cost changes) where deltas would be
+# hard to derive.
+_ROLLUP_SQL = """
+DELETE FROM trip_budget_rollups WHERE trip_id IN ({trips});
+INSERT INTO trip_budget_rollups (trip_id, dimension, bucket, planned, actual)
+SELECT trip_id, dimension, bucket, sum(planned), sum(actual)
+FROM (
+    SELECT s.trip_id, b.dimension, b.bucket, coalesce(a.cost, 0) AS planned, 0 AS actual
+    FROM stop_activities sa
+    JOIN trip_stops s ON s.id = sa.stop_id
+    JOIN activities a ON a.id = sa.activity_id
+    CROSS JOIN LATERAL (VALUES
+        ('total', ''), ('category', 'activities'), ('stop', s.id::text),
+        ('day', coalesce(sa.scheduled_date, s.start_date)::text)
+    ) AS b (dimension, bucket)
+    WHERE s.trip_id IN ({trips})
+    UNION ALL
+    SELECT e.trip_id, b.dimension, b.bucket, 0, e.amount
+    FROM trip_expenses e
+    CROSS JOIN LATERAL (VALUES
+        ('total', ''), ('category', e.category), ('stop', e.stop_id::text), ('day', e.spent_on::text)
+    ) AS b (dimension, bucket)
+    WHERE e.trip_id IN ({trips})
+) AS amounts
+WHERE bucket IS NOT NULL
+GROUP BY trip_id, dimension, bucket
+"""
+
+
+def rollup_rebuild_statements(trips: str) -> List[str]:
+    """
+    SQL recomputing the rollups of the trips selected by ``trips``: a
+    parameter or a subquery returning trip ids. The first statement locks
+    the trips.
+    """
+    sql = _LOCK_TRIPS_SQL.format(trips=trips) + ";" + _ROLLUP_SQL.format(trips=trips)
+    return [statement.strip() for statement in sql.split(";")]
+
+
+_REBUILD_ROLLUP = [text(statement) for statement in rollup_rebuild_statements(":trip_id")]
+
+
+async def rebuild_trip_rollup(db: AsyncSession, trip_id: UUID) -> None:
+    for statement in _REBUILD_ROLLUP:
+        await db.execute(statement, {"trip_id": trip_id})
+
+
+async def apply_stop_activity(
+    db: AsyncSession, stop_id: UUID, activity_id: UUID, sign: int = 1, scheduled_date: Optional[date] = None
+) -> None:
+    """
+    Count an activity added to (``sign=1``) or removed from (``sign=-1``) a
+    stop. Its cost goes to the day it is scheduled on, or the stop's first day.
+    """
+    result = await db.execute(
+        select(TripStop.trip_id, TripStop.start_date, Activity.cost)
+        .where(TripStop.id == stop_id, Activity.id == activity_id)
+    )
+    row = result.first()
+    if row is None or not row.cost:
+        return
+    deltas: Deltas = {}
+    _add(deltas, _buckets(PLANNED_CATEGORY, stop_id, scheduled_date or row.start_date), planned=sign * row.cost)
+    await _apply(db, row.trip_id, deltas)
+
+
+# Expenses
+
+async def stop_in_trip(db: AsyncSession, trip_id: UUID, stop_id: UUID) -> bool:
+    result = await db.execute(select(TripStop.id).where(TripStop.id == stop_id, TripStop.trip_id == trip_id))
+    return result.first() is not None
+
+async def get_expenses(db: AsyncSession, trip_id: UUID) -> List[TripExpense]:
+    result = await db.execute(
+        select(TripExpense)
+        .where(TripExpense.trip_id == trip_id)
+        .order_by(TripExpense.spent_on.asc().nulls_last(), TripExpense.id)
+    )
+    return result.scalars().all()
+
+async def get_expense(db: AsyncSession, trip_id: UUID, expense_id: UUID) -> Optional[TripExpense]:
+    result = await db.execute(
+        select(TripExpense).where(TripExpense.id == expense_id, TripExpense.trip_id == trip_id)
+    )
+    return result.scalars().first()
+
+def _expense_buckets(expense: TripExpense) -> List[Tuple[str, str]]:
+    return _buckets(expense.category, expense.stop_id, expense.spent_on)
+
+async def create_expense(db: AsyncSession, trip_id: UUID, expense_in: TripExpenseCreate) -> TripExpense:
+    expense = TripExpense(**expense_in.model_dump(), trip_id=trip_id)
+    db.add(expense)
+    deltas: Deltas = {}
+    _add(deltas, _expense_buckets(expense), actual=expense.amount)
+    await _apply(db, trip_id, deltas)
+    await db.commit()
+    await db.refresh(expense)
+    return expense
+
+async def update_expense(db: AsyncSession, expense: TripExpense, expense_in: TripExpenseUpdate) -> TripExpense:
+    deltas: Deltas = {}
+    _add(deltas, _expense_buckets(expense), actual=-expense.amount)
+    for field, value in expense_in.model_dump(exclude_unset=True).items():
+        setattr(expense, field, value)
+    _add(deltas, _expense_buckets(expense), actual=Decimal(expense.amount))
+    await _apply(db, expense.trip_id, deltas)
+    await db.commit()
+    await db.refresh(expense)
+    return expense
+
+async def delete_expense(db: AsyncSession, expense: TripExpense) -> None:
+    deltas: Deltas = {}
+    _add(deltas, _expense_buckets(expense), actual=-expense.amount)
+    await _apply(db, expense.trip_id, deltas)
+    await db.delete(expense)
+    await db.commit()
+
+
+# Reading
+
+async def get_budget(db: AsyncSession, trip_id: UUID, estimated_budget: Optional[Decimal]) -> TripBudget:
+    result = await db.execute(
+        select(TripBudgetRollup, City.name)
+        .outerjoin(
+            TripStop,
+            # trip_id lets the join use the trip's stops index; the cast alone cannot
+            and_(
+                TripBudgetRollup.dimension == "stop",
+                TripStop.trip_id == TripBudgetRollup.trip_id,
+                cast(TripStop.id, String) == TripBudgetRollup.bucket,
+            ),
+        )
+        .outerjoin(City, City.id == TripStop.city_id)
+        .where(TripBudgetRollup.trip_id == trip_id)
+        .order_by(TripBudgetRollup.dimension, TripStop.order_index, TripBudgetRollup.bucket)
+    )
+    totals = [ZERO, ZERO]
+    lines = defaultdict(list)
+    for rollup, city_name in result:
+        if rollup.dimension == "total":
+            totals = [rollup.planned, rollup.actual]
+        elif rollup.planned or rollup.actual:
+            lines[rollup.dimension].append(
+                BudgetLine(key=rollup.bucket, label=city_name, planned=rollup.planned, actual=rollup.actual)
+            )
+    planned, actual = totals
+    return TripBudget(
+        trip_id=trip_id,
+        estimated_budget=estimated_budget,
+        planned=planned,
+        actual=actual,
+        remaining=None if estimated_budget is None else estimated_budget - actual,
+        by_category=lines["category"],
+        by_stop=lines["stop"],
+        by_day=lines["day"],
+    )
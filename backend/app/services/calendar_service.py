@@ -0,0 +1,69 @@
+from datetime import date
+from typing import Dict, List
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_
+
+from app.models.trip import Trip, TripStop, StopActivity
+from app.models.city import City
+from app.models.activity import Activity
+from app.schemas.calendar import CalendarActivity, CalendarStop
+
+async def get_calendar(db: AsyncSession, user_id: UUID, start: date, end: date) -> List[CalendarStop]:
+    """
+    The user's dated stops overlapping ``[start, end]``, each with its
+    scheduled activities, from one column-only query. A stop without an end
+    date is treated as a single day; undated stops are not on the calendar.
+    Timed activities without a date are on their stop's first day.
+    """
+    stop_end = func.coalesce(TripStop.end_date, TripStop.start_date)
+    stmt = (
+        select(
+            TripStop.id, TripStop.trip_id, Trip.name.label("trip_name"), TripStop.city_id,
+            City.name.label("city_name"), TripStop.start_date, stop_end.label("end_date"),
+            StopActivity.id.label("stop_activity_id"), StopActivity.activity_id,
+            Activity.name.label("activity_name"),
+            func.coalesce(StopActivity.scheduled_date, TripStop.start_date).label("scheduled_date"),
+            StopActivity.scheduled_time, StopActivity.notes,
+        )
+        .select_from(Trip)
+        .join(TripStop, TripStop.trip_id == Trip.id)
+        .join(City, City.id == TripStop.city_id)
+        .outerjoin(
+            StopActivity,
+            and_(StopActivity.stop_id == TripStop.id, StopActivity.scheduled_time.isnot(None)),
+        )
+        .outerjoin(Activity, Activity.id == StopActivity.activity_id)
+        .where(
+            Trip.user_id == user_id,
+            # Served by ix_trip_stops_trip_id_start_date_end_date
+            TripStop.start_date <= end,
+            stop_end >= start,
+        )
+        .order_by(TripStop.start_date, TripStop.id, StopActivity.scheduled_date, StopActivity.scheduled_time)
+    )
+    result = await db.execute(stmt)
+
+    stops: Dict[UUID, CalendarStop] = {}
+    for row in result:
+        stop = stops.get(row.id)
+        if stop is None:
+            stop = stops[row.id] = CalendarStop(
+                id=row.id,
+                trip_id=row.trip_id,
+                trip_name=row.trip_name,
+                city_id=row.city_id,
+                city_name=row.city_name,
+                start_date=row.start_date,
+                end_date=row.end_date,
+            )
+        if row.stop_activity_id is not None:
+            stop.activities.append(CalendarActivity(
+                id=row.stop_activity_id,
+                activity_id=row.activity_id,
+                name=row.activity_name,
+                scheduled_date=row.scheduled_date,
+                scheduled_time=row.scheduled_time,
+                notes=row.notes,
+            ))
+    return list(stops.values())
@@ -0,0 +1,309 @@
+"""
+In-process search index over the city/activity catalog.
+
+The catalog is small and read-mostly, so autocomplete is served entirely from
+memory: a sorted prefix table (binary search) for the keystroke-by-keystroke
+case and a trigram inverted index for typo-tolerant matches. Committed ORM
+changes are applied incrementally via session events; a periodic full reload
+picks up bulk loads and writes made by other worker processes.
+"""
+import asyncio
+import logging
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.database import AsyncReadSessionLocal
+from app.models.activity import Activity
+from app.models.city import City
+
+logger = logging.getLogger(__name__)
+
+CITY = "city"
+ACTIVITY = "activity"
+
+_MIN_TRIGRAM_SIMILARITY = 0.45
+_FULL_PREFIX_BONUS = 1.5
+_WORD_PREFIX_BONUS = 1.0
+_KIND_CODES = {CITY: 1, ACTIVITY: 2}
+_RESULT_CACHE_SECONDS = 60
+
+
+class CatalogEntry:
+    __slots__ = ("id", "kind", "name", "subtitle", "rating", "key")
+
+    def __init__(self, id: UUID, kind: str, name: str, subtitle: Optional[str], rating: float):
+        self.id = id
+        self.kind = kind
+        self.name = name
+        self.subtitle = subtitle
+        self.rating = rating or 0.0
+        self.key = normalize(name)
+
+
+def normalize(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.lower().split())
+
+
+def trigrams(key: str) -> set:
+    grams = set()
+    for word in key.split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def _prefix_keys(key: str) -> List[str]:
+    """The full key plus every word-aligned suffix, so "york" finds "new york"."""
+    words = key.split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class CatalogIndex:
+    """
+    Entries live in a Python list; everything scored per query lives in
+    typed arrays viewed through NumPy without copying, so a lookup is a
+    couple of binary searches plus vectorised counting. Recent results are
+    memoised until the next mutation.
+    """
+
+    def __init__(self) -> None:
+        self._entries: List[Optional[CatalogEntry]] = []
+        self._positions: Dict[Tuple[str, UUID], int] = {}
+        self._ratings = array("f")
+        self._kinds = array("b")  # _KIND_CODES value, 0 once removed
+        self._grams: Dict[str, array] = {}
+        self._prefix_keys: List[str] = []
+        self._prefix_positions = array("I")
+        self._prefix_bonus = array("f")
+        self._city_names: Dict[UUID, str] = {}
+        self._results: TTLCache[list] = TTLCache(maxsize=4096, ttl=_RESULT_CACHE_SECONDS)
+        self._dead = 0
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    # Building
+
+    def _append(self, entry: CatalogEntry) -> int:
+        position = len(self._entries)
+        self._entries.append(entry)
+        self._ratings.append(entry.rating)
+        self._kinds.append(_KIND_CODES[entry.kind])
+        self._positions[(entry.kind, entry.id)] = position
+        grams = self._grams
+        for gram in trigrams(entry.key):
+            postings = grams.get(gram)
+            if postings is None:
+                postings = grams[gram] = array("I")
+            postings.append(position)
+        if entry.kind == CITY:
+            self._city_names[entry.id] = entry.name
+        return position
+
+    @classmethod
+    def build(cls, entries: List[CatalogEntry]) -> "CatalogIndex":
+        index = cls()
+        prefixes = []
+        for entry in entries:
+            position = index._append(entry)
+            for i, key in enumerate(_prefix_keys(entry.key)):
+                prefixes.append((key, position, _FULL_PREFIX_BONUS if i == 0 else _WORD_PREFIX_BONUS))
+        prefixes.sort()
+        index._prefix_keys = [key for key, _, _ in prefixes]
+        index._prefix_positions = array("I", (position for _, position, _ in prefixes))
+        index._prefix_bonus = array("f", (bonus for _, _, bonus in prefixes))
+        index.loaded = True
+        return index
+
+    def upsert(self, entry: CatalogEntry) -> None:
+        self.remove(entry.kind, entry.id)
+        self._results.clear()
+        position = self._append(entry)
+        for i, key in enumerate(_prefix_keys(entry.key)):
+            at = bisect_left(self._prefix_keys, key)
+            self._prefix_keys.insert(at, key)
+            self._prefix_positions.insert(at, position)
+            self._prefix_bonus.insert(at, _FULL_PREFIX_BONUS if i == 0 else _WORD_PREFIX_BONUS)
+        if self._dead > max(1024, len(self._positions) // 4):
+            self._compact()
+
+    def remove(self, kind: str, id: UUID) -> None:
+        position = self._positions.pop((kind, id), None)
+        if position is None:
+            return
+        # Postings and prefix rows are left behind as tombstones and
+        # masked out at query time until the next compaction.
+        self._entries[position] = None
+        self._kinds[position] = 0
+        self._results.clear()
+        self._dead += 1
+        if kind == CITY:
+            self._city_names.pop(id, None)
+
+    def _compact(self) -> None:
+        fresh = CatalogIndex.build([entry for entry in self._entries if entry is not None])
+        self.__dict__.update(fresh.__dict__)
+
+    def city_name(self, city_id: UUID) -> Optional[str]:
+        return self._city_names.get(city_id)
+
+    # Querying
+
+    def search(self, q: str, limit: int = 10, kind: Optional[str] = None) -> List[Tuple[CatalogEntry, float]]:
+        key = normalize(q)
+        if not key or limit <= 0 or not self._entries:
+            return []
+        # Autocomplete traffic is dominated by a small set of short prefixes
+        cache_key = (key, limit, kind)
+        cached = self._results.get(cache_key)
+        if cached is None:
+            cached = self._search(key, limit, kind)
+            self._results.set(cache_key, cached)
+        return cached
+
+    def _search(self, key: str, limit: int, kind: Optional[str]) -> List[Tuple[CatalogEntry, float]]:
+        size = len(self._entries)
+        scores = np.zeros(size, dtype=np.float32)
+
+        # Prefix matches: one contiguous slice of the sorted prefix table
+        start = bisect_left(self._prefix_keys, key)
+        stop = bisect_left(self._prefix_keys, key + "\uffff", lo=start)
+        if stop > start:
+            positions = np.frombuffer(self._prefix_positions, dtype=np.uint32)[start:stop]
+            bonus = np.frombuffer(self._prefix_bonus, dtype=np.float32)[start:stop]
+            scores[positions] = _WORD_PREFIX_BONUS
+            scores[positions[bonus == _FULL_PREFIX_BONUS]] = _FULL_PREFIX_BONUS
+
+        # Typo-tolerant matches: share of the query's trigrams each entry contains
+        query_grams = trigrams(key)
+        if len(key) >= 3:
+            postings = [
+                np.frombuffer(self._grams[gram], dtype=np.uint32)
+                for gram in query_grams
+                if gram in self._grams
+            ]
+            if postings:
+                similarity = np.bincount(np.concatenate(postings), minlength=size) / np.float32(len(query_grams))
+                scores += np.where(similarity >= _MIN_TRIGRAM_SIMILARITY, similarity, 0).astype(np.float32)
+
+        candidates = np.flatnonzero(scores)
+        kinds = np.frombuffer(self._kinds, dtype=np.int8)[candidates]
+        candidates = candidates[kinds != 0 if kind is None else kinds == _KIND_CODES[kind]]
+        if candidates.size == 0:
+            return []
+
+        ranked = scores[candidates] + np.frombuffer(self._ratings, dtype=np.float32)[candidates] * 0.01
+        if candidates.size > limit:
+            top = np.argpartition(-ranked, limit)[:limit]
+            candidates, ranked = candidates[top], ranked[top]
+        order = np.argsort(-ranked, kind="stable")
+        return [(self._entries[candidates[i]], round(float(ranked[i]), 4)) for i in order]
+
+
+def _city_entry(city_id: UUID, name: str, country: Optional[str], rating: Optional[float]) -> CatalogEntry:
+    return CatalogEntry(city_id, CITY, name, country, rating)
+
+
+def _activity_entry(activity_id: UUID, name: str, city_name: Optional[str]) -> CatalogEntry:
+    return CatalogEntry(activity_id, ACTIVITY, name, city_name, 0.0)
+
+
+async def build_from_db(db: AsyncSession) -> CatalogIndex:
+    entries: List[CatalogEntry] = []
+    city_names: Dict[UUID, str] = {}
+    result = await db.execute(select(City.id, City.name, City.country, City.rating))
+    for row in result:
+        entries.append(_city_entry(row.id, row.name, row.country, row.rating))
+        city_names[row.id] = row.name
+    result = await db.execute(select(Activity.id, Activity.name, Activity.city_id))
+    for row in result:
+        entries.append(_activity_entry(row.id, row.name, city_names.get(row.city_id)))
+    return CatalogIndex.build(entries)
+
+
+_index = CatalogIndex()
+
+
+def get_index() -> CatalogIndex:
+    return _index
+
+
+def search(q: str, limit: int = 10, kind: Optional[str] = None) -> List[Tuple[CatalogEntry, float]]:
+    return _index.search(q, limit=limit, kind=kind)
+
+
+async def reload() -> None:
+    global _index
+    async with AsyncReadSessionLocal() as db:
+        fresh = await build_from_db(db)
+    _index = fresh
+    logger.info("Catalog index loaded with %d entries", len(fresh))
+
+
+async def refresh_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.CATALOG_INDEX_REFRESH_SECONDS)
+        try:
+            await reload()
+        except Exception:
+            logger.exception("Catalog index refresh failed")
+
+
+# Incremental maintenance: collect catalog changes per flush and apply them to
+# the live index only once the transaction commits.
+
+def _loaded(obj, attr: str):
+    return inspect(obj).dict.get(attr)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_catalog_changes(session: Session, flush_context) -> None:
+    changes = None
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, (City, Activity)):
+            if changes is None:
+                changes = session.info.setdefault("catalog_changes", [])
+            kind = CITY if isinstance(obj, City) else ACTIVITY
+            if obj in session.deleted:
+                changes.append((kind, obj.id, None))
+            elif kind == CITY:
+                changes.append((kind, obj.id, (_loaded(obj, "name"), _loaded(obj, "country"), _loaded(obj, "rating"))))
+            else:
+                changes.append((kind, obj.id, (_loaded(obj, "name"), _loaded(obj, "city_id"))))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_catalog_changes(session: Session) -> None:
+    changes = session.info.pop("catalog_changes", None)
+    if not changes or not _index.loaded:
+        return
+    for kind, id, values in changes:
+        if values is None:
+            _index.remove(kind, id)
+        elif values[0] is None:
+            # Name not loaded on this instance; the periodic reload will catch up
+            continue
+        elif kind == CITY:
+            _index.upsert(_city_entry(id, *values))
+        else:
+            name, city_id = values
+            _index.upsert(_activity_entry(id, name, _index.city_name(city_id)))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_changes(session: Session) -> None:
+    session.info.pop("catalog_changes", None)
@@ -0,0 +1,181 @@
+import math
+from typing import List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, or_, and_, func, literal, literal_column
+
+from app.core import geo, pagination
+from app.models.city import City
+from app.models.activity import Activity
+from app.services import recommendations
+
+
+# Inlined rather than bound so asyncpg never has to encode a regconfig parameter
+_TS_CONFIG = literal_column("'simple'::regconfig")
+
+
+def _like_pattern(q: str) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _text_query(q: str):
+    return func.plainto_tsquery(_TS_CONFIG, q)
+
+
+def _city_match(q: str):
+    # Every branch is served by a GIN index: ILIKE and `<%` (word similarity,
+    # which tolerates typos in partial input) by the trigram indexes on
+    # name/country, `@@` by the index on the generated search_vector.
+    pattern = _like_pattern(q)
+    return or_(
+        City.name.ilike(pattern, escape="\\"),
+        City.country.ilike(pattern, escape="\\"),
+        literal(q).op("<%")(City.name),
+        literal(q).op("<%")(City.country),
+        City.search_vector.op("@@")(_text_query(q)),
+    )
+
+
+def _city_rank(q: str):
+    return (
+        func.greatest(func.word_similarity(q, City.name), func.word_similarity(q, City.country))
+        + func.ts_rank_cd(City.search_vector, _text_query(q))
+    )
+
+
+def _activity_match(q: str):
+    return or_(
+        Activity.name.ilike(_like_pattern(q), escape="\\"),
+        literal(q).op("<%")(Activity.name),
+        Activity.search_vector.op("@@")(_text_query(q)),
+    )
+
+
+def _activity_rank(q: str):
+    return func.word_similarity(q, Activity.name) + func.ts_rank_cd(Activity.search_vector, _text_query(q))
+
+
+def _city_keys(rank=None):
+    keys = [(City.rating, True, False), (City.name, False, False), (City.id, False, False)]
+    return ([(rank, True, False)] if rank is not None else []) + keys
+
+
+def _activity_keys(rank=None):
+    keys = [(Activity.name, False, False), (Activity.id, False, False)]
+    return ([(rank, True, False)] if rank is not None else []) + keys
+
+
+async def _page(db: AsyncSession, stmt, keys, skip: int, limit: int, cursor: Optional[str]):
+    """Run a listing query with keyset pagination, or offset pagination when no cursor is given."""
+    if cursor:
+        stmt = stmt.where(pagination.keyset_predicate(keys, pagination.decode_cursor(cursor, len(keys))))
+    elif skip:
+        stmt = stmt.offset(skip)
+    stmt = stmt.order_by(*pagination.order_by(keys)).limit(limit + 1)
+
+    result = await db.execute(stmt)
+    rows = result.all()
+
+    def key_values(row):
+        # Leading computed keys (the relevance rank) come back as extra columns
+        extra = list(row[1:])
+        return extra + [getattr(row[0], expr.key) for expr, _, _ in keys[len(extra):]]
+
+    return [row[0] for row in rows[:limit]], pagination.next_cursor(rows, limit, key_values)
+
+
+async def search_cities(
+    db: AsyncSession,
+    q: Optional[str] = None,
+    region: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Tuple[List[City], Optional[str]]:
+    if q:
+        rank = _city_rank(q)
+        stmt = select(City, rank.label("rank")).where(_city_match(q))
+        keys = _city_keys(rank)
+    else:
+        stmt = select(City)
+        keys = _city_keys()
+
+    if region:
+        stmt = stmt.where(City.region == region)
+
+    return await _page(db, stmt, keys, skip, limit, cursor)
+
+
+async def search_activities(
+    db: AsyncSession,
+    q: Optional[str] = None,
+    city_id: Optional[str] = None,
+    category: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Activity], Optional[str]]:
+    if q:
+        rank = _activity_rank(q)
+        stmt = select(Activity, rank.label("rank")).where(_activity_match(q))
+        keys = _activity_keys(rank)
+    else:
+        stmt = select(Activity)
+        keys = _activity_keys()
+
+    if city_id:
+        stmt = stmt.where(Activity.city_id == city_id)
+
+    if category:
+        stmt = stmt.where(Activity.category == category)
+
+    return await _page(db, stmt, keys, skip, limit, cursor)
+
+
+def _distance_km(lat: float, lon: float):
+    """Great-circle distance from ``(lat, lon)`` to each city, in SQL."""
+    a = (
+        func.power(func.sin(func.radians(City.latitude - lat) / 2), 2)
+        + math.cos(math.radians(lat)) * func.cos(func.radians(City.latitude))
+        * func.power(func.sin(func.radians(City.longitude - lon) / 2), 2)
+    )
+    return 2 * geo.EARTH_RADIUS_KM * func.asin(func.sqrt(func.least(a, 1.0)))
+
+
+async def search_cities_nearby(
+    db: AsyncSession, lat: float, lon: float, radius_km: float, limit: int = 20
+) -> List[Tuple[City, float]]:
+    """Cities within ``radius_km`` of a point, nearest first, with their distance."""
+    distance = _distance_km(lat, lon)
+    stmt = select(City, distance.label("distance_km")).where(City.latitude.isnot(None), distance <= radius_km)
+
+    # One index range scan per covering cell; only the candidates in those
+    # cells get the exact distance check
+    prefixes = geo.covering_prefixes(lat, lon, radius_km)
+    if prefixes:
+        stmt = stmt.where(or_(*(
+            and_(City.geohash.op("~>=~")(prefix), City.geohash.op("~<~")(prefix + "~"))
+            for prefix in prefixes
+        )))
+
+    result = await db.execute(stmt.order_by(distance, City.id).limit(limit))
+    return [(city, distance_km) for city, distance_km in result.all()]
+
+
+async def _ranked(db: AsyncSession, model, ranked: List[Tuple[UUID, float]]) -> List[Tuple[object, float]]:
+    """Load the rows for precomputed ``(id, score)`` pairs, keeping their order."""
+    if not ranked:
+        return []
+    result = await db.execute(select(model).where(model.id.in_([id for id, _ in ranked])))
+    rows = {row.id: row for row in result.scalars()}
+    # Items deleted since the recommendations were computed are skipped
+    return [(rows[id], score) for id, score in ranked if id in rows]
+
+
+async def similar_cities(db: AsyncSession, city_id: UUID, limit: int = 10) -> List[Tuple[City, float]]:
+    return await _ranked(db, City, recommendations.similar_cities(city_id, limit))
+
+
+async def also_added_activities(db: AsyncSession, activity_id: UUID, limit: int = 10) -> List[Tuple[Activity, float]]:
+    return await _ranked(db, Activity, recommendations.also_added(activity_id, limit))
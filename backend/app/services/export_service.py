@@ -0,0 +1,242 @@
+"""
+Streaming export of everything a user has planned.
+
+Each record type is read with its own server-side cursor (``yield_per``) and
+written out one partition at a time, so memory stays flat no matter how many
+trips the user has. The generators open their own session because they run
+after the endpoint has returned.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select
+
+from app.database import AsyncSessionLocal
+from app.models.activity import Activity
+from app.models.city import City
+from app.models.trip import StopActivity, Trip, TripExpense, TripStop
+from app.services.schedule_service import duration_minutes
+
+# Rows fetched per round trip from the server-side cursor
+_CHUNK = 500
+
+
+def _trips(user_id: UUID):
+    return (
+        select(
+            Trip.id, Trip.name, Trip.description, Trip.start_date, Trip.end_date,
+            Trip.status, Trip.is_public, Trip.estimated_budget,
+        )
+        .where(Trip.user_id == user_id)
+        .order_by(Trip.start_date, Trip.id)
+    )
+
+
+def _stops(user_id: UUID):
+    return (
+        select(
+            TripStop.id, TripStop.trip_id, Trip.name.label("trip_name"), TripStop.order_index,
+            City.name.label("city"), City.country, TripStop.start_date, TripStop.end_date,
+        )
+        .join(Trip, Trip.id == TripStop.trip_id)
+        .join(City, City.id == TripStop.city_id)
+        .where(Trip.user_id == user_id)
+        .order_by(TripStop.trip_id, TripStop.order_index)
+    )
+
+
+def _activities(user_id: UUID):
+    return (
+        select(
+            StopActivity.id, StopActivity.stop_id, TripStop.trip_id, Trip.name.label("trip_name"),
+            City.name.label("city"), Activity.name, Activity.category, Activity.cost,
+            Activity.duration_minutes, TripStop.start_date.label("stop_start_date"),
+            func.coalesce(StopActivity.scheduled_date, TripStop.start_date).label("scheduled_date"),
+            StopActivity.scheduled_time, StopActivity.notes,
+        )
+        .join(TripStop, TripStop.id == StopActivity.stop_id)
+        .join(Trip, Trip.id == TripStop.trip_id)
+        .join(City, City.id == TripStop.city_id)
+        .join(Activity, Activity.id == StopActivity.activity_id)
+        .where(Trip.user_id == user_id)
+        .order_by(TripStop.trip_id, TripStop.order_index, StopActivity.scheduled_date, StopActivity.scheduled_time)
+    )
+
+
+def _expenses(user_id: UUID):
+    return (
+        select(
+            TripExpense.id, TripExpense.trip_id, TripExpense.stop_id, TripExpense.category,
+            TripExpense.amount, TripExpense.spent_on, TripExpense.notes,
+        )
+        .join(Trip, Trip.id == TripExpense.trip_id)
+        .where(Trip.user_id == user_id)
+        .order_by(TripExpense.trip_id, TripExpense.spent_on, TripExpense.id)
+    )
+
+
+_RECORDS = (("trip", _trips), ("stop", _stops), ("activity", _activities), ("expense", _expenses))
+
+
+async def _partitions(user_id: UUID, record_types=None) -> AsyncIterator[Tuple[str, List[Any]]]:
+    """Yield ``(record_type, rows)`` chunks for each record type in turn."""
+    async with AsyncSessionLocal() as db:
+        for record_type, statement in _RECORDS:
+            if record_types is not None and record_type not in record_types:
+                continue
+            result = await db.stream(statement(user_id).execution_options(yield_per=_CHUNK))
+            async for rows in result.partitions():
+                yield record_type, rows
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+# NDJSON
+
+async def export_ndjson(user_id: UUID) -> AsyncIterator[str]:
+    async for record_type, rows in _partitions(user_id):
+        yield "".join(
+            json.dumps({"type": record_type, **row._asdict()}, default=_json_default) + "\n" for row in rows
+        )
+
+
+# CSV: one sheet, one row per record, columns unused by a record type left blank
+
+CSV_COLUMNS = [
+    "type", "id", "trip_id", "trip_name", "stop_id", "order_index", "city", "country", "name",
+    "category", "status", "start_date", "end_date", "scheduled_date", "scheduled_time", "amount", "notes",
+]
+
+_CSV_FIELDS: Dict[str, Dict[str, str]] = {
+    # record type -> {csv column: row field}
+    "trip": {"id": "id", "trip_id": "id", "trip_name": "name", "name": "name", "status": "status",
+             "start_date": "start_date", "end_date": "end_date", "amount": "estimated_budget",
+             "notes": "description"},
+    "stop": {"id": "id", "trip_id": "trip_id", "trip_name": "trip_name", "stop_id": "id",
+             "order_index": "order_index", "city": "city", "country": "country",
+             "start_date": "start_date", "end_date": "end_date"},
+    "activity": {"id": "id", "trip_id": "trip_id", "trip_name": "trip_name", "stop_id": "stop_id",
+                 "city": "city", "name": "name", "category": "category", "start_date": "stop_start_date",
+                 "scheduled_date": "scheduled_date", "scheduled_time": "scheduled_time", "amount": "cost", "notes": "notes"},
+    "expense": {"id": "id", "trip_id": "trip_id", "stop_id": "stop_id", "category": "category",
+                "start_date": "spent_on", "amount": "amount", "notes": "notes"},
+}
+
+
+async def export_csv(user_id: UUID) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    async for record_type, rows in _partitions(user_id):
+        fields = _CSV_FIELDS[record_type]
+        for row in rows:
+            values = row._mapping
+            writer.writerow([
+                record_type if column == "type" else _csv_value(values.get(fields.get(column)))
+                for column in CSV_COLUMNS
+            ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return value
+
+
+# iCalendar (RFC 5545): all-day events for trips and stops, timed events for
+# scheduled activities. Undated records are skipped.
+
+def _ics_escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _ics_fold(line: str) -> str:
+    """Fold a content line to 75 octets per RFC 5545 section 3.1."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never split a UTF-8 sequence
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start, limit = end, 74  # continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_event(uid: str, summary: str, start: str, end: str, all_day: bool, description: Optional[str] = None) -> str:
+    kind = ";VALUE=DATE" if all_day else ""
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}@globetrotter",
+        f"DTSTAMP:{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}",
+        f"DTSTART{kind}:{start}",
+        f"DTEND{kind}:{end}",
+        f"SUMMARY:{_ics_escape(summary)}",
+    ]
+    if description:
+        lines.append(f"DESCRIPTION:{_ics_escape(description)}")
+    lines.append("END:VEVENT")
+    return "".join(_ics_fold(line) for line in lines)
+
+
+def _all_day(start: date, end: date) -> Tuple[str, str]:
+    # DTEND is exclusive for all-day events
+    return start.strftime("%Y%m%d"), ((end or start) + timedelta(days=1)).strftime("%Y%m%d")
+
+
+def _ics_records(record_type: str, rows: Iterable[Any]) -> Iterable[str]:
+    for row in rows:
+        if record_type == "trip" and row.start_date:
+            start, end = _all_day(row.start_date, row.end_date)
+            yield _ics_event(f"trip-{row.id}", row.name, start, end, True, row.description)
+        elif record_type == "stop" and row.start_date:
+            start, end = _all_day(row.start_date, row.end_date)
+            yield _ics_event(f"stop-{row.id}", f"{row.city} ({row.trip_name})", start, end, True)
+        elif record_type == "activity" and row.scheduled_date and row.scheduled_time:
+            starts = datetime.combine(row.scheduled_date, row.scheduled_time)
+            ends = starts + timedelta(minutes=duration_minutes(row.duration_minutes))
+            yield _ics_event(
+                f"activity-{row.id}", f"{row.name} - {row.city}",
+                starts.strftime("%Y%m%dT%H%M%S"), ends.strftime("%Y%m%dT%H%M%S"), False, row.notes,
+            )
+
+
+async def export_ics(user_id: UUID) -> AsyncIterator[str]:
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//GlobeTrotter//Trip Export//EN\r\nCALSCALE:GREGORIAN\r\n"
+    async for record_type, rows in _partitions(user_id, record_types=("trip", "stop", "activity")):
+        events = "".join(_ics_records(record_type, rows))
+        if events:
+            yield events
+    yield "END:VCALENDAR\r\n"
+
+
+# format -> (generator, media type, file extension)
+FORMATS: Dict[str, Tuple[Callable[[UUID], AsyncIterator[str]], str, str]] = {
+    "ndjson": (export_ndjson, "application/x-ndjson", "ndjson"),
+    "csv": (export_csv, "text/csv", "csv"),
+    "ics": (export_ics, "text/calendar", "ics"),
+}
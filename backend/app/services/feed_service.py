@@ -0,0 +1,112 @@
+"""
+The community feed of public trips.
+
+Each public trip has a denormalized ``trip_feed`` row with everything a feed
+card shows, so a page is one scan of a keyset index on that table. Rows are
+refreshed by the write paths that change a trip's card (the trip itself, its
+stops and their order), the same way budget rollups are maintained.
+"""
+from typing import List, Literal, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core import pagination
+from app.models.community import TripFeedEntry
+from app.schemas.trip import FeedTrip
+from app.services import trip_counters
+
+FeedSort = Literal["recent", "popular"]
+
+# Served by ix_trip_feed_published_at_trip_id and
+# ix_trip_feed_popularity_published_at_trip_id
+FEED_KEYS = {
+    "recent": [(TripFeedEntry.published_at, True, False), (TripFeedEntry.trip_id, True, False)],
+    "popular": [
+        (TripFeedEntry.popularity, True, False),
+        (TripFeedEntry.published_at, True, False),
+        (TripFeedEntry.trip_id, True, False),
+    ],
+}
+
+# Drops the rows of trips that are no longer public, then upserts the rest.
+# published_at survives edits; a trip made private and public again is
+# republished. Counts are taken from trip_stats on insert and afterwards
+# kept current by counter flushes.
+_FEED_SQL = """
+DELETE FROM trip_feed f
+WHERE f.trip_id IN ({trips}) AND NOT EXISTS (SELECT 1 FROM trips t WHERE t.id = f.trip_id AND t.is_public);
+INSERT INTO trip_feed (
+    trip_id, user_id, name, description, cover_image, start_date, end_date, city_names, stop_count,
+    view_count, copy_count, popularity
+)
+SELECT t.id, t.user_id, t.name, t.description, t.cover_image, t.start_date, t.end_date,
+       coalesce(s.city_names, '{{}}'), coalesce(s.stop_count, 0),
+       coalesce(st.view_count, 0), coalesce(st.copy_count, 0),
+       coalesce(st.view_count + {copy_weight} * st.copy_count, 0)
+FROM trips t
+LEFT JOIN trip_stats st ON st.trip_id = t.id
+LEFT JOIN LATERAL (
+    SELECT array_agg(c.name ORDER BY ts.order_index, ts.id) AS city_names, count(*) AS stop_count
+    FROM trip_stops ts
+    JOIN cities c ON c.id = ts.city_id
+    WHERE ts.trip_id = t.id
+) s ON true
+WHERE t.is_public AND t.id IN ({trips})
+ON CONFLICT (trip_id) DO UPDATE SET
+    user_id = excluded.user_id,
+    name = excluded.name,
+    description = excluded.description,
+    cover_image = excluded.cover_image,
+    start_date = excluded.start_date,
+    end_date = excluded.end_date,
+    city_names = excluded.city_names,
+    stop_count = excluded.stop_count
+"""
+
+
+def feed_refresh_statements(trips: str) -> List[str]:
+    """
+    SQL refreshing the feed rows of the trips selected by ``trips``: a
+    parameter or a subquery returning trip ids.
+    """
+    sql = _FEED_SQL.format(trips=trips, copy_weight=int(settings.POPULARITY_COPY_WEIGHT))
+    return [statement.strip() for statement in sql.split(";")]
+
+
+_REFRESH_TRIP = [text(statement) for statement in feed_refresh_statements(":trip_id")]
+
+
+async def refresh_trip(db: AsyncSession, trip_id: UUID) -> None:
+    """Bring the trip's feed row in line with the trip; call before committing its changes."""
+    for statement in _REFRESH_TRIP:
+        await db.execute(statement, {"trip_id": trip_id})
+
+
+def _with_pending_counts(entry: TripFeedEntry) -> FeedTrip:
+    trip = FeedTrip.model_validate(entry)
+    views, copies = trip_counters.pending(entry.trip_id)
+    if views or copies:
+        trip.view_count += views
+        trip.copy_count += copies
+    return trip
+
+
+async def get_feed(
+    db: AsyncSession, sort: FeedSort = "recent", limit: int = 20, cursor: Optional[str] = None
+) -> Tuple[List[FeedTrip], Optional[str]]:
+    """
+    A page of the feed. Popularity, and so the popular order, is as of the
+    last counter flush; the view and copy counts include pending ones.
+    """
+    keys = FEED_KEYS[sort]
+    stmt = select(TripFeedEntry).order_by(*pagination.order_by(keys)).limit(limit + 1)
+    if cursor:
+        stmt = stmt.where(pagination.keyset_predicate(keys, pagination.decode_cursor(cursor, len(keys))))
+    entries = (await db.execute(stmt)).scalars().all()
+    next_cursor = pagination.next_cursor(
+        entries, limit, lambda entry: [getattr(entry, expr.key) for expr, _, _ in keys]
+    )
+    return [_with_pending_counts(entry) for entry in entries[:limit]], next_cursor
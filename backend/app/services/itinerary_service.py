@@ -1,11 +1,33 @@
-from typing import List, Optional
-from uuid import UUID
+import time
+from dataclasses import dataclass
+from datetime import date, time as dtime
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, delete, or_
 from sqlalchemy.orm import selectinload
 
+from app.core import geo
+from app.core.intervals import IntervalTree
+from app.core.route_optimizer import RouteError, optimize_order
 from app.models.trip import TripStop, StopActivity
+from app.models.city import City
+from app.models.activity import Activity
 from app.schemas.trip import TripStopCreate, StopActivityCreate
+from app.services import budget_service, feed_service, schedule_service
+from app.schemas.itinerary import (
+    AddActivityOperation,
+    AddStopOperation,
+    DistanceStop,
+    ItineraryOperation,
+    MoveStopOperation,
+    OperationResult,
+    RemoveActivityOperation,
+    RemoveStopOperation,
+    RouteOptimization,
+    ScheduleActivityOperation,
+    StopDistanceMatrix,
+)
 
 async def add_stop(db: AsyncSession, trip_id: UUID, stop_in: TripStopCreate) -> TripStop:
     db_stop = TripStop(
@@ -16,13 +38,14 @@ async def add_stop(db: AsyncSession, trip_id: UUID, stop_in: TripStopCreate) ->
         end_date=stop_in.end_date
     )
     db.add(db_stop)
+    await db.flush()
+    await feed_service.refresh_trip(db, trip_id)
     await db.commit()
-    await db.refresh(db_stop)
     # Reload with city for response
     result = await db.execute(
         select(TripStop)
         .where(TripStop.id == db_stop.id)
-        .options(selectinload(TripStop.city))
+        .options(selectinload(TripStop.city), selectinload(TripStop.activities))
     )
     return result.scalars().first()
 
@@ -31,18 +54,31 @@ async def remove_stop(db: AsyncSession, stop_id: UUID) -> bool:
     stop = result.scalars().first()
     if not stop:
         return False
+    # Before the delete locks the stop's rows
+    await budget_service.lock_trip(db, stop.trip_id)
     await db.delete(stop)
+    await db.flush()
+    await budget_service.rebuild_trip_rollup(db, stop.trip_id)
+    await feed_service.refresh_trip(db, stop.trip_id)
     await db.commit()
     return True
 
 async def add_activity(db: AsyncSession, stop_id: UUID, activity_in: StopActivityCreate) -> StopActivity:
+    """Raises ``ScheduleError`` if the scheduled date or time does not fit the stop's schedule."""
+    await schedule_service.check_slot(
+        db, stop_id, activity_in.activity_id, activity_in.scheduled_date, activity_in.scheduled_time
+    )
     db_activity = StopActivity(
         stop_id=stop_id,
         activity_id=activity_in.activity_id,
+        scheduled_date=activity_in.scheduled_date,
         scheduled_time=activity_in.scheduled_time,
         notes=activity_in.notes
     )
     db.add(db_activity)
+    await budget_service.apply_stop_activity(
+        db, stop_id, activity_in.activity_id, scheduled_date=activity_in.scheduled_date
+    )
     await db.commit()
     await db.refresh(db_activity)
     # Reload with activity details
@@ -58,6 +94,409 @@ async def remove_activity(db: AsyncSession, stop_activity_id: UUID) -> bool:
     activity = result.scalars().first()
     if not activity:
         return False
+    await budget_service.apply_stop_activity(
+        db, activity.stop_id, activity.activity_id, sign=-1, scheduled_date=activity.scheduled_date
+    )
     await db.delete(activity)
     await db.commit()
     return True
+
+
+# Batch mutations
+#
+# A batch is validated against the trip's current stops in memory, then
+# written with at most two deletes, two multi-row inserts and two executemany
+# updates before a single commit. Ids for new rows are generated client-side
+# so later operations in the batch can refer to them without a flush.
+
+def _resolve(reference: Optional[str], refs: Dict[str, UUID]) -> Optional[UUID]:
+    if reference is None:
+        return None
+    if reference in refs:
+        return refs[reference]
+    try:
+        return UUID(reference)
+    except ValueError:
+        return None
+
+
+async def _existing(db: AsyncSession, model, ids: Set[UUID]) -> Set[UUID]:
+    if not ids:
+        return set()
+    result = await db.execute(select(model.id).where(model.id.in_(ids)))
+    return set(result.scalars().all())
+
+
+@dataclass
+class _Slot:
+    """Where a stop activity sits in the batch's working state."""
+    stop_id: UUID
+    activity_id: UUID
+    scheduled_date: Optional[date]
+    scheduled_time: Optional[dtime]
+
+
+def _slot_errors(
+    checks: Dict[UUID, int],
+    slots: Dict[UUID, _Slot],
+    stop_dates: Dict[UUID, Tuple[Optional[date], Optional[date]]],
+    catalog: Dict[UUID, Tuple[str, Optional[int]]],
+) -> Dict[int, str]:
+    """
+    Check the stop activities in ``checks`` against the batch's final state
+    with the rules of ``schedule_service.check_slot``: the date must fall
+    within the stop's dates, and a timed activity must not overlap another
+    timed activity of its stop on the same day. Returns operation index ->
+    error, blaming the operation that last placed each activity.
+    """
+    days = {stop_id: schedule_service.stop_days(*dates) for stop_id, dates in stop_dates.items()}
+    checked_stops = {slots[id].stop_id for id in checks}
+    trees: Dict[Tuple[UUID, Optional[date]], IntervalTree] = {}
+    for id, slot in slots.items():
+        if slot.stop_id in checked_stops and slot.scheduled_time is not None:
+            start = slot.scheduled_time.hour * 60 + slot.scheduled_time.minute
+            minutes = schedule_service.duration_minutes(catalog[slot.activity_id][1])
+            day = slot.scheduled_date or days[slot.stop_id][0]
+            trees.setdefault((slot.stop_id, day), IntervalTree()).add(start, start + minutes, id)
+
+    errors: Dict[int, str] = {}
+    for id, index in sorted(checks.items(), key=lambda item: item[1]):
+        slot = slots[id]
+        stop_days = days[slot.stop_id]
+        error = schedule_service.date_error(stop_days, slot.scheduled_date)
+        if error is None and slot.scheduled_time is not None:
+            start = slot.scheduled_time.hour * 60 + slot.scheduled_time.minute
+            minutes = schedule_service.duration_minutes(catalog[slot.activity_id][1])
+            tree = trees[(slot.stop_id, slot.scheduled_date or stop_days[0])]
+            other = next((key for _, _, key in tree.overlapping(start, start + minutes) if key != id), None)
+            if other is not None:
+                name, duration = catalog[slots[other].activity_id]
+                error = schedule_service.conflict_error(
+                    name, slots[other].scheduled_time, schedule_service.duration_minutes(duration)
+                )
+        if error is not None:
+            errors.setdefault(index, error)
+    return errors
+
+
+async def get_itinerary(db: AsyncSession, trip_id: UUID) -> List[TripStop]:
+    result = await db.execute(
+        select(TripStop)
+        .where(TripStop.trip_id == trip_id)
+        .order_by(TripStop.order_index)
+        .options(
+            selectinload(TripStop.city),
+            selectinload(TripStop.activities).selectinload(StopActivity.activity),
+        )
+    )
+    return result.scalars().all()
+
+
+async def _distance_stops(db: AsyncSession, trip_id: UUID) -> List[DistanceStop]:
+    result = await db.execute(
+        select(
+            TripStop.id, TripStop.city_id, City.name.label("city_name"), TripStop.order_index,
+            City.latitude, City.longitude,
+        )
+        .join(City, City.id == TripStop.city_id)
+        .where(TripStop.trip_id == trip_id)
+        .order_by(TripStop.order_index, TripStop.id)
+    )
+    return [DistanceStop(**row._mapping) for row in result]
+
+
+async def get_distance_matrix(db: AsyncSession, trip_id: UUID) -> StopDistanceMatrix:
+    """Great-circle distances between every pair of the trip's stops."""
+    stops = await _distance_stops(db, trip_id)
+    matrix = geo.distance_matrix_km([s.latitude for s in stops], [s.longitude for s in stops])
+    rounded = [[None if d != d else round(float(d), 3) for d in row] for row in matrix]  # NaN -> None
+    legs = [rounded[i][i + 1] for i in range(len(stops) - 1)]
+    return StopDistanceMatrix(
+        trip_id=trip_id,
+        stops=stops,
+        distances_km=rounded,
+        legs_km=legs,
+        total_km=None if None in legs else round(sum(legs), 3),
+    )
+
+
+async def optimize_route(
+    db: AsyncSession,
+    trip_id: UUID,
+    start_stop_id: Optional[UUID] = None,
+    end_stop_id: Optional[UUID] = None,
+    time_budget_ms: int = 50,
+    apply: bool = False,
+) -> RouteOptimization:
+    """
+    Shortest stop order found within ``time_budget_ms``, optionally pinned to
+    start and/or end at given stops. With ``apply`` the stops' order_index
+    is rewritten to the new positions (dates are left alone). Raises
+    ``RouteError`` for unknown stops or cities without coordinates.
+    """
+    started = time.perf_counter()
+    stops = await _distance_stops(db, trip_id)
+    index = {stop.id: i for i, stop in enumerate(stops)}
+    for stop_id in (start_stop_id, end_stop_id):
+        if stop_id is not None and stop_id not in index:
+            raise RouteError(f"Stop {stop_id} not found in this trip")
+    if start_stop_id is not None and start_stop_id == end_stop_id and len(stops) > 1:
+        raise RouteError("Start and end must be different stops")
+    unplaced = sorted({stop.city_name for stop in stops if stop.latitude is None or stop.longitude is None})
+    if unplaced:
+        raise RouteError(f"Cities without coordinates: {', '.join(unplaced)}")
+
+    distances = geo.distance_matrix_km([s.latitude for s in stops], [s.longitude for s in stops])
+    current_km = float(distances.diagonal(1).sum())
+    order, optimized_km = optimize_order(
+        distances,
+        start=None if start_stop_id is None else index[start_stop_id],
+        end=None if end_stop_id is None else index[end_stop_id],
+        time_budget_s=time_budget_ms / 1000,
+    )
+    # Keep the current order unless it breaks a pin or the new one is shorter
+    current = list(range(len(stops)))
+    pinned = (start_stop_id is None or index[start_stop_id] == 0) and (
+        end_stop_id is None or index[end_stop_id] == len(stops) - 1
+    )
+    if pinned and optimized_km >= current_km:
+        order, optimized_km = current, current_km
+
+    ordered = [stops[i].model_copy(update={"order_index": position}) for position, i in enumerate(order)]
+    changed = [] if order == current else [
+        {"id": stop.id, "order_index": stop.order_index}
+        for stop, i in zip(ordered, order) if stop.order_index != stops[i].order_index
+    ]
+    if apply and changed:
+        await db.execute(update(TripStop), changed)
+        # The feed lists cities in itinerary order
+        await feed_service.refresh_trip(db, trip_id)
+        await db.commit()
+    return RouteOptimization(
+        trip_id=trip_id,
+        applied=apply,
+        stops=ordered,
+        current_km=round(current_km, 3),
+        optimized_km=round(optimized_km, 3),
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+
+async def apply_batch(
+    db: AsyncSession, trip_id: UUID, operations: List[ItineraryOperation]
+) -> Tuple[bool, List[OperationResult]]:
+    """
+    Apply ``operations`` to a trip's itinerary in one transaction.
+
+    Returns ``(applied, results)``. If any operation is invalid nothing is
+    written: the invalid ones are reported as errors and the rest as skipped.
+    Activity dates and times are checked against the itinerary as the whole
+    batch leaves it, so operations may be given in any order.
+    """
+    rows = await db.execute(
+        select(
+            TripStop.id, TripStop.order_index, TripStop.start_date, TripStop.end_date,
+            StopActivity.id.label("stop_activity_id"), StopActivity.activity_id,
+            StopActivity.scheduled_date, StopActivity.scheduled_time,
+        )
+        .outerjoin(StopActivity, StopActivity.stop_id == TripStop.id)
+        .where(TripStop.trip_id == trip_id)
+    )
+    stops: Dict[UUID, int] = {}  # live stop -> order_index
+    stop_dates: Dict[UUID, Tuple[Optional[date], Optional[date]]] = {}  # live stop -> (start, end)
+    slots: Dict[UUID, _Slot] = {}  # live stop activity -> its stop, activity, date and time
+    for row in rows:
+        stops[row.id] = row.order_index or 0
+        stop_dates[row.id] = (row.start_date, row.end_date)
+        if row.stop_activity_id is not None:
+            slots[row.stop_activity_id] = _Slot(
+                row.id, row.activity_id, row.scheduled_date, row.scheduled_time
+            )
+
+    cities = await _existing(db, City, {o.city_id for o in operations if isinstance(o, AddStopOperation)})
+    catalog_ids = {slot.activity_id for slot in slots.values()}
+    catalog_ids.update(o.activity_id for o in operations if isinstance(o, AddActivityOperation))
+    catalog: Dict[UUID, Tuple[str, Optional[int]]] = {}  # activity -> (name, duration)
+    if catalog_ids:
+        result = await db.execute(
+            select(Activity.id, Activity.name, Activity.duration_minutes).where(Activity.id.in_(catalog_ids))
+        )
+        catalog = {row.id: (row.name, row.duration_minutes) for row in result}
+
+    refs: Dict[str, UUID] = {}
+    new_stops: Dict[UUID, dict] = {}
+    new_activities: Dict[UUID, dict] = {}
+    stop_updates: Dict[UUID, dict] = {}
+    activity_updates: Dict[UUID, dict] = {}
+    deleted_stops: Set[UUID] = set()
+    deleted_activities: Set[UUID] = set()
+    # Stop activities whose date or time must be checked -> index of the
+    # operation that last placed them
+    checks: Dict[UUID, int] = {}
+
+    def change(new_rows: Dict[UUID, dict], updates: Dict[UUID, dict], id: UUID, values: dict) -> None:
+        if id in new_rows:
+            new_rows[id].update(values)
+        else:
+            updates.setdefault(id, {"id": id}).update(values)
+
+    def drop_activity(id: UUID) -> None:
+        del slots[id]
+        checks.pop(id, None)
+        activity_updates.pop(id, None)
+        if new_activities.pop(id, None) is None:
+            deleted_activities.add(id)
+
+    results: List[OperationResult] = []
+    for index, operation in enumerate(operations):
+        error = None
+        affected = None
+        ref = getattr(operation, "ref", None)
+        if ref is not None and ref in refs:
+            error = f"Duplicate ref {ref!r}"
+
+        elif isinstance(operation, AddStopOperation):
+            if operation.city_id not in cities:
+                error = "City not found"
+            else:
+                affected = uuid4()
+                order_index = operation.order_index
+                if order_index is None:
+                    order_index = max(stops.values(), default=-1) + 1
+                new_stops[affected] = {
+                    "id": affected,
+                    "trip_id": trip_id,
+                    "city_id": operation.city_id,
+                    "order_index": order_index,
+                    "start_date": operation.start_date,
+                    "end_date": operation.end_date,
+                }
+                stops[affected] = order_index
+                stop_dates[affected] = (operation.start_date, operation.end_date)
+
+        elif isinstance(operation, RemoveStopOperation):
+            affected = _resolve(operation.stop, refs)
+            if affected not in stops:
+                error = "Stop not found in this trip"
+            else:
+                for stop_activity_id, slot in list(slots.items()):
+                    if slot.stop_id == affected:
+                        drop_activity(stop_activity_id)
+                del stops[affected]
+                del stop_dates[affected]
+                stop_updates.pop(affected, None)
+                if new_stops.pop(affected, None) is None:
+                    deleted_stops.add(affected)
+
+        elif isinstance(operation, MoveStopOperation):
+            affected = _resolve(operation.stop, refs)
+            if affected not in stops:
+                error = "Stop not found in this trip"
+            else:
+                values = {"order_index": operation.order_index}
+                for field in ("start_date", "end_date"):
+                    if field in operation.model_fields_set:
+                        values[field] = getattr(operation, field)
+                change(new_stops, stop_updates, affected, values)
+                stops[affected] = operation.order_index
+                if "start_date" in values or "end_date" in values:
+                    start_date, end_date = stop_dates[affected]
+                    stop_dates[affected] = (values.get("start_date", start_date), values.get("end_date", end_date))
+                    # Its activities' dates must still fall within the stop
+                    for stop_activity_id, slot in slots.items():
+                        if slot.stop_id == affected:
+                            checks[stop_activity_id] = index
+
+        elif isinstance(operation, AddActivityOperation):
+            stop_id = _resolve(operation.stop, refs)
+            if stop_id not in stops:
+                error = "Stop not found in this trip"
+            elif operation.activity_id not in catalog:
+                error = "Activity not found"
+            else:
+                affected = uuid4()
+                new_activities[affected] = {
+                    "id": affected,
+                    "stop_id": stop_id,
+                    "activity_id": operation.activity_id,
+                    "scheduled_date": operation.scheduled_date,
+                    "scheduled_time": operation.scheduled_time,
+                    "notes": operation.notes,
+                }
+                slots[affected] = _Slot(stop_id, operation.activity_id, operation.scheduled_date, operation.scheduled_time)
+                checks[affected] = index
+
+        elif isinstance(operation, RemoveActivityOperation):
+            affected = _resolve(operation.stop_activity, refs)
+            if affected not in slots:
+                error = "Stop activity not found in this trip"
+            else:
+                drop_activity(affected)
+
+        elif isinstance(operation, ScheduleActivityOperation):
+            affected = _resolve(operation.stop_activity, refs)
+            stop_id = _resolve(operation.stop, refs)
+            if affected not in slots:
+                error = "Stop activity not found in this trip"
+            elif operation.stop is not None and stop_id not in stops:
+                error = "Stop not found in this trip"
+            else:
+                slot = slots[affected]
+                values = {
+                    field: getattr(operation, field)
+                    for field in ("scheduled_date", "scheduled_time", "notes")
+                    if field in operation.model_fields_set
+                }
+                if stop_id is not None and stop_id != slot.stop_id:
+                    values["stop_id"] = slot.stop_id = stop_id
+                    # A date on the old stop means nothing on the new one
+                    values.setdefault("scheduled_date", None)
+                slot.scheduled_date = values.get("scheduled_date", slot.scheduled_date)
+                slot.scheduled_time = values.get("scheduled_time", slot.scheduled_time)
+                if values.keys() & {"stop_id", "scheduled_date", "scheduled_time"}:
+                    checks[affected] = index
+                if values:
+                    change(new_activities, activity_updates, affected, values)
+
+        if error is None and ref is not None:
+            refs[ref] = affected
+        results.append(OperationResult(
+            index=index,
+            op=operation.op,
+            status="error" if error else "ok",
+            id=None if error else affected,
+            detail=error,
+        ))
+
+    if not any(result.status == "error" for result in results):
+        for index, error in _slot_errors(checks, slots, stop_dates, catalog).items():
+            results[index].status, results[index].id, results[index].detail = "error", None, error
+
+    if any(result.status == "error" for result in results):
+        for result in results:
+            if result.status == "ok":
+                result.status, result.id, result.detail = "skipped", None, "Batch not applied"
+        return False, results
+
+    # New stops go in first so moved activities can point at them; deletes
+    # follow the updates so activities moved off a removed stop survive it.
+    if new_stops:
+        await db.execute(insert(TripStop), list(new_stops.values()))
+    if stop_updates:
+        await db.execute(update(TripStop), list(stop_updates.values()))
+    if activity_updates:
+        await db.execute(update(StopActivity), list(activity_updates.values()))
+    if deleted_activities or deleted_stops:
+        await db.execute(
+            delete(StopActivity).where(
+                or_(StopActivity.id.in_(deleted_activities), StopActivity.stop_id.in_(deleted_stops))
+            )
+        )
+    if deleted_stops:
+        await db.execute(delete(TripStop).where(TripStop.id.in_(deleted_stops)))
+    if new_activities:
+        await db.execute(insert(StopActivity), list(new_activities.values()))
+    await budget_service.rebuild_trip_rollup(db, trip_id)
+    await feed_service.refresh_trip(db, trip_id)
+    await db.commit()
+    return True, results
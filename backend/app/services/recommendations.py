@@ -0,0 +1,103 @@
+"""
+In-memory recommendations produced by the ``app.recommender`` batch job.
+
+The job's ``.npz`` file is loaded whole at startup: fixed-width arrays of
+neighbour row numbers and scores plus a dict from item id to row, so a lookup
+is a dict hit and a slice. A periodic check reloads the file when the job
+has replaced it.
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TopK:
+    """Precomputed neighbours of one kind of item."""
+
+    def __init__(self, ids: np.ndarray, neighbours: np.ndarray, scores: np.ndarray):
+        # Neighbour ids are rebuilt from the raw bytes on lookup rather than
+        # kept as a second set of UUID objects
+        self._raw = ids.tobytes()
+        self._rows: Dict[UUID, int] = {
+            UUID(bytes=self._raw[i:i + 16]): row for row, i in enumerate(range(0, len(self._raw), 16))
+        }
+        self._neighbours = neighbours
+        self._scores = scores
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, id: UUID, limit: int) -> List[Tuple[UUID, float]]:
+        row = self._rows.get(id)
+        if row is None:
+            return []
+        neighbours = self._neighbours[row, :limit]
+        scores = self._scores[row, :limit]
+        return [
+            (UUID(bytes=self._raw[16 * neighbour:16 * neighbour + 16]), round(score, 4))
+            for neighbour, score in zip(neighbours.tolist(), scores.tolist())
+            if neighbour >= 0
+        ]
+
+
+_EMPTY = TopK(np.empty((0, 16), dtype=np.uint8), np.empty((0, 0), dtype=np.int32), np.empty((0, 0), dtype=np.float32))
+
+_cities = _EMPTY
+_activities = _EMPTY
+_loaded_mtime: Optional[float] = None
+
+
+def similar_cities(city_id: UUID, limit: int = 10) -> List[Tuple[UUID, float]]:
+    return _cities.get(city_id, limit)
+
+
+def also_added(activity_id: UUID, limit: int = 10) -> List[Tuple[UUID, float]]:
+    return _activities.get(activity_id, limit)
+
+
+def _read(path: str) -> Tuple[TopK, TopK, float]:
+    mtime = os.path.getmtime(path)
+    with np.load(path) as data:
+        cities = TopK(data["city_ids"], data["city_neighbours"], data["city_scores"])
+        activities = TopK(data["activity_ids"], data["activity_neighbours"], data["activity_scores"])
+    return cities, activities, mtime
+
+
+def _swap(cities: TopK, activities: TopK, mtime: float) -> None:
+    global _cities, _activities, _loaded_mtime
+    _cities, _activities, _loaded_mtime = cities, activities, mtime
+    logger.info("Recommendations loaded for %d cities and %d activities", len(cities), len(activities))
+
+
+def load(path: str) -> None:
+    _swap(*_read(path))
+
+
+async def reload_if_changed() -> None:
+    """
+    Reload the file if the job has replaced it. Reading and indexing it runs
+    in a thread so requests are served meanwhile; lookups keep using the
+    previous data until the new data is swapped in on the event loop.
+    """
+    path = settings.RECOMMENDATIONS_PATH
+    if not os.path.exists(path):
+        return
+    if os.path.getmtime(path) != _loaded_mtime:
+        _swap(*await asyncio.to_thread(_read, path))
+
+
+async def refresh_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.RECOMMENDATIONS_REFRESH_SECONDS)
+        try:
+            await reload_if_changed()
+        except Exception:
+            logger.exception("Recommendations reload failed")
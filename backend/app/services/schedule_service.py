@@ -0,0 +1,233 @@
+"""
+Day-by-day activity scheduling for a stop.
+
+Activities that already have a time are fixed. A timed activity without a
+date is on the stop's first day. The rest are packed first-fit, longest
+first, into the earliest free slot inside the daily window on each of the
+stop's days in turn. Each day's booked time is an ``IntervalTree``, so
+checking whether a slot is free is O(log n) instead of a rescan of the day.
+"""
+from datetime import date, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import case, extract, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.intervals import IntervalTree
+from app.models.activity import Activity
+from app.models.trip import StopActivity, TripStop
+from app.schemas.itinerary import ScheduleDay, ScheduledActivity, ScheduleOverlap, StopSchedule
+from app.services import budget_service
+
+
+class ScheduleError(ValueError):
+    pass
+
+
+class ScheduleConflict(ScheduleError):
+    pass
+
+
+def duration_minutes(minutes: Optional[int]) -> int:
+    return minutes if minutes and minutes > 0 else settings.SCHEDULE_DEFAULT_DURATION_MINUTES
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def _time(minutes: int) -> time:
+    return time(minutes // 60, minutes % 60)
+
+
+def stop_days(start: Optional[date], end: Optional[date]) -> List[Optional[date]]:
+    """The stop's days; a stop without dates has a single undated day."""
+    if start is None:
+        return [None]
+    if end is None or end < start:
+        end = start
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def date_error(days: List[Optional[date]], scheduled_date: Optional[date]) -> Optional[str]:
+    """Why ``scheduled_date`` cannot be used on a stop with these ``days``, or None."""
+    if scheduled_date is not None and days[0] is not None and not days[0] <= scheduled_date <= days[-1]:
+        return f"{scheduled_date} is outside the stop's dates ({days[0]} to {days[-1]})"
+    return None
+
+
+def conflict_error(name: str, start: time, minutes: int) -> str:
+    return f"Overlaps {name} at {start:%H:%M} ({minutes} min)"
+
+
+def first_fit(tree: IntervalTree, window_start: int, window_end: int, minutes: int) -> Optional[int]:
+    """Earliest start in the window where ``minutes`` fit without overlapping ``tree``."""
+    start = window_start
+    while start + minutes <= window_end:
+        booked = tree.find_overlap(start, start + minutes)
+        if booked is None:
+            return start
+        start = booked[1]
+    return None
+
+
+async def get_schedule(
+    db: AsyncSession,
+    stop_id: UUID,
+    day_start: Optional[time] = None,
+    day_end: Optional[time] = None,
+    apply: bool = False,
+) -> Optional[StopSchedule]:
+    """
+    Lay out the stop's activities across its days. With ``apply`` the dates
+    and times given to unscheduled activities are saved; fixed activities
+    are never moved, and overlaps between them are only reported.
+    """
+    window_start = _minutes(day_start or settings.SCHEDULE_DAY_START)
+    window_end = _minutes(day_end or settings.SCHEDULE_DAY_END)
+    if window_end <= window_start:
+        raise ScheduleError("The day must end after it starts")
+
+    stop = (await db.execute(
+        select(TripStop.trip_id, TripStop.start_date, TripStop.end_date).where(TripStop.id == stop_id)
+    )).first()
+    if stop is None:
+        return None
+    rows = (await db.execute(
+        select(
+            StopActivity.id, StopActivity.activity_id, Activity.name, Activity.duration_minutes,
+            StopActivity.scheduled_date, StopActivity.scheduled_time,
+        )
+        .join(Activity, Activity.id == StopActivity.activity_id)
+        .where(StopActivity.stop_id == stop_id)
+        .order_by(StopActivity.scheduled_date, StopActivity.scheduled_time, StopActivity.id)
+    )).all()
+
+    days = stop_days(stop.start_date, stop.end_date)
+    trees: Dict[Optional[date], IntervalTree] = {day: IntervalTree() for day in days}
+    placed: Dict[Optional[date], List[ScheduledActivity]] = {day: [] for day in days}
+    overlaps: List[ScheduleOverlap] = []
+
+    flexible = []
+    for row in rows:
+        if row.scheduled_time is None:
+            flexible.append(row)
+            continue
+        # Fixed activities dated outside the stop still occupy their own day
+        day = row.scheduled_date or days[0]
+        tree = trees.setdefault(day, IntervalTree())
+        start = _minutes(row.scheduled_time)
+        minutes = duration_minutes(row.duration_minutes)
+        booked = tree.find_overlap(start, start + minutes)
+        if booked is not None:
+            overlaps.append(ScheduleOverlap(id=row.id, conflicts_with=booked[2], day=day))
+        tree.add(start, start + minutes, row.id)
+        placed.setdefault(day, []).append(ScheduledActivity(
+            id=row.id, activity_id=row.activity_id, name=row.name,
+            start=row.scheduled_time, duration_minutes=minutes, fixed=True,
+        ))
+
+    updates = []
+    unplaced = []
+    for row in sorted(flexible, key=lambda r: -duration_minutes(r.duration_minutes)):
+        minutes = duration_minutes(row.duration_minutes)
+        slot: Optional[Tuple[Optional[date], int]] = None
+        for day in days:
+            start = first_fit(trees[day], window_start, window_end, minutes)
+            if start is not None:
+                slot = day, start
+                break
+        if slot is None:
+            unplaced.append(row.id)
+            continue
+        day, start = slot
+        trees[day].add(start, start + minutes, row.id)
+        placed[day].append(ScheduledActivity(
+            id=row.id, activity_id=row.activity_id, name=row.name,
+            start=_time(start), duration_minutes=minutes, fixed=False,
+        ))
+        updates.append({"id": row.id, "scheduled_date": day, "scheduled_time": _time(start)})
+
+    if apply and updates:
+        await db.execute(update(StopActivity), updates)
+        # Planned costs are bucketed by the day an activity is scheduled on
+        await budget_service.rebuild_trip_rollup(db, stop.trip_id)
+        await db.commit()
+    return StopSchedule(
+        stop_id=stop_id,
+        applied=apply,
+        days=[
+            ScheduleDay(day=day, activities=sorted(activities, key=lambda a: a.start))
+            for day, activities in sorted(placed.items(), key=lambda item: item[0] or date.min)
+        ],
+        unplaced=unplaced,
+        overlaps=overlaps,
+    )
+
+
+async def check_slot(
+    db: AsyncSession,
+    stop_id: UUID,
+    activity_id: UUID,
+    scheduled_date: Optional[date],
+    scheduled_time: Optional[time],
+    exclude: Optional[UUID] = None,
+) -> None:
+    """
+    Raise ``ScheduleError`` if ``scheduled_date`` is outside the stop's dates,
+    or ``ScheduleConflict`` if the activity at ``scheduled_time`` would overlap
+    another timed activity of the stop on the same day. Callers lock the trip
+    first so that concurrent edits cannot book the same slot.
+    """
+    if scheduled_date is None and scheduled_time is None:
+        return
+    stop = (await db.execute(
+        select(TripStop.start_date, TripStop.end_date).where(TripStop.id == stop_id)
+    )).first()
+    if stop is None:
+        return
+    days = stop_days(stop.start_date, stop.end_date)
+    error = date_error(days, scheduled_date)
+    if error:
+        raise ScheduleError(error)
+    if scheduled_time is None:
+        return
+
+    day = scheduled_date or days[0]
+    start = _minutes(scheduled_time)
+    end = start + duration_minutes(await db.scalar(select(Activity.duration_minutes).where(Activity.id == activity_id)))
+    # One range scan of ix_stop_activities_stop_id_scheduled_date_time over
+    # the day's activities starting before this one ends, latest first, kept
+    # if they end after it starts. Undated ones are on the stop's first day,
+    # which is read as a second range.
+    if day is None:
+        on_day = StopActivity.scheduled_date.is_(None)
+    elif day == stop.start_date:
+        on_day = or_(StopActivity.scheduled_date == day, StopActivity.scheduled_date.is_(None))
+    else:
+        on_day = StopActivity.scheduled_date == day
+    booked_minutes = case(
+        (Activity.duration_minutes > 0, Activity.duration_minutes),
+        else_=settings.SCHEDULE_DEFAULT_DURATION_MINUTES,
+    )
+    conditions = [
+        StopActivity.stop_id == stop_id,
+        on_day,
+        StopActivity.scheduled_time.isnot(None),
+        extract("epoch", StopActivity.scheduled_time) / 60 + booked_minutes > start,
+    ]
+    if end < 24 * 60:
+        conditions.append(StopActivity.scheduled_time < _time(end))
+    if exclude is not None:
+        conditions.append(StopActivity.id != exclude)
+    row = (await db.execute(
+        select(Activity.name, Activity.duration_minutes, StopActivity.scheduled_time)
+        .join(Activity, Activity.id == StopActivity.activity_id)
+        .where(*conditions)
+        .order_by(StopActivity.scheduled_time.desc())
+        .limit(1)
+    )).first()
+    if row is not None:
+        raise ScheduleConflict(conflict_error(row.name, row.scheduled_time, duration_minutes(row.duration_minutes)))
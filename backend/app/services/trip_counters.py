@@ -0,0 +1,194 @@
+"""
+Buffered view and copy counters for trips.
+
+Writing ``view_count = view_count + 1`` on every shared-trip view would make
+all the views of a popular trip queue on one row lock. Instead increments
+are summed in memory per trip and a background task writes them as one
+batched upsert into ``trip_stats`` (and the trip's feed row) every
+``COUNTER_FLUSH_SECONDS``, or as soon as ``COUNTER_FLUSH_MAX_TRIPS`` trips
+have pending counts. Each flush takes a row lock once per trip instead of
+once per view, and writes trips in id order so flushes from several workers
+take their ``trip_stats`` locks in the same order.
+
+A crash loses at most the counts since the last flush. A failed flush puts
+its counts back to be retried with the next one. Reads add this worker's
+pending counts to the stored ones, so a view shows up immediately for the
+worker that served it and within one flush interval everywhere else.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core import metrics
+from app.database import AsyncSessionLocal
+from app.models.community import TripStats
+from app.schemas.trip import TripCounts
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FLUSHES = metrics.Counter(
+    "trip_counter_flushes_total",
+    "Batched writes of buffered trip view/copy counts by result (ok/error).",
+    ["result"],
+)
+COUNTER_PENDING_TRIPS = metrics.Gauge(
+    "trip_counter_pending_trips",
+    "Trips with view/copy counts buffered and not yet written.",
+)
+
+Counts = Dict[UUID, List[int]]  # trip id -> [views, copies]
+
+
+class CounterBuffer:
+    """
+    Per-trip increments waiting to be written. Only touched from the event
+    loop thread, so adding is a dict update without locks.
+    """
+
+    def __init__(self, max_trips: int):
+        self.max_trips = max_trips
+        self.full = asyncio.Event()
+        self._pending: Counts = {}
+        self._in_flight: Counts = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, trip_id: UUID, views: int = 0, copies: int = 0) -> None:
+        counts = self._pending.get(trip_id)
+        if counts is None:
+            counts = self._pending[trip_id] = [0, 0]
+            if len(self._pending) >= self.max_trips:
+                self.full.set()
+        counts[0] += views
+        counts[1] += copies
+
+    def pending(self, trip_id: UUID) -> Tuple[int, int]:
+        """Counts not yet written, including those of a flush in progress."""
+        views, copies = self._pending.get(trip_id, (0, 0))
+        flushing = self._in_flight.get(trip_id)
+        if flushing is not None:
+            views, copies = views + flushing[0], copies + flushing[1]
+        return views, copies
+
+    def drain(self) -> Counts:
+        """Hand the pending counts to a flush; call ``done`` or ``restore`` after it."""
+        self._in_flight, self._pending = self._pending, {}
+        self.full.clear()
+        return self._in_flight
+
+    def done(self) -> None:
+        self._in_flight = {}
+
+    def restore(self) -> None:
+        """Put the counts of a failed flush back to be written with the next one."""
+        for trip_id, (views, copies) in self._in_flight.items():
+            self.add(trip_id, views, copies)
+        self._in_flight = {}
+
+
+# Adds the batch to trip_stats and copies the new totals to the feed rows.
+# Counts for trips deleted since they were buffered are dropped.
+_FLUSH = text("""
+WITH delta (trip_id, views, copies) AS (
+    SELECT * FROM unnest(CAST(:trip_ids AS uuid[]), CAST(:views AS bigint[]), CAST(:copies AS bigint[]))
+),
+stats AS (
+    INSERT INTO trip_stats AS s (trip_id, view_count, copy_count)
+    SELECT d.trip_id, d.views, d.copies
+    FROM delta d
+    JOIN trips t ON t.id = d.trip_id
+    ORDER BY d.trip_id
+    ON CONFLICT (trip_id) DO UPDATE SET
+        view_count = s.view_count + excluded.view_count,
+        copy_count = s.copy_count + excluded.copy_count
+    RETURNING s.trip_id, s.view_count, s.copy_count
+)
+UPDATE trip_feed f
+SET view_count = stats.view_count,
+    copy_count = stats.copy_count,
+    popularity = stats.view_count + :copy_weight * stats.copy_count
+FROM stats
+WHERE f.trip_id = stats.trip_id
+""")
+
+_buffer = CounterBuffer(settings.COUNTER_FLUSH_MAX_TRIPS)
+_flush_lock = asyncio.Lock()
+
+
+def record_view(trip_id: UUID) -> None:
+    _buffer.add(trip_id, views=1)
+    COUNTER_PENDING_TRIPS.set(len(_buffer))
+
+
+def record_copy(trip_id: UUID) -> None:
+    _buffer.add(trip_id, copies=1)
+    COUNTER_PENDING_TRIPS.set(len(_buffer))
+
+
+def pending(trip_id: UUID) -> Tuple[int, int]:
+    """``(views, copies)`` counted by this worker and not yet written."""
+    return _buffer.pending(trip_id)
+
+
+async def get_counts(db: AsyncSession, trip_id: UUID) -> TripCounts:
+    """Stored counts plus the ones this worker has not written yet."""
+    stored = (await db.execute(
+        select(TripStats.view_count, TripStats.copy_count).where(TripStats.trip_id == trip_id)
+    )).first()
+    views, copies = pending(trip_id)
+    if stored is not None:
+        views, copies = views + stored.view_count, copies + stored.copy_count
+    return TripCounts(trip_id=trip_id, view_count=views, copy_count=copies)
+
+
+async def flush() -> int:
+    """Write the buffered counts in one statement; returns the number of trips written."""
+    async with _flush_lock:
+        batch = _buffer.drain()
+        COUNTER_PENDING_TRIPS.set(0)
+        if not batch:
+            return 0
+        trip_ids = sorted(batch)
+        params = {
+            "trip_ids": trip_ids,
+            "views": [batch[trip_id][0] for trip_id in trip_ids],
+            "copies": [batch[trip_id][1] for trip_id in trip_ids],
+            "copy_weight": settings.POPULARITY_COPY_WEIGHT,
+        }
+        committed = False
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(_FLUSH, params)
+                await db.commit()
+                # Written: a cancellation while the session closes must not
+                # put the counts back to be added a second time
+                _buffer.done()
+                committed = True
+                COUNTER_FLUSHES.inc(result="ok")
+        except BaseException:
+            if not committed:
+                _buffer.restore()
+                COUNTER_PENDING_TRIPS.set(len(_buffer))
+                COUNTER_FLUSHES.inc(result="error")
+            raise
+        return len(trip_ids)
+
+
+async def flush_periodically() -> None:
+    while True:
+        try:
+            await asyncio.wait_for(_buffer.full.wait(), timeout=settings.COUNTER_FLUSH_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await flush()
+        except Exception:
+            logger.exception("Trip counter flush failed")
+            # The counts were put back, possibly leaving the buffer full
+            await asyncio.sleep(settings.COUNTER_FLUSH_SECONDS)
@@ -1,49 +1,113 @@
-from typing import List, Optional
-from uuid import UUID
+from typing import List, Optional, Tuple
+from uuid import UUID, uuid4
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, text, func, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.orm import selectinload
 
-from app.models.trip import Trip, TripStop, TripExpense
+from app.core import pagination
+from app.models.trip import Trip, TripStop, StopActivity, TripExpense
 from app.models.city import City
 from app.models.activity import Activity
 from app.schemas.trip import TripCreate, TripUpdate
+from app.services import budget_service, feed_service, trip_counters
 
-async def get_user_trips(db: AsyncSession, user_id: UUID, skip: int = 0, limit: int = 100) -> List[Trip]:
+# Served by ix_trips_user_id_start_date_id; undated trips sort last
+TRIP_LIST_KEYS = [(Trip.start_date, False, True), (Trip.id, False, False)]
+
+async def get_user_trips(
+    db: AsyncSession, user_id: UUID, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> Tuple[List[Trip], Optional[str]]:
     stmt = (
         select(Trip)
         .where(Trip.user_id == user_id)
-        .offset(skip)
-        .limit(limit)
-        .order_by(Trip.start_date.asc())
         .options(
             selectinload(Trip.stops).selectinload(TripStop.city),
+            selectinload(Trip.stops).selectinload(TripStop.activities).selectinload(StopActivity.activity),
             selectinload(Trip.expenses)
         )
     )
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    result = await db.execute(_paginate(stmt, skip, limit, cursor))
+    trips = result.scalars().all()
+    next_cursor = pagination.next_cursor(trips, limit, lambda trip: [trip.start_date, trip.id])
+    return trips[:limit], next_cursor
 
-async def get_trip(db: AsyncSession, trip_id: UUID) -> Optional[Trip]:
+def _paginate(stmt, skip: int, limit: int, cursor: Optional[str]):
+    stmt = stmt.order_by(*pagination.order_by(TRIP_LIST_KEYS)).limit(limit + 1)
+    if cursor:
+        return stmt.where(
+            pagination.keyset_predicate(TRIP_LIST_KEYS, pagination.decode_cursor(cursor, len(TRIP_LIST_KEYS)))
+        )
+    if skip:
+        return stmt.offset(skip)
+    return stmt
+
+async def get_user_trip_summaries(
+    db: AsyncSession, user_id: UUID, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    List trips as flat summaries: trip columns plus per-trip aggregates over
+    stops and expenses, computed by PostgreSQL in one statement.
+    """
+    stops = (
+        select(
+            func.count(TripStop.id).label("stop_count"),
+            func.array_agg(aggregate_order_by(City.name, TripStop.order_index)).label("city_names"),
+            func.min(TripStop.start_date).label("first_date"),
+            func.max(TripStop.end_date).label("last_date"),
+        )
+        .select_from(TripStop)
+        .join(City, City.id == TripStop.city_id)
+        .where(TripStop.trip_id == Trip.id)
+        .lateral("stop_summary")
+    )
+    by_category = (
+        select(TripExpense.category, func.sum(TripExpense.amount).label("total"))
+        .where(TripExpense.trip_id == Trip.id)
+        .group_by(TripExpense.category)
+        .correlate(Trip)
+        .subquery("by_category")
+    )
+    expenses = (
+        select(
+            func.array_agg(by_category.c.category).label("categories"),
+            func.array_agg(by_category.c.total).label("totals"),
+        )
+        .lateral("expense_summary")
+    )
     stmt = (
-        select(Trip)
-        .where(Trip.id == trip_id)
-        .options(
-            selectinload(Trip.stops).selectinload(TripStop.city),
-            selectinload(Trip.stops).selectinload(TripStop.activities).selectinload(stop_activity_rel => stop_activity_rel.activity), # Correct way to load nested?
-             # Actually, stop.activities -> StopActivity. activity field in StopActivity schema uses StopActivity.activity relationship.
-             # So we need to load Trip -> stops -> activities (StopActivity) -> activity (Activity)
+        select(
+            Trip.id, Trip.user_id, Trip.name, Trip.description, Trip.start_date, Trip.end_date,
+            Trip.cover_image, Trip.status, Trip.is_public, Trip.share_token, Trip.estimated_budget,
+            stops.c.stop_count, stops.c.city_names, stops.c.first_date, stops.c.last_date,
+            expenses.c.categories, expenses.c.totals,
         )
+        .select_from(Trip)
+        .outerjoin(stops, true())
+        .outerjoin(expenses, true())
+        .where(Trip.user_id == user_id)
     )
+    result = await db.execute(_paginate(stmt, skip, limit, cursor))
+    rows = result.all()
+
+    summaries = []
+    for row in rows[:limit]:
+        summary = dict(row._mapping)
+        categories, totals = summary.pop("categories"), summary.pop("totals")
+        summary["city_names"] = summary["city_names"] or []
+        summary["expense_totals"] = dict(zip(categories or [], totals or []))
+        summaries.append(summary)
+    next_cursor = pagination.next_cursor(rows, limit, lambda row: [row.start_date, row.id])
+    return summaries, next_cursor
+
+async def get_trip(db: AsyncSession, trip_id: UUID) -> Optional[Trip]:
     # The relationship chain is: Trip.stops -> TripStop.activities -> StopActivity.activity
-    # SQLAlchemy syntax: selectinload(Trip.stops).selectinload(TripStop.activities).selectinload(StopActivity.activity)
-    
     stmt = (
         select(Trip)
         .where(Trip.id == trip_id)
         .options(
             selectinload(Trip.stops).selectinload(TripStop.city),
-            selectinload(Trip.stops).selectinload(TripStop.activities).selectinload("activity"), # Use string name if class not imported or circular
+            selectinload(Trip.stops).selectinload(TripStop.activities).selectinload(StopActivity.activity),
             selectinload(Trip.expenses)
         )
     )
@@ -51,12 +115,160 @@ async def get_trip(db: AsyncSession, trip_id: UUID) -> Optional[Trip]:
     result = await db.execute(stmt)
     return result.scalars().first()
 
+# The whole TripResponse document built by PostgreSQL in one statement. Keys
+# and value formats mirror the pydantic serialisation of TripResponse:
+# numerics are rendered as text because pydantic emits Decimal as a string.
+_TRIP_DOCUMENT_SQL = """
+SELECT t.id, t.user_id, t.is_public, json_build_object(
+    'name', t.name,
+    'description', t.description,
+    'start_date', t.start_date,
+    'end_date', t.end_date,
+    'cover_image', t.cover_image,
+    'status', t.status,
+    'is_public', t.is_public,
+    'estimated_budget', t.estimated_budget::text,
+    'id', t.id,
+    'user_id', t.user_id,
+    'share_token', t.share_token,
+    'stops', coalesce((
+        SELECT json_agg(json_build_object(
+            'city_id', s.city_id,
+            'start_date', s.start_date,
+            'end_date', s.end_date,
+            'order_index', s.order_index,
+            'id', s.id,
+            'trip_id', s.trip_id,
+            'city', json_build_object(
+                'name', c.name,
+                'country', c.country,
+                'region', c.region,
+                'image_url', c.image_url,
+                'cost_index', c.cost_index,
+                'rating', c.rating,
+                'description', c.description,
+                'latitude', c.latitude,
+                'longitude', c.longitude,
+                'id', c.id
+            ),
+            'activities', coalesce((
+                SELECT json_agg(json_build_object(
+                    'activity_id', sa.activity_id,
+                    'scheduled_date', sa.scheduled_date,
+                    'scheduled_time', sa.scheduled_time,
+                    'notes', sa.notes,
+                    'id', sa.id,
+                    'stop_id', sa.stop_id,
+                    'activity', json_build_object(
+                        'name', a.name,
+                        'description', a.description,
+                        'image_url', a.image_url,
+                        'duration_minutes', a.duration_minutes,
+                        'cost', a.cost::text,
+                        'category', a.category,
+                        'id', a.id,
+                        'city_id', a.city_id
+                    )
+                ) ORDER BY sa.scheduled_date NULLS FIRST, sa.scheduled_time NULLS LAST, sa.id)
+                FROM stop_activities sa
+                JOIN activities a ON a.id = sa.activity_id
+                WHERE sa.stop_id = s.id
+            ), '[]'::json)
+        ) ORDER BY s.order_index, s.id)
+        FROM trip_stops s
+        JOIN cities c ON c.id = s.city_id
+        WHERE s.trip_id = t.id
+    ), '[]'::json),
+    'expenses', coalesce((
+        SELECT json_agg(json_build_object(
+            'category', e.category,
+            'amount', e.amount::text,
+            'notes', e.notes,
+            'stop_id', e.stop_id,
+            'spent_on', e.spent_on,
+            'id', e.id,
+            'trip_id', e.trip_id
+        ) ORDER BY e.id)
+        FROM trip_expenses e
+        WHERE e.trip_id = t.id
+    ), '[]'::json)
+)::text AS document
+FROM trips t
+WHERE {where}
+"""
+
+_TRIP_DOCUMENT_BY_ID = text(_TRIP_DOCUMENT_SQL.format(where="t.id = :trip_id"))
+_TRIP_DOCUMENT_BY_SHARE_TOKEN = text(_TRIP_DOCUMENT_SQL.format(where="t.share_token = :share_token"))
+
+
+async def get_trip_document(
+    db: AsyncSession, trip_id: Optional[UUID] = None, share_token: Optional[str] = None
+) -> Optional[Tuple[UUID, UUID, bool, str]]:
+    """
+    Load a trip as a ready-to-send TripResponse JSON document in a single
+    round trip, skipping ORM hydration and pydantic validation.
+
+    Returns ``(trip_id, user_id, is_public, document)``, the middle two for
+    the access check, or None.
+    """
+    if trip_id is not None:
+        result = await db.execute(_TRIP_DOCUMENT_BY_ID, {"trip_id": trip_id})
+    else:
+        result = await db.execute(_TRIP_DOCUMENT_BY_SHARE_TOKEN, {"share_token": share_token})
+    row = result.first()
+    if row is None:
+        return None
+    return row.id, row.user_id, row.is_public, row.document
+
+# Clones a trip's stops and their activities in one statement. Old stop ids
+# are mapped to fresh ones in a materialised CTE so each copied activity can
+# find its new stop; foreign keys are checked at the end of the statement.
+_COPY_TRIP = text("""
+WITH new_trip AS (
+    INSERT INTO trips (id, user_id, name, description, cover_image, estimated_budget, status, is_public)
+    SELECT :new_trip_id, :user_id, 'Copy of ' || name, description, cover_image, estimated_budget, 'draft', false
+    FROM trips
+    WHERE id = :source_id
+    RETURNING id
+),
+stop_map AS MATERIALIZED (
+    SELECT id AS old_id, gen_random_uuid() AS new_id, city_id, order_index
+    FROM trip_stops
+    WHERE trip_id = :source_id
+),
+new_stops AS (
+    INSERT INTO trip_stops (id, trip_id, city_id, order_index)
+    SELECT new_id, (SELECT id FROM new_trip), city_id, order_index
+    FROM stop_map
+)
+INSERT INTO stop_activities (id, stop_id, activity_id, notes)
+SELECT gen_random_uuid(), stop_map.new_id, sa.activity_id, sa.notes
+FROM stop_activities sa
+JOIN stop_map ON stop_map.old_id = sa.stop_id
+""")
+
+
+async def copy_trip(db: AsyncSession, source_id: UUID, user_id: UUID) -> UUID:
+    """
+    Copy a trip with its stops and activities into ``user_id``'s trips as a
+    draft, server-side in a single statement. Dates and scheduled times are
+    not carried over. Returns the new trip's id.
+    """
+    new_trip_id = uuid4()
+    await db.execute(_COPY_TRIP, {"new_trip_id": new_trip_id, "user_id": user_id, "source_id": source_id})
+    await budget_service.rebuild_trip_rollup(db, new_trip_id)
+    await db.commit()
+    trip_counters.record_copy(source_id)
+    return new_trip_id
+
 async def create_trip(db: AsyncSession, trip_in: TripCreate, user_id: UUID) -> Trip:
     db_trip = Trip(
         **trip_in.model_dump(),
         user_id=user_id
     )
     db.add(db_trip)
+    await db.flush()
+    await feed_service.refresh_trip(db, db_trip.id)
     await db.commit()
     await db.refresh(db_trip)
     return db_trip
@@ -71,6 +283,8 @@ async def update_trip(db: AsyncSession, trip_id: UUID, trip_in: TripUpdate) -> O
         setattr(trip, field, value)
         
     db.add(trip)
+    await db.flush()
+    await feed_service.refresh_trip(db, trip.id)
     await db.commit()
     await db.refresh(trip)
     return trip
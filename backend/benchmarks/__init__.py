@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for the GlobeTrotter backend.
+
+Run modules from the ``backend`` directory, e.g. ``python -m benchmarks.bench_search``.
+Benchmarks that need PostgreSQL use ``DATABASE_URL`` from the environment/.env.
+"""
@@ -0,0 +1,89 @@
+"""
+Memory footprint and autocomplete latency of the in-memory catalog index.
+
+Runs without a database: entries are synthetic.
+
+    python -m benchmarks.bench_catalog_index --entries 100000
+"""
+import argparse
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+
+from app.services.catalog_index import ACTIVITY, CITY, CatalogEntry, CatalogIndex
+
+SYLLABLES = ["ba", "ri", "to", "ky", "o", "par", "is", "ma", "dr", "id", "lon", "don", "ne", "w", "yo", "rk",
+             "ber", "lin", "ro", "me", "san", "ti", "ago", "cai", "ro", "del", "hi", "sy", "dn", "ey"]
+WORDS = ["Museum", "Tour", "Market", "Temple", "Garden", "Food", "Night", "River", "Cruise", "Class",
+         "Castle", "Beach", "Hike", "Gallery", "Palace", "Bazaar", "Tasting", "Walk", "Show", "Park"]
+# Plus a long tail of invented words so trigram postings resemble a real catalog
+RARE_WORDS = 2000
+
+QUERIES = ["p", "pa", "par", "pari", "musuem", "night cr", "riv", "tempel tour", "san ti", "xyzzy"]
+
+
+def synthetic_entries(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    vocabulary = WORDS + [
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize() for _ in range(RARE_WORDS)
+    ]
+    cities = max(count // 20, 1)
+    entries = []
+    city_names = []
+    for _ in range(cities):
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        city_names.append(name)
+        entries.append(CatalogEntry(uuid.uuid4(), CITY, name, "Country", round(rng.uniform(0, 5), 1)))
+    for _ in range(count - cities):
+        name = " ".join([rng.choice(WORDS)] + [rng.choice(vocabulary) for _ in range(rng.randint(1, 3))])
+        entries.append(CatalogEntry(uuid.uuid4(), ACTIVITY, f"{rng.choice(city_names)} {name}", None, 0.0))
+    return entries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    entries = synthetic_entries(args.entries)
+    started = time.perf_counter()
+    CatalogIndex.build(entries)
+    build_seconds = time.perf_counter() - started
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    index = CatalogIndex.build(entries)
+    gc.collect()
+    # Entry objects themselves were allocated before tracing started; this is the index overhead.
+    index_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    print(f"entries:            {len(index):,}")
+    print(f"build time:         {build_seconds:.2f}s")
+    print(f"index memory:       {index_bytes / 1024 / 1024:.1f} MiB "
+          f"({index_bytes / len(index) * 100_000 / 1024 / 1024:.1f} MiB per 100k entries)")
+    print()
+    print(f"{'query':<14} {'cold p50':>9} {'cold p99':>9} {'cached':>9} {'hits':>5}   (ms)")
+    for q in QUERIES:
+        samples = []
+        for _ in range(args.repeat):
+            index._results.clear()
+            t0 = time.perf_counter()
+            hits = index.search(q, limit=10)
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            index.search(q, limit=10)
+        cached = (time.perf_counter() - t0) * 1000 / args.repeat
+        print(f"{q:<14} {statistics.median(samples):>9.3f} {p99:>9.3f} {cached:>9.4f} {len(hits):>5}")
+
+
+if __name__ == "__main__":
+    main()
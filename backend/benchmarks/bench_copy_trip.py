@@ -0,0 +1,102 @@
+"""
+Trip cloning latency: the per-row ORM loop versus the set-based copy.
+
+Source trips of each size are created inside a transaction that is rolled
+back at the end. Round trips are counted from the engine's cursor events.
+
+    python -m benchmarks.bench_copy_trip --stops 5 30 100 --activities 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.database import engine
+from app.models.trip import StopActivity, Trip, TripStop
+from app.models.user import User
+from app.services import trip_service
+from benchmarks.bench_trip_document import create_synthetic_trip
+
+
+async def copy_orm(session: AsyncSession, trip_id: uuid.UUID, user_id: uuid.UUID) -> uuid.UUID:
+    """The previous community.copy_trip implementation."""
+    result = await session.execute(
+        select(Trip).where(Trip.id == trip_id).options(selectinload(Trip.stops).selectinload(TripStop.activities))
+    )
+    original = result.scalars().first()
+    new_trip = Trip(user_id=user_id, name=f"Copy of {original.name}", description=original.description,
+                    cover_image=original.cover_image, estimated_budget=original.estimated_budget, status="draft")
+    session.add(new_trip)
+    await session.flush()
+    for stop in original.stops:
+        new_stop = TripStop(trip_id=new_trip.id, city_id=stop.city_id, order_index=stop.order_index)
+        session.add(new_stop)
+        await session.flush()
+        for activity in stop.activities:
+            session.add(StopActivity(stop_id=new_stop.id, activity_id=activity.activity_id, notes=activity.notes))
+    await session.commit()
+    return new_trip.id
+
+
+async def copy_set_based(session: AsyncSession, trip_id: uuid.UUID, user_id: uuid.UUID) -> uuid.UUID:
+    result = await session.execute(select(Trip.user_id, Trip.is_public).where(Trip.id == trip_id))
+    result.first()
+    return await trip_service.copy_trip(session, trip_id, user_id=user_id)
+
+
+async def _time(session: AsyncSession, copy, trip_id: uuid.UUID, user_id: uuid.UUID, repeat: int, counter: list):
+    samples, statements = [], []
+    for _ in range(repeat):
+        session.expunge_all()
+        counter[0] = 0
+        started = time.perf_counter()
+        await copy(session, trip_id, user_id)
+        samples.append((time.perf_counter() - started) * 1000)
+        statements.append(counter[0])
+    return statistics.median(samples), statistics.median(statements)
+
+
+async def run(stop_counts, activities: int, repeat: int) -> None:
+    counter = [0]
+
+    def count(*args):
+        counter[0] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            session = AsyncSession(bind=conn, expire_on_commit=False)
+            user = User(email=f"bench-{uuid.uuid4().hex}@example.com", password_hash="x")
+            session.add(user)
+            await session.flush()
+
+            print(f"{'stops':>6} {'activities':>11} {'orm':>10} {'queries':>8} {'set-based':>10} {'queries':>8}")
+            for stops in stop_counts:
+                trip_id = await create_synthetic_trip(session, user, stops, activities)
+                orm, orm_queries = await _time(session, copy_orm, trip_id, user.id, repeat, counter)
+                sql, sql_queries = await _time(session, copy_set_based, trip_id, user.id, repeat, counter)
+                print(f"{stops:>6} {stops * activities:>11} {orm:>8.2f}ms {orm_queries:>8.0f} "
+                      f"{sql:>8.2f}ms {sql_queries:>8.0f}")
+        finally:
+            await trans.rollback()
+            event.remove(engine.sync_engine, "before_cursor_execute", count)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stops", type=int, nargs="+", default=[5, 30, 100])
+    parser.add_argument("--activities", type=int, default=5, help="activities per stop")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(sorted(args.stops), args.activities, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
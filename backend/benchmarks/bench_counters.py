@@ -0,0 +1,119 @@
+"""
+Concurrent view counting: one upsert per view versus the buffered counters.
+
+Synthetic trips are created for the run and deleted afterwards. Concurrent
+workers count views drawn with a skewed popularity, so a few "viral" trips
+take most of them. Each view is counted either directly, as its own
+``view_count + 1`` upsert and commit, or with ``trip_counters.record_view``
+while the background flush runs. Both runs check that the stored counts add
+up to the views made. Needs a migrated PostgreSQL.
+
+    python -m benchmarks.bench_counters --workers 50 --views 200 --trips 100
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from typing import List
+
+from sqlalchemy import delete, func, select, text
+
+from app.config import settings
+from app.database import AsyncSessionLocal, engine
+from app.models.community import TripStats
+from app.models.trip import Trip
+from app.models.user import User
+from app.services import trip_counters
+
+_DIRECT = text("""
+    INSERT INTO trip_stats AS s (trip_id, view_count) VALUES (:trip_id, 1)
+    ON CONFLICT (trip_id) DO UPDATE SET view_count = s.view_count + 1
+""")
+
+
+def _workload(trip_ids: List[uuid.UUID], workers: int, views: int, seed: int) -> List[List[uuid.UUID]]:
+    rng = random.Random(seed)
+    # Zipf-like popularity
+    weights = [1 / (rank + 1) ** 1.2 for rank in range(len(trip_ids))]
+    return [rng.choices(trip_ids, weights, k=views) for _ in range(workers)]
+
+
+async def _direct(views: List[uuid.UUID]) -> None:
+    for trip_id in views:
+        async with AsyncSessionLocal() as db:
+            await db.execute(_DIRECT, {"trip_id": trip_id})
+            await db.commit()
+
+
+async def _buffered(views: List[uuid.UUID]) -> None:
+    for trip_id in views:
+        trip_counters.record_view(trip_id)
+        # Let the other workers (and the flusher) run, as a request would
+        await asyncio.sleep(0)
+
+
+async def _stored_views(trip_ids: List[uuid.UUID]) -> int:
+    async with AsyncSessionLocal() as db:
+        total = await db.scalar(
+            select(func.coalesce(func.sum(TripStats.view_count), 0)).where(TripStats.trip_id.in_(trip_ids))
+        )
+        await db.execute(delete(TripStats).where(TripStats.trip_id.in_(trip_ids)))
+        await db.commit()
+    return int(total)
+
+
+async def _run(label: str, count, workload: List[List[uuid.UUID]], trip_ids: List[uuid.UUID]) -> None:
+    flushes = trip_counters.COUNTER_FLUSHES.value(result="ok")
+    flusher = asyncio.create_task(trip_counters.flush_periodically()) if count is _buffered else None
+    started = time.perf_counter()
+    await asyncio.gather(*(count(views) for views in workload))
+    if flusher is not None:
+        flusher.cancel()
+        await asyncio.gather(flusher, return_exceptions=True)
+        await trip_counters.flush()
+    # Includes writing the last batch
+    counted = time.perf_counter() - started
+    total = sum(len(views) for views in workload)
+    stored = await _stored_views(trip_ids)
+    if stored != total:
+        raise SystemExit(f"{label}: {stored} views stored, {total} made")
+    batches = trip_counters.COUNTER_FLUSHES.value(result="ok") - flushes if flusher is not None else total
+    print(f"{label:<10} {total:>8} {counted:>9.3f}s {total / counted:>12,.0f} {batches:>9,.0f}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"bench-{uuid.uuid4().hex}@example.com", password_hash="x")
+        db.add(user)
+        await db.flush()
+        trips = [Trip(user_id=user.id, name=f"Benchmark trip {i}", is_public=True) for i in range(args.trips)]
+        db.add_all(trips)
+        await db.commit()
+        trip_ids = [trip.id for trip in trips]
+    try:
+        workload = _workload(trip_ids, args.workers, args.views, seed=7)
+        print(f"{args.workers} workers x {args.views} views over {args.trips} trips, "
+              f"pool {settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW}, flush every {settings.COUNTER_FLUSH_SECONDS}s\n")
+        print(f"{'mode':<10} {'views':>8} {'time':>10} {'views/s':>12} {'writes':>9}")
+        await _run("direct", _direct, workload, trip_ids)
+        await _run("buffered", _buffered, workload, trip_ids)
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Trip).where(Trip.id.in_(trip_ids)))
+            await db.execute(delete(User).where(User.id == user.id))
+            await db.commit()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=50, help="concurrent viewers")
+    parser.add_argument("--views", type=int, default=200, help="views per worker")
+    parser.add_argument("--trips", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Nearby-city search and stop distance matrices.
+
+Nearby search is timed through the geohash index against an exact-distance
+full scan, on synthetic cities with random coordinates generated inside a
+transaction that is rolled back. Both must return the same cities. The
+distance matrix is timed with NumPy broadcasting against a pairwise Python
+loop (no database needed).
+
+    python -m benchmarks.bench_geo --cities 10000 100000 --radius 25 100 --stops 10 100 1000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import List
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import geo
+from app.database import engine
+from app.models.city import City
+from app.services import explore_service
+
+GROW_CITIES = text("""
+    INSERT INTO cities (id, name, country, region, rating, description, latitude, longitude)
+    SELECT gen_random_uuid(), 'Geo City ' || g, 'Geoland', 'Europe', 3, 'Synthetic city ' || g,
+           -55 + random() * 125, -180 + random() * 360
+    FROM generate_series(:start, :stop - 1) AS g
+""")
+
+
+async def _full_scan(session: AsyncSession, lat: float, lon: float, radius_km: float, limit: int):
+    distance = explore_service._distance_km(lat, lon)
+    result = await session.execute(
+        select(City.id).where(City.latitude.isnot(None), distance <= radius_km).order_by(distance, City.id).limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def _time(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def bench_nearby(sizes: List[int], radii: List[float], repeat: int) -> None:
+    rng = random.Random(7)
+    points = [(rng.uniform(-50, 65), rng.uniform(-180, 180)) for _ in range(repeat)]
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            session = AsyncSession(bind=conn)
+            loaded = 0
+            print(f"{'cities':>9} {'radius':>7} {'geohash':>10} {'full scan':>10} {'speedup':>8}")
+            for size in sizes:
+                await conn.execute(GROW_CITIES, {"start": loaded, "stop": size})
+                loaded = size
+                await conn.execute(text("ANALYZE cities"))
+                for radius in radii:
+                    for lat, lon in points[:5]:
+                        indexed = [c.id for c, _ in await explore_service.search_cities_nearby(session, lat, lon, radius, 50)]
+                        if indexed != await _full_scan(session, lat, lon, radius, 50):
+                            raise SystemExit(f"Results differ at ({lat:.3f}, {lon:.3f}) within {radius} km")
+                    it = iter(points * 2)
+                    indexed_ms = await _time(
+                        lambda: explore_service.search_cities_nearby(session, *next(it), radius, 20), repeat
+                    )
+                    it = iter(points * 2)
+                    scan_ms = await _time(lambda: _full_scan(session, *next(it), radius, 20), repeat)
+                    print(f"{size:>9} {radius:>5.0f}km {indexed_ms:>8.2f}ms {scan_ms:>8.2f}ms {scan_ms / indexed_ms:>7.1f}x")
+        finally:
+            await trans.rollback()
+    await engine.dispose()
+
+
+def bench_matrix(stop_counts: List[int], repeat: int) -> None:
+    print(f"\n{'stops':>6} {'numpy':>10} {'python':>10} {'speedup':>8}")
+    rng = random.Random(7)
+    for n in stop_counts:
+        lats = [rng.uniform(-60, 70) for _ in range(n)]
+        lons = [rng.uniform(-180, 180) for _ in range(n)]
+
+        def loop():
+            return [[geo.haversine_km(lats[i], lons[i], lats[j], lons[j]) for j in range(n)] for i in range(n)]
+
+        vectorized = geo.distance_matrix_km(lats, lons)
+        if not np.allclose(vectorized, np.array(loop()), atol=1e-6):
+            raise SystemExit(f"Matrices differ for {n} stops")
+        timings = []
+        for fn in (lambda: geo.distance_matrix_km(lats, lons), loop):
+            samples = []
+            for _ in range(max(1, repeat // 10) if n >= 1000 else repeat):
+                started = time.perf_counter()
+                fn()
+                samples.append((time.perf_counter() - started) * 1000)
+            timings.append(statistics.median(samples))
+        print(f"{n:>6} {timings[0]:>8.3f}ms {timings[1]:>8.3f}ms {timings[1] / timings[0]:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", type=int, nargs="+", default=[10000])
+    parser.add_argument("--radius", type=float, nargs="+", default=[25, 100])
+    parser.add_argument("--stops", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--no-db", action="store_true", help="only run the distance matrix benchmark")
+    args = parser.parse_args()
+    if not args.no_db:
+        asyncio.run(bench_nearby(sorted(args.cities), args.radius, args.repeat))
+    bench_matrix(sorted(args.stops), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Recommendation job scaling and lookup latency.
+
+Times the co-occurrence and top-k stages of ``app.recommender`` on synthetic
+trips (activities drawn with a skewed popularity, as real catalogs are) and
+the city scoring on synthetic cities, then writes the result to a temporary
+``.npz`` and times in-memory lookups from it. No database needed.
+
+    python -m benchmarks.bench_recommender --rows 100000 1000000 5000000 --activities 200000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from app import recommender
+from app.services.recommendations import TopK
+
+_PER_TRIP = 12
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def bench_activities(rows: int, n_activities: int, k: int, rng: np.random.Generator):
+    trips = np.repeat(np.arange(rows // _PER_TRIP), _PER_TRIP)
+    # Zipf-like popularity
+    weights = 1 / np.arange(1, n_activities + 1) ** 0.8
+    items = rng.choice(n_activities, size=trips.size, p=weights / weights.sum())
+    scores, co_seconds = _timed(recommender.co_occurrence, trips, items, n_activities)
+    (neighbours, top), top_seconds = _timed(recommender.top_k_sparse, scores, k)
+    print(f"{trips.size:>10} {n_activities:>10} {scores.nnz:>12} {co_seconds:>8.2f}s {top_seconds:>8.2f}s")
+    return neighbours, top
+
+
+def bench_cities(n: int, k: int, rng: np.random.Generator) -> None:
+    regions = rng.integers(-1, 8, n).astype(np.int32)
+    costs = rng.integers(-1, len(recommender.COST_LEVELS), n).astype(np.int32)
+    ratings = rng.uniform(0, 5, n).astype(np.float32)
+    trips = np.repeat(np.arange(n * 2), 4)
+    together = recommender.co_occurrence(trips, rng.integers(0, n, trips.size), n)
+    _, seconds = _timed(recommender.similar_cities, regions, costs, ratings, together, k)
+    print(f"{n} cities: {seconds:.2f}s")
+
+
+def bench_lookup(neighbours: np.ndarray, top: np.ndarray, repeat: int) -> None:
+    ids = np.frombuffer(b"".join(uuid.uuid4().bytes for _ in range(len(neighbours))), dtype=np.uint8).reshape(-1, 16)
+    fd, path = tempfile.mkstemp(suffix=".npz")
+    os.close(fd)
+    try:
+        recommender.save(path, {"ids": ids, "neighbours": neighbours, "scores": top})
+        size = os.path.getsize(path)
+        with np.load(path) as data:
+            index, load_seconds = _timed(TopK, data["ids"], data["neighbours"], data["scores"])
+    finally:
+        os.unlink(path)
+    keys = [uuid.UUID(bytes=ids[i].tobytes()) for i in np.random.default_rng(1).integers(0, len(ids), repeat)]
+    samples = []
+    for key in keys:
+        started = time.perf_counter()
+        index.get(key, 10)
+        samples.append((time.perf_counter() - started) * 1e6)
+    print(f"\n{len(ids)} items: {size / 2**20:.1f} MiB on disk, loaded in {load_seconds:.2f}s, "
+          f"lookup p50 {statistics.median(samples):.1f}us, max {max(samples):.1f}us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000], help="stop activities")
+    parser.add_argument("--activities", type=int, default=100_000)
+    parser.add_argument("--cities", type=int, default=5000)
+    parser.add_argument("--k", type=int, default=recommender.DEFAULT_K)
+    parser.add_argument("--repeat", type=int, default=10000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(7)
+
+    print(f"{'rows':>10} {'items':>10} {'pairs':>12} {'co-occur':>9} {'top-k':>9}")
+    for rows in sorted(args.rows):
+        neighbours, top = bench_activities(rows, args.activities, args.k, rng)
+    print()
+    bench_cities(args.cities, args.k, rng)
+    bench_lookup(neighbours, top, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Stop order optimization.
+
+Times ``route_optimizer.optimize_order`` on random stops and reports the route
+length against the given (random) order and against nearest neighbour alone.
+For small trips the result is also checked against the exact optimum found by
+trying every permutation. No database needed.
+
+    python -m benchmarks.bench_route --stops 10 50 200 500 --budget-ms 50
+"""
+import argparse
+import itertools
+import random
+import statistics
+import time
+from typing import List
+
+from app.core import geo, route_optimizer
+
+
+def _points(rng: random.Random, n: int):
+    # A region about the size of western Europe
+    return [rng.uniform(36, 60) for _ in range(n)], [rng.uniform(-10, 20) for _ in range(n)]
+
+
+def bench_gap(trips: int, n: int, rng: random.Random) -> None:
+    gaps = []
+    for _ in range(trips):
+        distances = geo.distance_matrix_km(*_points(rng, n))
+        _, length = route_optimizer.optimize_order(distances, start=0, end=n - 1)
+        best = min(
+            route_optimizer.path_length(distances, [0, *middle, n - 1])
+            for middle in itertools.permutations(range(1, n - 1))
+        )
+        gaps.append((length / best - 1) * 100)
+    print(f"{n} stops, fixed ends, {trips} trips: {statistics.mean(gaps):.2f}% above optimal on average, "
+          f"{max(gaps):.2f}% at worst\n")
+
+
+def bench_optimize(stop_counts: List[int], budget_ms: float, repeat: int, rng: random.Random) -> None:
+    print(f"{'stops':>6} {'given':>10} {'nn':>10} {'nn+2opt':>10} {'p50':>9} {'max':>9}")
+    for n in stop_counts:
+        given, nearest, optimized, samples = [], [], [], []
+        for _ in range(repeat):
+            distances = geo.distance_matrix_km(*_points(rng, n))
+            given.append(route_optimizer.path_length(distances, list(range(n))))
+            # A zero budget stops after the nearest-neighbour construction
+            nearest.append(route_optimizer.optimize_order(distances, start=0, time_budget_s=0)[1])
+            started = time.perf_counter()
+            optimized.append(route_optimizer.optimize_order(distances, start=0, time_budget_s=budget_ms / 1000)[1])
+            samples.append((time.perf_counter() - started) * 1000)
+        print(
+            f"{n:>6} {statistics.mean(given):>8.0f}km {statistics.mean(nearest):>8.0f}km "
+            f"{statistics.mean(optimized):>8.0f}km {statistics.median(samples):>7.2f}ms {max(samples):>7.2f}ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stops", type=int, nargs="+", default=[10, 50, 200, 500])
+    parser.add_argument("--budget-ms", type=float, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--exact", type=int, default=9, help="stops in the exact-optimum comparison (0 skips it)")
+    args = parser.parse_args()
+    rng = random.Random(7)
+    if args.exact:
+        bench_gap(args.repeat, args.exact, rng)
+    bench_optimize(sorted(args.stops), args.budget_ms, args.repeat, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Explore search latency as the catalog grows.
+
+Synthetic cities and activities are generated server-side with
+generate_series inside a single transaction that is rolled back at the end,
+so this can be pointed at any migrated database without leaving data behind.
+
+    python -m benchmarks.bench_search --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import engine
+from app.services import explore_service
+
+QUERIES = ["par", "museum", "sushi clas", "vulcano hike", "barcelna"]
+
+WORDS = [
+    "Old", "Grand", "Royal", "Hidden", "Sunset", "Harbor", "Museum", "Market", "Temple", "Garden",
+    "Volcano", "Hike", "Sushi", "Class", "Tapas", "Tour", "Castle", "River", "Cruise", "Night",
+    "Street", "Food", "Art", "Gallery", "Beach", "Island", "Mountain", "Forest", "Palace", "Bazaar",
+]
+
+GROW_CITIES = text("""
+    INSERT INTO cities (id, name, country, region, cost_index, rating, description)
+    SELECT gen_random_uuid(),
+           w[1 + (g * 7) % cardinality(w)] || ' ' || w[1 + (g * 13) % cardinality(w)] || ' ' || g,
+           'Country ' || (g % 190),
+           (ARRAY['Europe', 'Asia', 'Americas', 'Africa', 'Oceania'])[1 + g % 5],
+           (ARRAY['budget', 'moderate', 'expensive', 'luxury'])[1 + g % 4],
+           round((random() * 5)::numeric, 1),
+           'Synthetic city ' || g
+    FROM generate_series(:start, :stop - 1) AS g, (SELECT CAST(:words AS text[]) AS w) AS vocab
+""")
+
+GROW_ACTIVITIES = text("""
+    INSERT INTO activities (id, city_id, name, description, duration_minutes, cost, category)
+    SELECT gen_random_uuid(),
+           c.id,
+           w[1 + (g * 3) % cardinality(w)] || ' ' || w[1 + (g * 11) % cardinality(w)] || ' ' || w[1 + (g * 17) % cardinality(w)],
+           'A ' || lower(w[1 + (g * 5) % cardinality(w)]) || ' experience number ' || g,
+           30 + (g % 8) * 30,
+           (g % 200)::numeric,
+           (ARRAY['sightseeing', 'food', 'adventure', 'culture'])[1 + g % 4]
+    FROM generate_series(:start, :stop - 1) AS g
+    JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS rn FROM cities) AS c ON c.rn = g % :city_count
+    CROSS JOIN (SELECT CAST(:words AS text[]) AS w) AS vocab
+""")
+
+
+async def _time_query(session: AsyncSession, q: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await explore_service.search_activities(session, q=q, limit=20)
+        await explore_service.search_cities(session, q=q, limit=20)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def run(sizes, repeat: int) -> None:
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            session = AsyncSession(bind=conn)
+            cities = activities = 0
+            print(f"{'activities':>12} {'cities':>9} " + " ".join(f"{q[:12]:>13}" for q in QUERIES))
+            for size in sizes:
+                city_target = max(size // 20, 1)
+                if city_target > cities:
+                    await conn.execute(GROW_CITIES, {"start": cities, "stop": city_target, "words": WORDS})
+                    cities = city_target
+                if size > activities:
+                    await conn.execute(
+                        GROW_ACTIVITIES,
+                        {"start": activities, "stop": size, "city_count": cities, "words": WORDS},
+                    )
+                    activities = size
+                await conn.execute(text("ANALYZE cities"))
+                await conn.execute(text("ANALYZE activities"))
+
+                medians = [await _time_query(session, q, repeat) for q in QUERIES]
+                print(f"{activities:>12} {cities:>9} " + " ".join(f"{m:>11.2f}ms" for m in medians))
+        finally:
+            await trans.rollback()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(sorted(args.sizes), args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Trip detail latency: ORM + pydantic versus the single-statement SQL document.
+
+A synthetic trip of each size is created inside a transaction that is rolled
+back at the end. Both paths are checked to produce the same document before
+they are timed.
+
+    python -m benchmarks.bench_trip_document --stops 5 20 50 --activities 5
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from datetime import date, time as dtime, timedelta
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import engine
+from app.models.activity import Activity
+from app.models.city import City
+from app.models.trip import StopActivity, Trip, TripExpense, TripStop
+from app.models.user import User
+from app.schemas.trip import TripResponse
+from app.services import trip_service
+
+
+async def _orm_document(session: AsyncSession, trip_id: uuid.UUID) -> str:
+    trip = await trip_service.get_trip(session, trip_id)
+    return TripResponse.model_validate(trip).model_dump_json()
+
+
+async def _sql_document(session: AsyncSession, trip_id: uuid.UUID) -> str:
+    return (await trip_service.get_trip_document(session, trip_id=trip_id))[3]
+
+
+def _normalized(document: str):
+    # The ORM path does not order activities or expenses
+    doc = json.loads(document)
+    for stop in doc["stops"]:
+        stop["activities"].sort(key=lambda a: a["id"])
+    doc["expenses"].sort(key=lambda e: e["id"])
+    return doc
+
+
+async def create_synthetic_trip(session: AsyncSession, user: User, stops: int, activities: int) -> uuid.UUID:
+    trip = Trip(user_id=user.id, name=f"Benchmark trip ({stops} stops)", start_date=date(2030, 1, 1),
+                estimated_budget=Decimal("2500.00"), status="draft", is_public=False)
+    session.add(trip)
+    await session.flush()
+    for i in range(stops):
+        city = City(name=f"Bench City {trip.id.hex[:8]}-{i}", country="Benchland", rating=4.5, description="Synthetic")
+        session.add(city)
+        await session.flush()
+        stop = TripStop(trip_id=trip.id, city_id=city.id, order_index=i,
+                        start_date=date(2030, 1, 1) + timedelta(days=i), end_date=date(2030, 1, 2) + timedelta(days=i))
+        session.add(stop)
+        await session.flush()
+        for j in range(activities):
+            activity = Activity(city_id=city.id, name=f"Bench Activity {j}", duration_minutes=90,
+                                cost=Decimal("19.90"), category="culture")
+            session.add(activity)
+            await session.flush()
+            session.add(StopActivity(stop_id=stop.id, activity_id=activity.id,
+                                     scheduled_time=dtime(9 + j % 10, 30), notes="Synthetic"))
+        session.add(TripExpense(trip_id=trip.id, category="food", amount=Decimal("42.10")))
+    await session.flush()
+    return trip.id
+
+
+async def _time(session: AsyncSession, load, trip_id: uuid.UUID, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        session.expunge_all()
+        started = time.perf_counter()
+        await load(session, trip_id)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def run(stop_counts, activities: int, repeat: int) -> None:
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            session = AsyncSession(bind=conn, expire_on_commit=False)
+            user = User(email=f"bench-{uuid.uuid4().hex}@example.com", password_hash="x")
+            session.add(user)
+            await session.flush()
+
+            print(f"{'stops':>6} {'activities':>11} {'orm':>10} {'sql':>10} {'speedup':>8}")
+            for stops in stop_counts:
+                trip_id = await create_synthetic_trip(session, user, stops, activities)
+                session.expunge_all()
+                if _normalized(await _orm_document(session, trip_id)) != _normalized(await _sql_document(session, trip_id)):
+                    raise SystemExit(f"Documents differ for a trip with {stops} stops")
+                orm = await _time(session, _orm_document, trip_id, repeat)
+                sql = await _time(session, _sql_document, trip_id, repeat)
+                print(f"{stops:>6} {stops * activities:>11} {orm:>8.2f}ms {sql:>8.2f}ms {orm / sql:>7.1f}x")
+        finally:
+            await trans.rollback()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stops", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--activities", type=int, default=5, help="activities per stop")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(sorted(args.stops), args.activities, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
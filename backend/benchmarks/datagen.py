@@ -0,0 +1,271 @@
+"""
+Synthetic dataset for load tests.
+
+Everything is generated server-side with generate_series and committed, so the
+application under test sees it through its own sessions. Rows belong to a run
+tag: users are ``load-<tag>-<n>@example.com`` and cities are in the country
+``Load <tag>``, which is what ``cleanup`` deletes by.
+
+    python -m benchmarks.datagen --users 1000 --trips 5 --stops 6 --activities 3
+    python -m benchmarks.datagen --cleanup --tag 1a2b3c
+"""
+import argparse
+import asyncio
+import re
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.security import get_password_hash
+from app.database import engine
+from app.services.budget_service import rollup_rebuild_statements
+from app.services.feed_service import feed_refresh_statements
+from benchmarks.bench_search import WORDS
+
+PASSWORD = "load-test-password"
+
+
+@dataclass(frozen=True)
+class Scale:
+    users: int = 100
+    trips_per_user: int = 5
+    stops_per_trip: int = 5
+    activities_per_stop: int = 3
+    cities: int = 200
+    activities_per_city: int = 10
+
+
+@dataclass
+class Dataset:
+    tag: str
+    emails: List[str] = field(default_factory=list)
+    public_trip_ids: List[UUID] = field(default_factory=list)
+    activities_by_city: Dict[UUID, List[UUID]] = field(default_factory=dict)
+
+
+def _user_pattern(tag: str) -> str:
+    return f"load-{tag}-%@example.com"
+
+
+def _country(tag: str) -> str:
+    return f"Load {tag}"
+
+
+_TAG_TRIPS = "SELECT t.id FROM trips t JOIN users u ON u.id = t.user_id WHERE u.email LIKE :users"
+
+_USERS = text("""
+    INSERT INTO users (id, email, password_hash, name, created_at)
+    SELECT gen_random_uuid(), 'load-' || :tag || '-' || g || '@example.com', :password_hash,
+           'Load User ' || g, now()
+    FROM generate_series(1, :user_count) AS g
+""")
+
+_CITIES = text("""
+    INSERT INTO cities (id, name, country, region, cost_index, rating, description, latitude, longitude)
+    SELECT gen_random_uuid(),
+           w[1 + (g * 7) % cardinality(w)] || ' ' || w[1 + (g * 13) % cardinality(w)] || ' ' || g,
+           :country,
+           (ARRAY['Europe', 'Asia', 'Americas', 'Africa', 'Oceania'])[1 + g % 5],
+           (ARRAY['budget', 'moderate', 'expensive', 'luxury'])[1 + g % 4],
+           round((random() * 5)::numeric, 1),
+           'Synthetic city ' || g,
+           -55 + random() * 125,
+           -180 + random() * 360
+    FROM generate_series(1, :cities) AS g, (SELECT CAST(:words AS text[]) AS w) AS vocab
+""")
+
+_ACTIVITIES = text("""
+    INSERT INTO activities (id, city_id, name, description, duration_minutes, cost, category)
+    SELECT gen_random_uuid(), c.id,
+           w[1 + (g * 3) % cardinality(w)] || ' ' || w[1 + (g * 11) % cardinality(w)] || ' ' || g,
+           'A ' || lower(w[1 + (g * 5) % cardinality(w)]) || ' experience in ' || c.name,
+           30 + (g % 8) * 30,
+           (5 + g * 17 % 150)::numeric,
+           (ARRAY['sightseeing', 'food', 'adventure', 'culture'])[1 + g % 4]
+    FROM cities c
+    CROSS JOIN generate_series(1, :per_city) AS g
+    CROSS JOIN (SELECT CAST(:words AS text[]) AS w) AS vocab
+    WHERE c.country = :country
+""")
+
+_TRIPS = text("""
+    INSERT INTO trips (id, user_id, name, description, start_date, end_date, status, is_public, estimated_budget)
+    SELECT gen_random_uuid(), u.id, 'Trip ' || g || ' of ' || u.name, 'Synthetic trip',
+           start_date, start_date + 2 * :stops, 'upcoming', g % 3 = 0, 500 + (g * 250)
+    FROM users u
+    CROSS JOIN generate_series(1, :trips) AS g
+    CROSS JOIN LATERAL (
+        SELECT date '2030-01-01' + ((hashtext(u.email) & 1023) + g * 41) % 365 AS start_date
+    ) AS d
+    WHERE u.email LIKE :users
+""")
+
+_STOPS = text(f"""
+    WITH c AS (
+        SELECT id, row_number() OVER (ORDER BY id) - 1 AS rn FROM cities WHERE country = :country
+    ), t AS (
+        SELECT id, start_date, row_number() OVER (ORDER BY id) AS rn FROM trips WHERE id IN ({_TAG_TRIPS})
+    )
+    INSERT INTO trip_stops (id, trip_id, city_id, order_index, start_date, end_date)
+    SELECT gen_random_uuid(), t.id, c.id, s, t.start_date + 2 * s, t.start_date + 2 * s + 1
+    FROM t
+    CROSS JOIN generate_series(0, :stops - 1) AS s
+    JOIN c ON c.rn = (t.rn * 7 + s * 3) % (SELECT count(*) FROM c)
+""")
+
+_STOP_ACTIVITIES = text(f"""
+    WITH a AS (
+        SELECT id, city_id, row_number() OVER (PARTITION BY city_id ORDER BY id) - 1 AS rn
+        FROM activities WHERE city_id IN (SELECT id FROM cities WHERE country = :country)
+    )
+    INSERT INTO stop_activities (id, stop_id, activity_id, scheduled_time, notes)
+    SELECT gen_random_uuid(), s.id, a.id, time '09:00' + k * interval '150 minutes', NULL
+    FROM trip_stops s
+    CROSS JOIN generate_series(0, :per_stop - 1) AS k
+    JOIN a ON a.city_id = s.city_id AND a.rn = (k + s.order_index) % :per_city
+    WHERE s.trip_id IN ({_TAG_TRIPS})
+""")
+
+_EXPENSES = text(f"""
+    INSERT INTO trip_expenses (id, trip_id, stop_id, category, amount, spent_on, notes)
+    SELECT gen_random_uuid(), s.trip_id, s.id, (ARRAY['accommodation', 'food', 'transport'])[1 + k],
+           (20 + k * 35 + s.order_index * 3)::numeric, s.start_date, NULL
+    FROM trip_stops s
+    CROSS JOIN generate_series(0, 1) AS k
+    WHERE s.trip_id IN ({_TAG_TRIPS})
+""")
+
+_CLEANUP = [
+    text(f"DELETE FROM stop_activities WHERE stop_id IN (SELECT id FROM trip_stops WHERE trip_id IN ({_TAG_TRIPS}))"),
+    text(f"DELETE FROM trip_expenses WHERE trip_id IN ({_TAG_TRIPS})"),
+    text(f"DELETE FROM trip_budget_rollups WHERE trip_id IN ({_TAG_TRIPS})"),
+    text(f"DELETE FROM trip_feed WHERE trip_id IN ({_TAG_TRIPS})"),
+    text(f"DELETE FROM trip_stats WHERE trip_id IN ({_TAG_TRIPS})"),
+    text(f"DELETE FROM trip_stops WHERE trip_id IN ({_TAG_TRIPS})"),
+    text("DELETE FROM trips WHERE user_id IN (SELECT id FROM users WHERE email LIKE :users)"),
+    text("DELETE FROM users WHERE email LIKE :users"),
+    text("DELETE FROM activities WHERE city_id IN (SELECT id FROM cities WHERE country = :country)"),
+    text("DELETE FROM cities WHERE country = :country"),
+]
+
+
+def new_tag() -> str:
+    return uuid.uuid4().hex[:8]
+
+
+def _check_tag(tag: str) -> None:
+    # Tags end up inside LIKE patterns
+    if not re.fullmatch(r"[a-z0-9]+", tag):
+        raise ValueError("Tags may only contain lowercase letters and digits")
+
+
+async def generate(conn: AsyncConnection, tag: str, scale: Scale) -> Dict[str, float]:
+    """Insert a dataset of the given scale and return seconds spent per table."""
+    _check_tag(tag)
+    params = {
+        "tag": tag, "users": _user_pattern(tag), "country": _country(tag), "words": WORDS,
+        "password_hash": get_password_hash(PASSWORD), "user_count": scale.users, "cities": scale.cities,
+        "per_city": scale.activities_per_city, "trips": scale.trips_per_user,
+        "stops": scale.stops_per_trip, "per_stop": min(scale.activities_per_stop, scale.activities_per_city),
+    }
+    steps = [
+        ("users", [_USERS]),
+        ("cities", [_CITIES]),
+        ("activities", [_ACTIVITIES]),
+        ("trips", [_TRIPS]),
+        ("trip_stops", [_STOPS]),
+        ("stop_activities", [_STOP_ACTIVITIES]),
+        ("trip_expenses", [_EXPENSES]),
+        ("trip_budget_rollups", [text(s) for s in rollup_rebuild_statements(_TAG_TRIPS)]),
+        ("trip_feed", [text(s) for s in feed_refresh_statements(_TAG_TRIPS)]),
+    ]
+    timings = {}
+    for table, statements in steps:
+        started = time.perf_counter()
+        for statement in statements:
+            await conn.execute(statement, params)
+        timings[table] = time.perf_counter() - started
+    await conn.execute(text("ANALYZE"))
+    return timings
+
+
+async def load(conn: AsyncConnection, tag: str) -> Dataset:
+    """Read back the ids a load test needs from a generated dataset."""
+    _check_tag(tag)
+    params = {"users": _user_pattern(tag), "country": _country(tag)}
+    dataset = Dataset(tag=tag)
+    result = await conn.execute(text("SELECT email FROM users WHERE email LIKE :users ORDER BY email"), params)
+    dataset.emails = list(result.scalars())
+    result = await conn.execute(text(f"SELECT id FROM trips WHERE is_public AND id IN ({_TAG_TRIPS})"), params)
+    dataset.public_trip_ids = list(result.scalars())
+    result = await conn.execute(
+        text("SELECT a.city_id, a.id FROM activities a JOIN cities c ON c.id = a.city_id WHERE c.country = :country"),
+        params,
+    )
+    activities = defaultdict(list)
+    for city_id, activity_id in result:
+        activities[city_id].append(activity_id)
+    dataset.activities_by_city = dict(activities)
+    return dataset
+
+
+async def cleanup(conn: AsyncConnection, tag: str) -> None:
+    _check_tag(tag)
+    params = {"users": _user_pattern(tag), "country": _country(tag)}
+    for statement in _CLEANUP:
+        await conn.execute(statement, params)
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = Scale()
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--trips", type=int, default=defaults.trips_per_user, help="trips per user")
+    parser.add_argument("--stops", type=int, default=defaults.stops_per_trip, help="stops per trip")
+    parser.add_argument("--activities", type=int, default=defaults.activities_per_stop, help="activities per stop")
+    parser.add_argument("--cities", type=int, default=defaults.cities)
+    parser.add_argument("--city-activities", type=int, default=defaults.activities_per_city,
+                        help="catalog activities per city")
+
+
+def scale_from_arguments(args: argparse.Namespace) -> Scale:
+    return Scale(
+        users=args.users, trips_per_user=args.trips, stops_per_trip=args.stops,
+        activities_per_stop=args.activities, cities=args.cities, activities_per_city=args.city_activities,
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    try:
+        async with engine.begin() as conn:
+            if args.cleanup:
+                await cleanup(conn, args.tag)
+                print(f"Removed dataset {args.tag}")
+                return
+            tag = args.tag or new_tag()
+            timings = await generate(conn, tag, scale_from_arguments(args))
+        for table, seconds in timings.items():
+            print(f"{table:>20} {seconds:>8.2f}s")
+        print(f"Generated dataset {tag} (password {PASSWORD!r})")
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_scale_arguments(parser)
+    parser.add_argument("--tag", help="run tag; generated when omitted")
+    parser.add_argument("--cleanup", action="store_true", help="delete the dataset with --tag")
+    args = parser.parse_args()
+    if args.cleanup and not args.tag:
+        parser.error("--cleanup requires --tag")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
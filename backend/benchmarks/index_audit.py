@@ -0,0 +1,265 @@
+"""
+Index audit and query-plan check.
+
+The audit compares the columns the app joins and filters on (every foreign
+key in the models plus ``FILTERED_COLUMNS``) with the btree indexes that exist,
+and reports columns no index leads with and indexes made redundant by a
+longer one. By default it inspects the connected database; ``--models``
+audits the SQLAlchemy metadata instead and needs no database.
+
+``--explain`` seeds a synthetic dataset inside a transaction that is rolled
+back, runs the hot read paths through the real service functions, captures
+every statement they issue and EXPLAINs it. Any sequential scan on an app
+table is a failure. The exit status is non-zero when either check fails, so
+this can run in CI against a migrated database.
+
+    python -m benchmarks.index_audit
+    python -m benchmarks.index_audit --models
+    python -m benchmarks.index_audit --explain --users 2000 --cities 1000
+"""
+import argparse
+import asyncio
+import json
+import sys
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import UniqueConstraint, event, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app import models  # noqa: F401  (registers every table on Base.metadata)
+from app.core.query_log import statement_shape
+from app.database import Base, engine
+from app.models.activity import Activity
+from app.models.city import City
+from app.models.trip import Trip, TripStop
+from app.services import (
+    budget_service, calendar_service, explore_service, feed_service, itinerary_service, trip_service,
+)
+from benchmarks import datagen
+
+# Columns filtered on outside of foreign keys: table -> column groups
+FILTERED_COLUMNS: Dict[str, List[Tuple[str, ...]]] = {
+    "users": [("email",)],
+    "trips": [("user_id", "start_date"), ("share_token",)],
+    "trip_stops": [("trip_id", "start_date")],
+    "stop_activities": [("stop_id",)],
+    "cities": [("region",), ("name", "country")],
+    "activities": [("category",), ("city_id", "name")],
+}
+
+
+@dataclass(frozen=True)
+class IndexInfo:
+    table: str
+    name: str
+    columns: Tuple[str, ...]
+    unique: bool
+    partial: bool
+    method: str = "btree"
+
+
+def required_columns() -> Iterator[Tuple[str, Tuple[str, ...], str]]:
+    """``(table, columns, reason)`` for every column group that needs a leading index."""
+    for table in Base.metadata.sorted_tables:
+        for fk in table.foreign_key_constraints:
+            yield table.name, tuple(column.name for column in fk.columns), f"foreign key to {fk.referred_table.name}"
+    for table, groups in FILTERED_COLUMNS.items():
+        for columns in groups:
+            yield table, columns, "filter"
+
+
+def _column_name(expression: Any) -> str:
+    # Ordered elements (rating DESC) wrap their column
+    while hasattr(expression, "element"):
+        expression = expression.element
+    return getattr(expression, "name", "(expression)")
+
+
+def model_indexes() -> List[IndexInfo]:
+    indexes = []
+    for table in Base.metadata.sorted_tables:
+        indexes.append(IndexInfo(table.name, f"{table.name}_pkey", tuple(c.name for c in table.primary_key), True, False))
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint):
+                name = constraint.name or f"{table.name}_{'_'.join(c.name for c in constraint.columns)}_key"
+                indexes.append(IndexInfo(table.name, name, tuple(c.name for c in constraint.columns), True, False))
+        for index in table.indexes:
+            dialect = index.dialect_options["postgresql"]
+            indexes.append(IndexInfo(
+                table.name, index.name, tuple(_column_name(e) for e in index.expressions), bool(index.unique),
+                dialect["where"] is not None, dialect["using"] or "btree",
+            ))
+    return indexes
+
+
+_DATABASE_INDEXES = text("""
+    SELECT t.relname AS table, i.relname AS name, ix.indisunique AS unique, ix.indpred IS NOT NULL AS partial,
+           am.amname AS method,
+           array(
+               SELECT coalesce(a.attname, '(expression)')
+               FROM unnest(ix.indkey) WITH ORDINALITY AS k (attnum, n)
+               LEFT JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum AND k.attnum > 0
+               ORDER BY k.n
+           ) AS columns
+    FROM pg_index ix
+    JOIN pg_class t ON t.oid = ix.indrelid
+    JOIN pg_class i ON i.oid = ix.indexrelid
+    JOIN pg_am am ON am.oid = i.relam
+    JOIN pg_namespace ns ON ns.oid = t.relnamespace
+    WHERE ns.nspname = current_schema() AND t.relname = ANY(:tables)
+""")
+
+
+async def database_indexes(conn: AsyncConnection) -> List[IndexInfo]:
+    result = await conn.execute(_DATABASE_INDEXES, {"tables": list(Base.metadata.tables)})
+    return [
+        IndexInfo(row.table, row.name, tuple(row.columns), row.unique, row.partial, row.method)
+        for row in result
+    ]
+
+
+def _leads_with(index: IndexInfo, columns: Sequence[str]) -> bool:
+    return index.method == "btree" and set(index.columns[:len(columns)]) == set(columns)
+
+
+def audit(indexes: List[IndexInfo]) -> Tuple[List[str], List[str]]:
+    """Return ``(missing, redundant)`` findings."""
+    by_table: Dict[str, List[IndexInfo]] = {}
+    for index in indexes:
+        by_table.setdefault(index.table, []).append(index)
+
+    missing = []
+    for table, columns, reason in required_columns():
+        if not any(_leads_with(index, columns) for index in by_table.get(table, [])):
+            missing.append(f"{table}({', '.join(columns)}): no index leads with these columns ({reason})")
+
+    redundant = []
+    for table, table_indexes in by_table.items():
+        for index in table_indexes:
+            if index.unique or index.partial or index.method != "btree":
+                continue
+            wider = [
+                other for other in table_indexes
+                if other is not index and other.method == "btree" and not other.partial
+                and len(other.columns) > len(index.columns) and other.columns[:len(index.columns)] == index.columns
+            ]
+            if wider:
+                redundant.append(f"{table}.{index.name}({', '.join(index.columns)}) is a prefix of {wider[0].name}")
+    return missing, redundant
+
+
+# Query plans
+
+async def _sample(session: AsyncSession) -> Dict[str, Any]:
+    user_id, trip_id = (await session.execute(
+        select(Trip.user_id, Trip.id).join(TripStop, TripStop.trip_id == Trip.id).limit(1)
+    )).first()
+    region, city_id = (await session.execute(select(City.region, City.id).where(City.region.isnot(None)).limit(1))).first()
+    category = await session.scalar(select(Activity.category).where(Activity.category.isnot(None)).limit(1))
+    return {"user_id": user_id, "trip_id": trip_id, "region": region, "city_id": city_id, "category": category}
+
+
+async def _hot_paths(session: AsyncSession, user_id, trip_id, region, city_id, category) -> None:
+    """Exercise the read paths whose plans are checked."""
+    await trip_service.get_user_trips(session, user_id=user_id, limit=20)
+    await trip_service.get_user_trip_summaries(session, user_id=user_id, limit=20)
+    await trip_service.get_trip(session, trip_id)
+    await trip_service.get_trip_document(session, trip_id=trip_id)
+    await itinerary_service.get_itinerary(session, trip_id)
+    await budget_service.get_expenses(session, trip_id)
+    await budget_service.get_budget(session, trip_id, None)
+    await calendar_service.get_calendar(session, user_id, date(2030, 1, 1), date(2030, 12, 31))
+    await explore_service.search_cities(session, region=region)
+    await explore_service.search_activities(session, city_id=city_id)
+    await explore_service.search_activities(session, category=category)
+    for sort in feed_service.FEED_KEYS:
+        await feed_service.get_feed(session, sort=sort)
+    session.expunge_all()
+
+
+def _plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+async def explain_hot_paths(conn: AsyncConnection, scale: datagen.Scale) -> List[str]:
+    """Seed, run the hot paths and return the statements that sequentially scan an app table."""
+    tables = set(Base.metadata.tables)
+    captured: Dict[str, Tuple[str, Any]] = {}
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.setdefault(statement_shape(statement), (statement, parameters))
+
+    await datagen.generate(conn, datagen.new_tag(), scale)
+    session = AsyncSession(bind=conn, expire_on_commit=False, autoflush=False)
+    sample = await _sample(session)
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        await _hot_paths(session, **sample)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    failures = []
+    for statement, parameters in captured.values():
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = result.scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        scans = sorted({
+            node["Relation Name"] for node in _plan_nodes(plan[0]["Plan"])
+            if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in tables
+        })
+        if scans:
+            failures.append(f"Seq Scan on {', '.join(scans)}:\n    {statement_shape(statement)[:300]}")
+    print(f"Checked the plans of {len(captured)} statements")
+    return failures
+
+
+async def run(args: argparse.Namespace) -> int:
+    failed = False
+    try:
+        if args.models:
+            indexes = model_indexes()
+        else:
+            async with engine.connect() as conn:
+                indexes = await database_indexes(conn)
+        missing, redundant = audit(indexes)
+        for finding in missing:
+            print(f"MISSING    {finding}")
+        for finding in redundant:
+            print(f"REDUNDANT  {finding}")
+        failed = bool(missing)
+
+        if args.explain:
+            async with engine.connect() as conn:
+                trans = await conn.begin()
+                try:
+                    failures = await explain_hot_paths(conn, datagen.scale_from_arguments(args))
+                finally:
+                    await trans.rollback()
+            for failure in failures:
+                print(f"SEQ SCAN   {failure}")
+            failed = failed or bool(failures)
+    finally:
+        await engine.dispose()
+    print("FAILED" if failed else "OK")
+    return 1 if failed else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", action="store_true", help="audit the model metadata instead of the database")
+    parser.add_argument("--explain", action="store_true", help="also check query plans on a seeded dataset")
+    datagen.add_scale_arguments(parser)
+    parser.set_defaults(users=2000, cities=1000, city_activities=20)
+    args = parser.parse_args()
+    if args.models and args.explain:
+        parser.error("--explain needs a database")
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
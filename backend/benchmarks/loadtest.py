@@ -0,0 +1,269 @@
+"""
+End-to-end load test of the API, in process.
+
+Generates a synthetic dataset (see ``benchmarks.datagen``), then has a number
+of virtual users log in and repeat a scripted session against ``app.main.app``
+through httpx's ASGI transport: explore search, trip list, trip detail,
+itinerary edits, copying a public trip and deleting the copy. For every
+endpoint it reports throughput, p50/p95/p99 latency and SQL statements per
+request, and writes the numbers to a JSON file tagged with the git commit so
+runs can be compared.
+
+    pip install -r requirements-bench.txt
+    python -m benchmarks.loadtest --users 200 --virtual-users 20 --iterations 25
+    python -m benchmarks.loadtest --tag 1a2b3c --keep --compare benchmarks/results/previous.json
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import math
+import os
+import random
+import subprocess
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import httpx
+from sqlalchemy import event
+
+from app.config import settings
+from app.database import engine, read_engine
+from app.main import app
+from benchmarks import datagen
+from benchmarks.bench_search import WORDS
+
+API = settings.API_V1_STR
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# SQL statements run on behalf of the request in flight in this task
+_statements: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar("statements", default=None)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+@dataclass
+class Samples:
+    latencies_ms: List[float] = field(default_factory=list)
+    statements: List[int] = field(default_factory=list)
+    errors: int = 0
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    # Nearest rank
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)]
+
+
+class Client:
+    """Times each request and counts the SQL it runs, keyed by endpoint label."""
+
+    def __init__(self, http: httpx.AsyncClient, samples: Dict[str, Samples]):
+        self.http = http
+        self.samples = samples
+        self.headers: Dict[str, str] = {}
+
+    async def request(self, label: str, method: str, url: str, **kwargs) -> httpx.Response:
+        counter = [0]
+        token = _statements.set(counter)
+        started = time.perf_counter()
+        try:
+            response = await self.http.request(method, url, headers=self.headers, **kwargs)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            _statements.reset(token)
+        samples = self.samples[label]
+        samples.latencies_ms.append(elapsed)
+        samples.statements.append(counter[0])
+        if response.status_code >= 400:
+            samples.errors += 1
+        return response
+
+
+async def _session(client: Client, dataset: datagen.Dataset, email: str, iterations: int, rng: random.Random) -> None:
+    response = await client.request(
+        "login", "POST", f"{API}/auth/login/json", json={"email": email, "password": datagen.PASSWORD}
+    )
+    response.raise_for_status()
+    client.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    for _ in range(iterations):
+        await client.request("explore cities", "GET", f"{API}/explore/cities", params={"q": rng.choice(WORDS).lower()})
+        await client.request(
+            "explore activities", "GET", f"{API}/explore/activities", params={"q": rng.choice(WORDS).lower()}
+        )
+
+        feed = await client.request(
+            "community feed", "GET", f"{API}/community/feed", params={"sort": rng.choice(["recent", "popular"])}
+        )
+        if "X-Next-Cursor" in feed.headers:
+            await client.request(
+                "community feed (page 2)", "GET", f"{API}/community/feed",
+                params={"sort": feed.request.url.params["sort"], "cursor": feed.headers["X-Next-Cursor"]},
+            )
+
+        trips = (await client.request("trip list", "GET", f"{API}/trips/", params={"limit": 20})).json()
+        await client.request("trip list (summary)", "GET", f"{API}/trips/", params={"limit": 20, "view": "summary"})
+        if not trips:
+            continue
+        trip = (await client.request("trip detail", "GET", f"{API}/trips/{rng.choice(trips)['id']}")).json()
+        if not trip.get("stops"):
+            continue
+
+        # Itinerary edits: add an activity, reschedule it in a batch, remove it
+        stop = rng.choice(trip["stops"])
+        activity_id = rng.choice(dataset.activities_by_city[UUID(stop["city_id"])])
+        added = await client.request(
+            "itinerary add activity", "POST", f"{API}/itinerary/activities/{stop['id']}",
+            json={"activity_id": str(activity_id), "scheduled_time": "18:00"},
+        )
+        if added.status_code < 400:
+            stop_activity_id = added.json()["id"]
+            await client.request(
+                "itinerary batch", "POST", f"{API}/itinerary/{trip['id']}/batch",
+                json={"operations": [
+                    {"op": "schedule_activity", "stop_activity": stop_activity_id, "scheduled_time": "19:30"},
+                ]},
+            )
+            await client.request("itinerary remove activity", "DELETE", f"{API}/itinerary/activities/{stop_activity_id}")
+
+        if dataset.public_trip_ids:
+            copied = await client.request(
+                "copy trip", "POST", f"{API}/community/copy/{rng.choice(dataset.public_trip_ids)}"
+            )
+            if copied.status_code < 400:
+                await client.request("delete trip", "DELETE", f"{API}/trips/{copied.json()['id']}")
+
+
+def summarize(samples: Dict[str, Samples], wall_seconds: float) -> Dict[str, Dict[str, Any]]:
+    endpoints = {}
+    for label, s in sorted(samples.items()):
+        latencies = sorted(s.latencies_ms)
+        endpoints[label] = {
+            "requests": len(latencies),
+            "errors": s.errors,
+            "throughput_rps": round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+            "p50_ms": round(_percentile(latencies, 50), 2),
+            "p95_ms": round(_percentile(latencies, 95), 2),
+            "p99_ms": round(_percentile(latencies, 99), 2),
+            "queries_per_request": round(sum(s.statements) / len(s.statements), 2) if s.statements else 0.0,
+            "max_queries": max(s.statements, default=0),
+        }
+    return endpoints
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(endpoints: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+    header = f"{'endpoint':<28} {'reqs':>6} {'err':>4} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'q/req':>6}"
+    if baseline:
+        header += f" {'p95 vs base':>12} {'q/req vs base':>14}"
+    print(header)
+    for label, e in endpoints.items():
+        line = (
+            f"{label:<28} {e['requests']:>6} {e['errors']:>4} {e['throughput_rps']:>8.1f} "
+            f"{e['p50_ms']:>7.1f}ms {e['p95_ms']:>7.1f}ms {e['p99_ms']:>7.1f}ms {e['queries_per_request']:>6.1f}"
+        )
+        base = (baseline or {}).get(label)
+        if base:
+            change = (e["p95_ms"] / base["p95_ms"] - 1) * 100 if base["p95_ms"] else 0.0
+            line += f" {change:>+11.1f}% {e['queries_per_request'] - base['queries_per_request']:>+14.1f}"
+        print(line)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    for target in {engine, read_engine}:
+        event.listen(target.sync_engine, "before_cursor_execute", _count_statement)
+
+    tag = args.tag or datagen.new_tag()
+    scale = datagen.scale_from_arguments(args)
+    try:
+        if not args.tag:
+            async with engine.begin() as conn:
+                await datagen.generate(conn, tag, scale)
+        async with engine.connect() as conn:
+            dataset = await datagen.load(conn, tag)
+        if not dataset.emails:
+            raise SystemExit(f"No dataset with tag {tag}")
+
+        samples: Dict[str, Samples] = defaultdict(Samples)
+        rng = random.Random(args.seed)
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as http:
+                started = time.perf_counter()
+                await asyncio.gather(*(
+                    _session(
+                        Client(http, samples), dataset, dataset.emails[i % len(dataset.emails)],
+                        args.iterations, random.Random(rng.random()),
+                    )
+                    for i in range(args.virtual_users)
+                ))
+                wall_seconds = time.perf_counter() - started
+    finally:
+        if not args.keep and not args.tag:
+            async with engine.begin() as conn:
+                await datagen.cleanup(conn, tag)
+        await engine.dispose()
+        if read_engine is not engine:
+            await read_engine.dispose()
+
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "started_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "dataset": tag,
+        "scale": None if args.tag else asdict(scale),
+        "workload": {"virtual_users": args.virtual_users, "iterations": args.iterations, "seed": args.seed},
+        "wall_seconds": round(wall_seconds, 3),
+        "endpoints": summarize(samples, wall_seconds),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    datagen.add_scale_arguments(parser)
+    parser.add_argument("--tag", help="reuse a dataset generated earlier instead of creating one")
+    parser.add_argument("--keep", action="store_true", help="keep the generated dataset")
+    parser.add_argument("--virtual-users", type=int, default=10, help="concurrent sessions")
+    parser.add_argument("--iterations", type=int, default=20, help="scripted iterations per session")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help=f"results file; defaults to a timestamped file in {RESULTS_DIR}")
+    parser.add_argument("--compare", help="results file of an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["endpoints"]
+    print_report(results["endpoints"], baseline)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"loadtest-{stamp}-{(results['commit'] or 'unknown')[:8]}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()